@@ -0,0 +1,57 @@
+"""Benchmark: how long `import garnets` takes in a fresh interpreter.
+
+Every worker process and CLI run pays this, so it is measured in a new
+subprocess each time. Also reports whether pandas got pulled in.
+
+Run from the repository root:
+
+    python benchmarks/import_time.py [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+from pathlib import Path
+
+SOURCE_DIR = Path(__file__).resolve().parents[1] / 'garnets'
+
+PROBE = '''
+import sys, time
+start = time.perf_counter()
+import garnets
+print(time.perf_counter() - start, 'pandas' in sys.modules)
+'''
+
+
+def time_import():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, [str(SOURCE_DIR), env.get('PYTHONPATH')]))
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        env=env,
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout.split()
+    return float(output[0]), output[1] == 'True'
+
+
+def main(runs=5):
+    # The first import may (re)build the gas table cache; time the rest.
+    time_import()
+    timings = []
+    for _ in range(runs):
+        seconds, pandas_loaded = time_import()
+        timings.append(seconds)
+
+    print("import garnets, %d runs" % runs)
+    print("median: %8.3f s" % statistics.median(timings))
+    print("min:    %8.3f s" % min(timings))
+    print("pandas imported: %s" % pandas_loaded)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,104 @@
+"""Benchmark: cost of the stage timing and counters.
+
+Generates the same seeded systems with instrumentation disabled (the
+default NULL_INSTRUMENTATION), with an Instrumentation and with a Tracer,
+on the float accretion engine, where accretion's per-planetesimal stages
+weigh the most.
+
+There is no uninstrumented build to compare the disabled run against, so
+its cost is estimated instead: the enabled run counts the stages, counts
+and peaks the systems report, and each is charged at the measured cost of
+reporting it to NULL_INSTRUMENTATION. The accretion stages in SKIPPED are
+not entered at all when instrumentation is disabled, and are left out.
+
+Run from the repository root:
+
+    python benchmarks/instrumentation_overhead.py [count]
+"""
+
+import sys
+import time
+import timeit
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'garnets'))
+
+# pylint: disable=wrong-import-position
+import garnets  # noqa: E402
+
+from accrete import FAST_ACCRETION  # noqa: E402
+from instrumentation import NULL_INSTRUMENTATION  # noqa: E402
+from instrumentation import Instrumentation  # noqa: E402
+from instrumentation import Tracer  # noqa: E402
+
+
+# Stages the accretion engines only enter when instrumentation is enabled.
+SKIPPED = ('injection', 'accrete_dust', 'coalescence')
+
+
+class CallCounter(Instrumentation):
+    """An Instrumentation that also counts the calls reported to it."""
+
+    calls = 0
+
+    def count(self, name, amount=1):
+        self.calls += 1
+        super().count(name, amount)
+
+    def peak(self, name, value):
+        self.calls += 1
+        super().peak(name, value)
+
+
+def time_generation(seeds, instrumentation):
+    start = time.perf_counter()
+    for seed in seeds:
+        garnets.generate_seeded_stellar_system(
+            seed, accretion=FAST_ACCRETION, instrumentation=instrumentation)
+    return time.perf_counter() - start
+
+
+def null_stage():
+    with NULL_INSTRUMENTATION.stage('accrete_dust', a=1.0) as span:
+        span.annotate(sweeps=1)
+
+
+def null_count():
+    NULL_INSTRUMENTATION.count('sweeps')
+
+
+def main(count=20):
+    seeds = list(range(count))
+    time_generation(seeds[:2], NULL_INSTRUMENTATION)
+
+    disabled = min(time_generation(seeds, NULL_INSTRUMENTATION)
+                   for _ in range(3))
+    instrumentation = CallCounter()
+    time_generation(seeds, instrumentation)
+    enabled = min(time_generation(seeds, Instrumentation())
+                  for _ in range(3))
+    traced = min(time_generation(seeds, Tracer()) for _ in range(3))
+
+    repeat = 10**6
+    stage_cost = min(timeit.repeat(null_stage, number=repeat,
+                                   repeat=3)) / repeat
+    count_cost = min(timeit.repeat(null_count, number=repeat,
+                                   repeat=3)) / repeat
+    stages = sum(times.calls for name, times
+                 in instrumentation.stages.items() if name not in SKIPPED)
+    counts = instrumentation.calls
+    estimate = stages * stage_cost + counts * count_cost
+
+    print("%d systems" % count)
+    print("disabled: %8.3f s" % disabled)
+    print("enabled:  %8.3f s (%.2fx)" % (enabled, enabled / disabled))
+    print("traced:   %8.3f s (%.2fx)" % (traced, traced / disabled))
+    print("disabled overhead: %d stages at %.0f ns, %d counts and peaks at "
+          "%.0f ns: %.4f s (%.2f%%)" % (
+              stages, stage_cost * 1e9, counts, count_cost * 1e9,
+              estimate, 100 * estimate / disabled))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
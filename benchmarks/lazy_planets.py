@@ -0,0 +1,62 @@
+"""Benchmark: lazy planets for consumers that only read orbits and masses.
+
+Generates the same seeded systems eagerly and with `lazy=True`, reading what
+the SVG template reads from each planet (`orbit.a`, `orbit.periapsis`,
+`orbit.apoapsis` and `mass`), then materializes the lazy systems to show
+what working everything out afterwards costs.
+
+Run from the repository root:
+
+    python benchmarks/lazy_planets.py [count]
+"""
+
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'garnets'))
+
+# pylint: disable=wrong-import-position
+import garnets  # noqa: E402
+
+from accrete import FAST_ACCRETION  # noqa: E402
+
+
+def read_orbits(system):
+    for planet in system.planets:
+        planet.orbit.a, planet.orbit.periapsis, planet.orbit.apoapsis
+        planet.mass
+
+
+def time_generation(seeds, lazy):
+    systems = []
+    start = time.perf_counter()
+    for seed in seeds:
+        system = garnets.generate_seeded_stellar_system(
+            seed, accretion=FAST_ACCRETION, lazy=lazy)
+        read_orbits(system)
+        systems.append(system)
+    return time.perf_counter() - start, systems
+
+
+def main(count=20):
+    seeds = list(range(count))
+
+    eager, _ = time_generation(seeds, lazy=False)
+    lazy, systems = time_generation(seeds, lazy=True)
+
+    start = time.perf_counter()
+    for system in systems:
+        garnets.materialize_system(system)
+    materialize = time.perf_counter() - start
+
+    print("%d systems, orbits and masses only" % count)
+    print("eager:        %8.3f s" % eager)
+    print("lazy:         %8.3f s" % lazy)
+    print("speedup:      %8.2fx" % (eager / lazy))
+    print("materialize:  %8.3f s afterwards" % materialize)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
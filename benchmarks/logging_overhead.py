@@ -0,0 +1,59 @@
+"""Benchmark: cost of the diagnostic logging.
+
+Generates the same seeded systems with logging quiet (the library default)
+and with every garnets logger at DEBUG, writing into an in-memory stream so
+that terminal speed does not skew the comparison.
+
+Run from the repository root:
+
+    python benchmarks/logging_overhead.py [count]
+"""
+
+import io
+import logging
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'garnets'))
+
+import garnets  # noqa: E402 pylint: disable=wrong-import-position
+
+LOGGERS = ['accrete', 'enviroment', 'fast_accrete', 'garnets']
+
+
+def time_generation(seeds):
+    start = time.perf_counter()
+    for seed in seeds:
+        garnets.generate_seeded_stellar_system(seed)
+    return time.perf_counter() - start
+
+
+def main(count=10):
+    seeds = list(range(count))
+
+    quiet = time_generation(seeds)
+
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    for name in LOGGERS:
+        logger = logging.getLogger(name)
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+    try:
+        verbose = time_generation(seeds)
+    finally:
+        for name in LOGGERS:
+            logger = logging.getLogger(name)
+            logger.removeHandler(handler)
+            logger.setLevel(logging.NOTSET)
+
+    print("%d systems" % count)
+    print("quiet:   %8.3f s" % quiet)
+    print("verbose: %8.3f s (%d bytes logged)" % (verbose, stream.tell()))
+    print("speedup: %8.2fx" % (verbose / quiet))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,70 @@
+"""Benchmark: reading a star's derived quantities from its StarContext.
+
+Stars used to work out their luminosity, ecosphere, dust limit and life on
+every read. This times such a read, done the old way (from the mass
+through `luminosity_ratio()`), against a read of the same quantity through
+the `Star` property and straight from `star.context`, as the accretion and
+environment code now does. The cost of the timing loop itself is printed
+first.
+
+Run from the repository root:
+
+    python benchmarks/star_context.py [reads]
+"""
+
+import sys
+import time
+
+from math import sqrt
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'garnets'))
+
+# pylint: disable=wrong-import-position
+from stellar_system import Star  # noqa: E402
+from stellar_system import luminosity_ratio  # noqa: E402
+from xatu.units import au  # noqa: E402
+from xatu.units import year  # noqa: E402
+# pylint: enable=wrong-import-position
+
+# How each quantity used to be worked out on every read.
+RECOMPUTED = {
+    'luminosity_ratio': luminosity_ratio,
+    'r_ecosphere': lambda mass_ratio: sqrt(
+        luminosity_ratio(mass_ratio)) * au,
+    'min_r_ecosphere': lambda mass_ratio: sqrt(
+        luminosity_ratio(mass_ratio) / 1.51) * au,
+    'max_r_ecosphere': lambda mass_ratio: sqrt(
+        luminosity_ratio(mass_ratio) / 0.48) * au,
+    'stellar_dust_limit': lambda mass_ratio: 200 * (
+        mass_ratio**(1/3)) * au,
+    'life': lambda mass_ratio: 10**10 * (
+        mass_ratio / luminosity_ratio(mass_ratio)),
+}
+
+
+def per_read(function, reads):
+    start = time.perf_counter()
+    for _ in range(reads):
+        function()
+    return (time.perf_counter() - start) / reads * 1e9
+
+
+def main(reads=100000):
+    star = Star(mass_ratio=1.0, age=4.6E9 * year)
+    context = star.context
+
+    print("%d reads of each quantity, ns per read" % reads)
+    print("%-20s %12s %12s %12s" % ('', 'recomputed', 'property',
+                                    'context'))
+    print("%-20s %12.0f" % ('(loop)', per_read(lambda: None, reads)))
+    for name, recompute in RECOMPUTED.items():
+        recomputed = per_read(lambda: recompute(star.mass_ratio), reads)
+        cached = per_read(lambda: getattr(star, name), reads)
+        direct = per_read(lambda: getattr(context, name), reads)
+        print("%-20s %12.0f %12.0f %12.0f" % (name, recomputed, cached,
+                                              direct))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
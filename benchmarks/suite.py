@@ -0,0 +1,361 @@
+"""Benchmark suite for the generation pipeline.
+
+Times each stage of generating a system on fixed seeds, so that runs on
+different commits measure the same work:
+
+    generate_planetary_masses       reference accretion engine
+    fast_generate_planetary_masses  float accretion engine
+    accrete_dust                    CircumstellarDisk.accrete_dust alone
+    generate_planet                 planets from accreted protoplanets
+    iterate_surface_temp            surface temperatures of rocky planets
+    min_molec_weight                retention thresholds, memo cleared
+    calculate_gases                 atmospheres of planets with air
+    import_chemtable                `import chemtable` in a new interpreter
+    render_system                   the SVG and HTML templates
+
+Each case is run once to warm up, then `--repeat` times, and its minimum,
+median and mean are reported. It also records how accretion scales with
+the mass of the star, which moves the dust limit and the planet bounds and
+changes how many lanes the disk breaks into.
+
+Results are written as JSON with the commit they were measured on. Pass an
+earlier file to `--compare` to print the change in each case and flag the
+ones slower by more than `--threshold`:
+
+    python benchmarks/suite.py -o before.json
+    git checkout other-branch
+    python benchmarks/suite.py -o after.json --compare before.json
+
+Run from the repository root.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+SOURCE_DIR = REPO_DIR / 'garnets'
+
+sys.path.insert(0, str(SOURCE_DIR))
+
+# pylint: disable=wrong-import-position
+import accrete  # noqa: E402
+import enviroment  # noqa: E402
+import fast_accrete  # noqa: E402
+import garnets  # noqa: E402
+
+from accrete import FAST_ACCRETION  # noqa: E402
+from constants import PROTOPLANET_MASS  # noqa: E402
+from stellar_system import Orbit  # noqa: E402
+from stellar_system import Planetesimal  # noqa: E402
+from stellar_system import Star  # noqa: E402
+from xatu.core import dimensionless_with_units  # noqa: E402
+from xatu.units import au  # noqa: E402
+from xatu.units import kg  # noqa: E402
+from xatu.units import year  # noqa: E402
+# pylint: enable=wrong-import-position
+
+SEEDS = ['WhoPatentsMath', 'garnets', 1985]
+
+# Star masses, in solar masses, for the scaling curve.
+MASSES = [0.6, 0.8, 1.0, 1.25, 1.5, 2.0]
+SCALING_SEEDS = list(range(10))
+
+# Young enough for the heaviest star in MASSES to still be burning.
+STAR_AGE = 1.0E9 * year
+
+CHEMTABLE_PROBE = '''
+import time
+start = time.perf_counter()
+import chemtable
+print(time.perf_counter() - start)
+'''
+
+
+def seeded_star(seed, mass_ratio=1.0):
+    return Star(mass_ratio=mass_ratio, age=STAR_AGE), random.Random(seed)
+
+
+def accrete_seed(seed, mass_ratio=1.0, injections=None):
+    star, rng = seeded_star(seed, mass_ratio)
+    protoplanets = fast_accrete.generate_planetary_masses(
+        star, 0.0, star.stellar_dust_limit, rng=rng, injections=injections)
+    return star, [p for p in protoplanets if p.mass > 0 * kg]
+
+
+def generated_planets():
+    planets = []
+    for seed in SEEDS:
+        system = garnets.generate_seeded_stellar_system(
+            seed, accretion=FAST_ACCRETION)
+        planets.extend((system, index, planet)
+                       for index, planet in enumerate(system.planets))
+    return planets
+
+
+# Cases. Each takes no arguments, does its setup and returns the function to
+# time. That function may return the seconds it measured itself.
+
+
+def case_generate_planetary_masses():
+    def run():
+        for seed in SEEDS[:1]:
+            star, rng = seeded_star(seed)
+            garnets.generate_planetary_masses(
+                star, 0.0, star.stellar_dust_limit, rng=rng)
+    return run
+
+
+def case_fast_generate_planetary_masses():
+    def run():
+        for seed in SEEDS:
+            accrete_seed(seed)
+    return run
+
+
+def case_accrete_dust():
+    star, rng = seeded_star(SEEDS[0])
+    disk = accrete.CircumstellarDisk(star)
+    sampler = accrete.InjectionSampler(
+        disk.lanes, disk.planet_inner_bound, disk.planet_outer_bound)
+    orbits = [sampler.draw(rng) for _ in range(25)]
+
+    def run():
+        disk = accrete.CircumstellarDisk(star)
+        for a, e in orbits:
+            disk.accrete_dust(Planetesimal(disk=disk, orbit=Orbit(a=a, e=e),
+                                           dust_mass=PROTOPLANET_MASS,
+                                           gas_mass=0))
+    return run
+
+
+def case_generate_planet():
+    systems = [accrete_seed(seed) for seed in SEEDS]
+
+    def run():
+        for star, protoplanets in systems:
+            for index, protoplanet in enumerate(protoplanets):
+                garnets.generate_planet(protoplanet, star,
+                                        rng=random.Random(index))
+    return run
+
+
+def case_iterate_surface_temp():
+    planets = [planet for _, _, planet in generated_planets()
+               if not planet.gas_giant]
+
+    def run():
+        for planet in planets:
+            enviroment.iterate_surface_temp(planet)
+    return run
+
+
+def case_min_molec_weight():
+    planets = [planet for _, _, planet in generated_planets()]
+
+    def run():
+        # Warming up and earlier repeats would otherwise leave every
+        # threshold in the memo, and the case would only time its lookups.
+        enviroment.retention_threshold.cache_clear()
+        for planet in planets:
+            enviroment.min_molec_weight(planet)
+    return run
+
+
+def case_calculate_gases():
+    planets = [(system, index, planet)
+               for system, index, planet in generated_planets()
+               if planet.atmosphere]
+
+    def run():
+        for system, index, planet in planets:
+            garnets.calculate_gases(system, planet, index)
+    return run
+
+
+def case_import_chemtable():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, [str(SOURCE_DIR), env.get('PYTHONPATH')]))
+
+    def run():
+        output = subprocess.run(
+            [sys.executable, '-c', CHEMTABLE_PROBE],
+            env=env,
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        ).stdout
+        return float(output)
+    return run
+
+
+def case_render_system():
+    system = garnets.generate_seeded_stellar_system(
+        SEEDS[0], accretion=FAST_ACCRETION)
+
+    def run():
+        garnets.render_system(system, SEEDS[0])
+    return run
+
+
+CASES = {
+    name[len('case_'):]: function
+    for name, function in list(globals().items())
+    if name.startswith('case_')
+}
+
+
+def time_case(setup, repeat):
+    run = setup()
+    run()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        measured = run()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed if measured is None else measured)
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.mean(timings),
+        'repeat': repeat,
+    }
+
+
+def scaling_point(mass_ratio):
+    counter = accrete.InjectionCounter()
+    star = None
+    protoplanets = 0
+    peak_lanes = 0
+    start = time.perf_counter()
+    for seed in SCALING_SEEDS:
+        counter.peak_lanes = 0
+        star, accreted = accrete_seed(seed, mass_ratio, counter)
+        protoplanets += len(accreted)
+        peak_lanes += counter.peak_lanes
+    elapsed = time.perf_counter() - start
+    disk = accrete.CircumstellarDisk(star)
+    count = len(SCALING_SEEDS)
+    return {
+        'mass': mass_ratio,
+        'stellar_dust_limit': dimensionless_with_units(
+            star.stellar_dust_limit, au),
+        'planet_inner_bound': dimensionless_with_units(
+            disk.planet_inner_bound, au),
+        'planet_outer_bound': dimensionless_with_units(
+            disk.planet_outer_bound, au),
+        'seconds_per_system': elapsed / count,
+        'protoplanets': protoplanets / count,
+        'injections': counter.injections / count,
+        'draws': counter.draws / count,
+        'peak_lanes': peak_lanes / count,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=str(REPO_DIR),
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(names=None, repeat=5, masses=None):
+    """Run the cases named (all by default), and the scaling curve."""
+    names = list(CASES) if names is None else names
+    masses = MASSES if masses is None else masses
+    return {
+        'commit': git_commit(),
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seeds': [str(seed) for seed in SEEDS],
+        'cases': {name: time_case(CASES[name], repeat) for name in names},
+        'scaling': [scaling_point(mass) for mass in masses],
+    }
+
+
+def compare(baseline, results, threshold):
+    """Lines comparing the median of each case, and the cases that slowed."""
+    lines = []
+    slower = []
+    for name, result in results['cases'].items():
+        before = baseline.get('cases', {}).get(name)
+        if before is None:
+            lines.append("%-32s %10.4f s        (new)" %
+                         (name, result['median']))
+            continue
+        ratio = result['median'] / before['median']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  SLOWER'
+            slower.append(name)
+        lines.append("%-32s %10.4f s %7.2fx%s" %
+                     (name, result['median'], ratio, flag))
+    return lines, slower
+
+
+def print_results(results):
+    print("commit %s, Python %s" % (results['commit'], results['python']))
+    for name, result in results['cases'].items():
+        print("%-32s %10.4f s (min %.4f s)" %
+              (name, result['median'], result['min']))
+    print()
+    print("%6s %10s %10s %10s %10s %10s" % (
+        'mass', 'dust AU', 's/system', 'planets', 'draws', 'lanes'))
+    for point in results['scaling']:
+        print("%6.2f %10.1f %10.4f %10.1f %10.0f %10.1f" % (
+            point['mass'], point['stellar_dust_limit'],
+            point['seconds_per_system'], point['protoplanets'],
+            point['draws'], point['peak_lanes']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('-o', '--output', type=Path,
+                        help="write the results to this JSON file")
+    parser.add_argument('--compare', type=Path,
+                        help="earlier results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="slowdown flagged by --compare (default 0.1)")
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    parser.add_argument('-c', '--case', action='append', choices=CASES,
+                        help="only run this case (may be repeated)")
+    parser.add_argument('-m', '--mass', action='append', type=float,
+                        help="star mass for the scaling curve (may be "
+                        "repeated; default %s)" % MASSES)
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.case, args.repeat, args.mass)
+    print_results(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + '\n')
+
+    if args.compare:
+        lines, slower = compare(json.loads(args.compare.read_text()),
+                                results, args.threshold)
+        print()
+        print("against %s" % args.compare)
+        print('\n'.join(lines))
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Trace the generation of seeded systems as a timeline.
+
+Writes every stage of generating each system (injections, `accrete_dust`
+calls with their sweeps, coalescences, and the stages of each planet and
+moon) as Chrome trace event JSON, which opens in chrome://tracing or
+https://ui.perfetto.dev:
+
+    python benchmarks/trace_system.py 1985 WhoPatentsMath -o trace.json
+
+With `--slowest N`, the systems for seeds 0 to `--count` are timed first,
+and the N slowest of them are traced.
+
+Run from the repository root.
+"""
+
+import argparse
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'garnets'))
+
+# pylint: disable=wrong-import-position
+import garnets  # noqa: E402
+
+from accrete import AccretionOptions  # noqa: E402
+from instrumentation import Tracer  # noqa: E402
+# pylint: enable=wrong-import-position
+
+
+def as_seed(text):
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+
+def slowest_seeds(count, number, **kwargs):
+    timings = []
+    for seed in range(count):
+        start = time.perf_counter()
+        garnets.generate_seeded_stellar_system(seed, **kwargs)
+        timings.append((time.perf_counter() - start, seed))
+    timings.sort(reverse=True)
+    for elapsed, seed in timings[:number]:
+        print("seed %-8d %8.3f s" % (seed, elapsed))
+    return [seed for _, seed in timings[:number]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('seeds', nargs='*', type=as_seed)
+    parser.add_argument('-o', '--output', type=Path,
+                        default=Path('trace.json'))
+    parser.add_argument('--slowest', type=int, default=0,
+                        help="trace this many of the slowest seeds")
+    parser.add_argument('--count', type=int, default=200,
+                        help="seeds to time for --slowest (default 200)")
+    parser.add_argument('--reference', action='store_true',
+                        help="accrete with the reference engine")
+    args = parser.parse_args(argv)
+
+    kwargs = {'accretion': AccretionOptions(fast=not args.reference)}
+    seeds = list(args.seeds)
+    if args.slowest:
+        seeds.extend(slowest_seeds(args.count, args.slowest, **kwargs))
+    if not seeds:
+        parser.error("give seeds to trace, or --slowest")
+
+    tracer = Tracer()
+    for seed in seeds:
+        garnets.generate_seeded_stellar_system(seed, instrumentation=tracer,
+                                               **kwargs)
+    tracer.write(args.output)
+    print('\n'.join(tracer.report()))
+    print("%d events written to %s" % (len(tracer.events), args.output))
+
+
+if __name__ == '__main__':
+    main()
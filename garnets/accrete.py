@@ -4,15 +4,23 @@ Classes and utilities to simulate accretion in the circumstellar disk.
 
 # pylint: disable=no-member, too-few-public-methods
 
+import logging
+
+from bisect import bisect_left
+from bisect import bisect_right
+from math import ceil
 from math import exp
+from math import inf
+from math import log
 from math import pi
 from math import sqrt
-from typing import List
 
 from attr import attr
 from attr import attrs
 from constants import ALPHA
+from constants import DISK_ECCENTRICITY
 from constants import DUST_DENSITY_COEFF
+from constants import ECCENTRICITY_COEFF
 from constants import GAS_DUST_RATIO
 from stellar_system import mass_repr
 from xatu.core import dimensionless_with_units
@@ -22,6 +30,32 @@ from xatu.units import kg
 from xatu.units import m
 from xatu.units import solar_mass
 
+logger = logging.getLogger(__name__)
+
+# Accretion stops once a sweep grows the planetoid by less than this fraction.
+ACCRETION_TOLERANCE = 0.0001
+
+
+@attrs(frozen=True)
+class AccretionOptions:
+    """How garnets.generate_stellar_system accretes protoplanets.
+
+    `fast` accretes on plain floats (fast_accrete.py), and gives the same
+    protoplanets. `accelerate` extrapolates dust sweeps, for about a third
+    of the sweeps; the masses are not bit-identical to plain polling's (see
+    sweep_until_converged). `targeted_injection` only draws planetesimals
+    where they will find dust (see InjectionSampler); the systems are
+    different for a given seed, but come from the same distribution.
+    """
+
+    fast: bool = attr(default=False)
+    accelerate: bool = attr(default=False)
+    targeted_injection: bool = attr(default=False)
+
+
+DEFAULT_ACCRETION = AccretionOptions()
+FAST_ACCRETION = AccretionOptions(fast=True)
+
 
 @attrs
 class CircumstellarDustLane:
@@ -32,36 +66,546 @@ class CircumstellarDustLane:
     gas_present: bool = attr()
 
 
+class DustLanes:
+    """The lanes of a disk, sorted by inner edge and never overlapping.
+
+    A parallel list of inner edges is kept so that the lanes touching any
+    interval can be found by bisection, in O(log n + k). Sweeping a region
+    splits the affected lanes in place, drops lanes with neither dust nor gas
+    and merges neighbouring lanes with the same dust / gas flags, so the lane
+    count stays small however long accretion runs.
+
+    Works with any lane type that has `inner`, `outer`, `dust_present` and
+    `gas_present`, with edges as either quantities or plain floats.
+    """
+
+    def __init__(self, lanes=()):
+        self._lanes = sorted(lanes, key=lambda lane: lane.inner)
+        self._inners = [lane.inner for lane in self._lanes]
+        self._dusty = sum(1 for lane in self._lanes if lane.dust_present)
+        # Bumped by every sweep that changes the lanes.
+        self.version = 0
+
+    def __iter__(self):
+        return iter(self._lanes)
+
+    def __len__(self):
+        return len(self._lanes)
+
+    def __getitem__(self, index):
+        return self._lanes[index]
+
+    def __repr__(self):
+        return 'DustLanes(%r)' % self._lanes
+
+    @property
+    def dust_left(self):
+        return self._dusty > 0
+
+    def _span(self, inner, outer):
+        # Indices [start, end) of the lanes overlapping (inner, outer).
+        start = bisect_right(self._inners, inner) - 1
+        if start < 0 or self._lanes[start].outer <= inner:
+            start += 1
+        end = bisect_left(self._inners, outer, lo=start)
+        return start, end
+
+    def overlapping(self, inner, outer):
+        """The lanes that overlap the open interval (inner, outer)."""
+        start, end = self._span(inner, outer)
+        return self._lanes[start:end]
+
+    def dust_at_either_edge(self, inner, outer):
+        """Whether there is dust at `inner` or at `outer`."""
+        index = bisect_right(self._inners, inner) - 1
+        if index >= 0:
+            lane = self._lanes[index]
+            if lane.outer > inner and lane.dust_present:
+                return True
+        index = bisect_left(self._inners, outer) - 1
+        if index >= 0:
+            lane = self._lanes[index]
+            if lane.outer >= outer and lane.dust_present:
+                return True
+        return False
+
+    def sweep(self, inner, outer, gas):
+        """Clear the dust from [inner, outer], and the gas too unless `gas`."""
+        start, end = self._span(inner, outer)
+        if start == end:
+            return
+
+        lane_type = type(self._lanes[start])
+        pieces = []
+        for lane in self._lanes[start:end]:
+            if lane.inner < inner:
+                pieces.append(lane_type(lane.inner, inner,
+                                        lane.dust_present, lane.gas_present))
+            pieces.append(
+                lane_type(
+                    max(lane.inner, inner),
+                    min(lane.outer, outer),
+                    dust_present=False,
+                    gas_present=gas and lane.gas_present,
+                )
+            )
+            if lane.outer > outer:
+                pieces.append(lane_type(outer, lane.outer,
+                                        lane.dust_present, lane.gas_present))
+
+        # Include the untouched neighbours, so they can absorb new pieces.
+        if start > 0:
+            start -= 1
+            pieces.insert(0, self._lanes[start])
+        if end < len(self._lanes):
+            pieces.append(self._lanes[end])
+            end += 1
+
+        merged = []
+        for piece in pieces:
+            if not (piece.dust_present or piece.gas_present):
+                continue
+            if merged and merged[-1].outer == piece.inner \
+                    and merged[-1].dust_present == piece.dust_present \
+                    and merged[-1].gas_present == piece.gas_present:
+                merged[-1].outer = piece.outer
+                continue
+            merged.append(piece)
+
+        self._dusty += sum(1 for lane in merged if lane.dust_present) - sum(
+            1 for lane in self._lanes[start:end] if lane.dust_present)
+        self._lanes[start:end] = merged
+        self._inners[start:end] = [lane.inner for lane in merged]
+        self.version += 1
+
+
+class OrbitIndex:
+    """Protoplanets sorted by semi-major axis, for finding collisions.
+
+    `reach(body)` gives a body's semi-major axis and the innermost and
+    outermost distances it reaches: its periapsis and apoapsis, widened by
+    its reduced mass. These are cached in parallel lists, refreshed by
+    `moved`, so `first_overlap` only has to look at the bodies near a
+    candidate, found by bisection.
+
+    The widest reach any body has had, relative to its semi-major axis, is
+    also kept. It bounds how far from a candidate a body reaching it can be.
+
+    Works with quantities or plain floats.
+    """
+
+    def __init__(self, reach):
+        self._reach = reach
+        self._bodies = []
+        self._a = []
+        self._inner = []
+        self._outer = []
+        self._inner_ratio = 1.0
+        self._outer_ratio = 1.0
+
+    def __iter__(self):
+        return iter(self._bodies)
+
+    def __len__(self):
+        return len(self._bodies)
+
+    def __getitem__(self, index):
+        return self._bodies[index]
+
+    def __repr__(self):
+        return 'OrbitIndex(%r)' % self._bodies
+
+    def add(self, body):
+        a, inner, outer = self._reach(body)
+        index = bisect_right(self._a, a)
+        self._bodies.insert(index, body)
+        self._a.insert(index, a)
+        self._inner.insert(index, inner)
+        self._outer.insert(index, outer)
+        self._inner_ratio = min(self._inner_ratio, inner / a)
+        self._outer_ratio = max(self._outer_ratio, outer / a)
+
+    def moved(self, index):
+        """Re-file the body at `index` after its orbit or mass changed."""
+        body = self._bodies.pop(index)
+        del self._a[index]
+        del self._inner[index]
+        del self._outer[index]
+        self.add(body)
+
+    def first_overlap(self, a, inner, outer):
+        """The index of the innermost body overlapping the given reach.
+
+        A body overlaps if it reaches the candidate's semi-major axis `a`,
+        or the candidate (reaching from `inner` to `outer`) reaches its own.
+        Returns None if no body does.
+        """
+        start = bisect_left(self._a, min(inner, a / self._outer_ratio))
+        end = bisect_right(self._a, max(outer, a / self._inner_ratio))
+        for index in range(start, end):
+            body_a = self._a[index]
+            if body_a > a:
+                if body_a <= outer or self._inner[index] <= a:
+                    return index
+            elif body_a >= inner or self._outer[index] >= a:
+                return index
+        return None
+
+
+# Planetesimals stop being injected after this many straight draws that find
+# no dust.
+MAX_SEQUENTIAL_FAILURES = 10**3
+
+# Eccentricity bins over which InjectionSampler bounds the dust a planetesimal
+# can reach. Narrow where eccentricities are common, wide where they are rare.
+INJECTION_ECCENTRICITY_BINS = (0.0, 0.01, 0.02, 0.03, 0.05, 0.07, 0.1, 0.15,
+                               0.2, 0.3, 0.5, 0.99)
+
+# Above this share of plain draws landing in the envelope, InjectionSampler
+# just makes plain draws.
+PLAIN_INJECTION_HIT_RATE = 0.5
+
+
+@attrs
+class InjectionCounter:
+    """Tallies the orbits an InjectionSampler draws.
+
+    `misses` are drawn orbits that were thrown away; `skipped` are plain
+    draws that were accounted for without being made. `peak_lanes` is the
+    most lanes the disk had at an injection, and `peak_failures` the longest
+    run of misses and skips before one.
+    """
+
+    injections: int = attr(default=0)
+    draws: int = attr(default=0)
+    misses: int = attr(default=0)
+    skipped: int = attr(default=0)
+    peak_lanes: int = attr(default=0)
+    peak_failures: int = attr(default=0)
+
+    def update(self, other):
+        """Add the tallies of another InjectionCounter to these."""
+        self.injections += other.injections
+        self.draws += other.draws
+        self.misses += other.misses
+        self.skipped += other.skipped
+        self.peak_lanes = max(self.peak_lanes, other.peak_lanes)
+        self.peak_failures = max(self.peak_failures, other.peak_failures)
+
+
+class InjectionSampler:
+    """Draws the orbits of new planetesimals that will find dust.
+
+    The plain way, which `draw` follows unless `targeted`, is to draw a
+    semi-major axis uniformly between the planet bounds and an eccentricity
+    of 1 - u ** ECCENTRICITY_COEFF, and to keep the orbit if there is dust at
+    its inner or outer effect limit. Injection ends after
+    MAX_SEQUENTIAL_FAILURES straight misses.
+
+    Late in accretion almost every plain draw misses. With `targeted`, the
+    sampler gives the same orbits, and gives up at the same point, with the
+    same probabilities, without making most of the draws. For an
+    eccentricity e, the semi-major axes whose inner effect limit finds dust
+    are the dusty lanes scaled by (1 + DISK_ECCENTRICITY) / (1 - e), and
+    likewise for the outer effect limit. Over each eccentricity bin, the
+    width these can cover is bounded from the dust within the bin's reach.
+    The bounds, weighted by the chance of each bin, make an envelope that
+    a share `hit_rate` of plain draws land in, and only those draws are
+    made: the number of plain draws before the next one in the envelope is
+    geometric, and counts as misses. A draw in the envelope picks a bin and
+    an effect limit by their bounds, an eccentricity within the bin, and
+    survives with the share of the bound that finds dust at that
+    eccentricity, in which case its semi-major axis is drawn uniformly over
+    that dust. An orbit with dust at both effect limits can be drawn
+    through either, so it is kept half the time. Everything that does not
+    survive counts as one more miss.
+
+    The envelope is rebuilt whenever the lanes change, and plain draws are
+    made while more than PLAIN_INJECTION_HIT_RATE of them would land in it.
+
+    Works with quantities or plain floats.
+    """
+
+    def __init__(self, lanes, inner_bound, outer_bound, targeted=False,
+                 counter=None):
+        self.lanes = lanes
+        self.inner_bound = inner_bound
+        self.outer_bound = outer_bound
+        self.targeted = targeted
+        self.counter = InjectionCounter() if counter is None else counter
+        self.failures = 0
+        self.hit_rate = None
+        self._version = None
+
+    def draw(self, rng):
+        """The (a, e) of the next orbit that finds dust.
+
+        Returns None once MAX_SEQUENTIAL_FAILURES straight draws missed.
+        """
+        counter = self.counter
+        while self.failures < MAX_SEQUENTIAL_FAILURES:
+            if self.targeted and self._version != self.lanes.version:
+                self._rebuild()
+            if not self.targeted or self.hit_rate > PLAIN_INJECTION_HIT_RATE:
+                orbit = self._plain_draw(rng)
+            else:
+                if self.hit_rate > 0:
+                    skip = int(log(1.0 - rng.random())
+                               / log(1.0 - self.hit_rate))
+                else:
+                    skip = MAX_SEQUENTIAL_FAILURES
+                skip = min(skip, MAX_SEQUENTIAL_FAILURES - self.failures)
+                counter.skipped += skip
+                self.failures += skip
+                if self.failures >= MAX_SEQUENTIAL_FAILURES:
+                    break
+                orbit = self._targeted_draw(rng)
+            counter.draws += 1
+            if orbit is not None:
+                counter.injections += 1
+                counter.peak_lanes = max(counter.peak_lanes, len(self.lanes))
+                counter.peak_failures = max(counter.peak_failures,
+                                            self.failures)
+                self.failures = 0
+                return orbit
+            counter.misses += 1
+            self.failures += 1
+        return None
+
+    def _plain_draw(self, rng):
+        a = rng.uniform(self.inner_bound, self.outer_bound)
+        e = 1.0 - (rng.uniform(0.0, 1.0)**ECCENTRICITY_COEFF)
+        if e > .99:
+            e = .99
+        if self.lanes.dust_at_either_edge(a * (1.0 - e) / (
+                1.0 + DISK_ECCENTRICITY), a * (1.0 + e) / (
+                    1.0 - DISK_ECCENTRICITY)):
+            return a, e
+        return None
+
+    def _rebuild(self):
+        self._version = self.lanes.version
+        # Dusty width below each lane, and up to its outer edge.
+        self._inners = []
+        self._outers = []
+        self._dusty = []
+        self._below = []
+        self._through = []
+        total = self.outer_bound - self.outer_bound
+        for lane in self.lanes:
+            self._inners.append(lane.inner)
+            self._outers.append(lane.outer)
+            self._dusty.append(lane.dust_present)
+            self._below.append(total)
+            if lane.dust_present:
+                total = total + (lane.outer - lane.inner)
+            self._through.append(total)
+
+        width = self.outer_bound - self.inner_bound
+        self._pieces = []
+        self._cumulative = []
+        hit_rate = 0.0
+        bins = INJECTION_ECCENTRICITY_BINS
+        for e0, e1 in zip(bins, bins[1:]):
+            u_hi = (1.0 - e0)**(1 / ECCENTRICITY_COEFF)
+            u_lo = (1.0 - e1)**(1 / ECCENTRICITY_COEFF) if e1 < .99 else 0.0
+            for inner, low, high in (
+                    (True, (1.0 - e1) / (1.0 + DISK_ECCENTRICITY),
+                     (1.0 - e0) / (1.0 + DISK_ECCENTRICITY)),
+                    (False, (1.0 + e0) / (1.0 - DISK_ECCENTRICITY),
+                     (1.0 + e1) / (1.0 - DISK_ECCENTRICITY))):
+                bound = min(width, self._dust_width(
+                    self.inner_bound * low, self.outer_bound * high) / low)
+                weight = (u_hi - u_lo) * bound / width
+                if weight > 0:
+                    hit_rate += weight
+                    self._pieces.append((inner, u_lo, u_hi, bound))
+                    self._cumulative.append(hit_rate)
+        self.hit_rate = hit_rate
+
+    def _dust_below(self, x):
+        index = bisect_right(self._inners, x) - 1
+        if index < 0:
+            return self._below[0] if self._below else x - x
+        if x >= self._outers[index] or not self._dusty[index]:
+            return self._through[index]
+        return self._below[index] + (x - self._inners[index])
+
+    def _dust_width(self, inner, outer):
+        return self._dust_below(outer) - self._dust_below(inner)
+
+    def _dust_at(self, x):
+        index = bisect_right(self._inners, x) - 1
+        return (index >= 0 and x < self._outers[index]
+                and self._dusty[index])
+
+    def _targeted_draw(self, rng):
+        index = bisect_right(self._cumulative, rng.random() * self.hit_rate)
+        inner, u_lo, u_hi, bound = self._pieces[
+            min(index, len(self._pieces) - 1)]
+        e = 1.0 - (rng.uniform(u_lo, u_hi)**ECCENTRICITY_COEFF)
+        if e > .99:
+            e = .99
+        if inner:
+            scale = (1.0 - e) / (1.0 + DISK_ECCENTRICITY)
+        else:
+            scale = (1.0 + e) / (1.0 - DISK_ECCENTRICITY)
+        low = self._dust_below(self.inner_bound * scale)
+        high = self._dust_below(self.outer_bound * scale)
+        if rng.random() * bound >= (high - low) / scale:
+            return None
+
+        # Uniformly over the dust in reach.
+        target = low + rng.random() * (high - low)
+        index = min(bisect_right(self._through, target),
+                    len(self._through) - 1)
+        a = (self._inners[index] + (target - self._below[index])) / scale
+
+        if inner:
+            other = a * (1.0 + e) / (1.0 - DISK_ECCENTRICITY)
+        else:
+            other = a * (1.0 - e) / (1.0 + DISK_ECCENTRICITY)
+        if self._dust_at(other) and rng.random() < 0.5:
+            return None
+        return a, e
+
+
+@attrs
+class SweepCounter:
+    """Tallies the `collect_dust` sweeps made while accreting.
+
+    `sweeps_saved` is an estimate: when an accelerated accretion first jumps
+    ahead, the observed contraction rate gives the number of sweeps plain
+    polling would have needed, and the sweeps actually made are deducted.
+    """
+
+    accretions: int = attr(default=0)
+    sweeps: int = attr(default=0)
+    sweeps_saved: int = attr(default=0)
+
+
+def record_accretion(instrumentation, injections, sweeps):
+    """Report a disk's InjectionCounter and SweepCounter to `instrumentation`
+    (see instrumentation.py)."""
+    if not instrumentation.enabled:
+        return
+    instrumentation.count('injections', injections.injections)
+    instrumentation.count('draws', injections.draws)
+    instrumentation.count('misses', injections.misses)
+    instrumentation.count('skipped', injections.skipped)
+    instrumentation.count('accretions', sweeps.accretions)
+    instrumentation.count('sweeps', sweeps.sweeps)
+    instrumentation.count('sweeps_saved', sweeps.sweeps_saved)
+    instrumentation.peak('lanes', injections.peak_lanes)
+    instrumentation.peak('sequential_failures', injections.peak_failures)
+
+
+# While only dust is swept, the swept volume (and so the swept mass) scales
+# as reduced_mass ~ mass ** 0.25, so log(mass) contracts by this much per sweep.
+DUST_SWEEP_RATIO = 0.25
+
+
+def sweep_until_converged(disk, planetoid, counter, accelerate=False):
+    """Repeat `disk.collect_dust` until the planetoid stops growing.
+
+    The swept mass is a fixed point of the planetoid's mass, and successive
+    sweeps approach it geometrically in log(mass). With `accelerate`, the
+    first step is extrapolated using DUST_SWEEP_RATIO, and after that every
+    pair of contracting steps is extrapolated to its limit with Aitken's
+    delta-squared method. A jump can overshoot the fixed point, after which
+    sweeps shrink the planetoid, so once it has jumped the planetoid stops
+    only when two real sweeps in a row agree within ACCRETION_TOLERANCE,
+    whichever side they approach from. The result is always the output of a
+    real sweep and meets the same tolerance as plain polling.
+
+    That takes about a third of the sweeps (3.4 per planetesimal against 11
+    over seeds 0-39), not an order of magnitude fewer. The results are not
+    bit-identical either: plain polling stops a little short of the fixed
+    point, so masses differ by a few times ACCRETION_TOLERANCE (at most
+    0.02% over those seeds).
+    """
+    counter.accretions += 1
+    last_mass = planetoid.mass
+    last_step = None
+    sweeps = 0
+    estimated_plain_sweeps = None
+    jumped = extrapolated = False
+    while True:
+        planetoid.dust_mass, planetoid.gas_mass = disk.collect_dust(planetoid)
+        sweeps += 1
+        mass = planetoid.mass
+        growth = mass - last_mass
+        if jumped:
+            # The sweep straight after a jump only compares with the
+            # extrapolated mass, so it cannot confirm convergence.
+            growth = inf if extrapolated else abs(growth)
+        # Accretion has slowed enough. Stop trying.
+        if growth < (ACCRETION_TOLERANCE * last_mass):
+            break
+        step = log(mass / last_mass)
+        last_mass = mass
+        extrapolated = False
+
+        if not accelerate:
+            continue
+        if sweeps == 1:
+            ratio = DUST_SWEEP_RATIO
+        elif last_step is not None:
+            ratio = step / last_step
+        else:
+            ratio = None
+        if ratio is not None and 0 < ratio < 1:
+            # The remaining steps form a geometric series.
+            scale = exp(step * ratio / (1 - ratio))
+            planetoid.dust_mass = planetoid.dust_mass * scale
+            planetoid.gas_mass = planetoid.gas_mass * scale
+            last_mass = planetoid.mass
+            jumped = extrapolated = True
+            if estimated_plain_sweeps is None:
+                estimated_plain_sweeps = sweeps + max(
+                    0, ceil(log(ACCRETION_TOLERANCE / step) / log(ratio)))
+            step = None
+        last_step = step
+
+    counter.sweeps += sweeps
+    if estimated_plain_sweeps is not None:
+        counter.sweeps_saved += max(0, estimated_plain_sweeps - sweeps)
+
+
 @attrs
 class CircumstellarDisk:
     star = attr()
-    lanes: List[CircumstellarDustLane] = attr(default=None)
+    lanes: DustLanes = attr(default=None)
+    accelerate: bool = attr(default=False)
+    sweeps: SweepCounter = attr(factory=SweepCounter)
 
     @property
     def planet_inner_bound(self):
-        # TODO(woursler): Confirm AU?
-        return 0.3 * (self.star.mass_ratio**(1/3)) * au
+        return self.context.planet_inner_bound
 
     @property
     def planet_outer_bound(self):
-        # TODO(woursler): Confirm AU?
-        return 50 * (self.star.mass_ratio**(1/3)) * au
+        return self.context.planet_outer_bound
 
     def __attrs_post_init__(self):
+        # The star's derived quantities, read throughout accretion.
+        self.context = self.star.context
         if self.lanes is None:
             self.lanes = [
                 CircumstellarDustLane(
                     0*au,
-                    self.star.stellar_dust_limit,
+                    self.context.stellar_dust_limit,
                     dust_present=True,
                     gas_present=True,
                 )
             ]
+        if not isinstance(self.lanes, DustLanes):
+            self.lanes = DustLanes(self.lanes)
 
     def dust_density(self, a):
         return (
             DUST_DENSITY_COEFF
-            * sqrt(self.star.mass_ratio)
+            * self.context.sqrt_mass_ratio
             * exp(
                 -ALPHA * (dimensionless_with_units(a, au)**(1/3))
             )
@@ -72,30 +616,16 @@ class CircumstellarDisk:
     @property
     def dust_left(self):
         # Check if we have any lanes on file with dust left!
-        for lane in self.lanes:
-            if lane.dust_present:
-                return True
-        return False
+        return self.lanes.dust_left
 
     def dust_available(self, inner, outer):
-        for lane in self.lanes:
-            # See if the lanes overlap.
-            if (lane.inner <= inner
-                    and lane.outer > inner) or (lane.outer >= outer
-                                                and lane.inner < outer):
-                if lane.dust_present:
-                    return True
-        return False
+        return self.lanes.dust_at_either_edge(inner, outer)
 
     def collect_dust(self, planetoid):
         new_dust_mass = 0 * kg
         new_gas_mass = 0 * kg
-        for lane in self.lanes:
-
-            # If the lane doesn't overlap, then we should just continue.
-            if (lane.outer <= planetoid.inner_effect_limit) or (
-                    lane.inner >= planetoid.outer_effect_limit):
-                continue
+        for lane in self.lanes.overlapping(planetoid.inner_effect_limit,
+                                           planetoid.outer_effect_limit):
 
             # Now we need to figure out the density of gas and dust in the lane.
             if not lane.dust_present:
@@ -141,58 +671,12 @@ class CircumstellarDisk:
         else:
             gas = True
 
-        new_lanes = []
-        while len(self.lanes) > 0:
-            lane = self.lanes.pop()
-
-            # If the lane has neither dust nor gas, prune it.
-            if not (lane.dust_present or lane.gas_present):
-                continue
-
-            # Now we see if the lane was overlapped at any point...
-            if lane.outer <= planetoid.inner_effect_limit or lane.inner >= planetoid.outer_effect_limit:
-                # There's no overlap, so the lane isn't affected.
-                new_lanes.append(lane)
-                continue
-
-            if lane.inner < planetoid.inner_effect_limit:
-                # Make an lane for the inside of the old lane
-                new_lanes.append(
-                    CircumstellarDustLane(lane.inner,
-                                          planetoid.inner_effect_limit,
-                                          lane.dust_present, lane.gas_present))
-            if lane.outer > planetoid.outer_effect_limit:
-                print("OUTER")
-                # Make an lane for the outside of the old lane
-                new_lanes.append(
-                    CircumstellarDustLane(lane.outer,
-                                          planetoid.outer_effect_limit,
-                                          lane.dust_present, lane.gas_present))
-            # Make a lane for the overlapped portion.
-            new_lanes.append(
-                CircumstellarDustLane(
-                    max(lane.inner, planetoid.inner_effect_limit),
-                    min(lane.outer, planetoid.outer_effect_limit),
-                    dust_present=False,
-                    gas_present=gas and lane.gas_present,
-                )
-            )
-        self.lanes = new_lanes
+        self.lanes.sweep(planetoid.inner_effect_limit,
+                         planetoid.outer_effect_limit,
+                         gas)
 
     def accrete_dust(self, planetoid):
-        last_mass = planetoid.mass
-        while True:
-            new_dust_mass, new_gas_mass = self.collect_dust(planetoid)
-            planetoid.dust_mass = new_dust_mass
-            planetoid.gas_mass = new_gas_mass
-            print(
-                "Growth since last step",
-                round((planetoid.mass - last_mass) / last_mass, 2),
-                "%"
-            )
-            # Accretion has slowed enough. Stop trying.
-            if (planetoid.mass - last_mass) < (0.0001 * last_mass):
-                break
-            last_mass = planetoid.mass
-        print("Accretion halted at %s." % mass_repr(planetoid.mass))
+        sweep_until_converged(self, planetoid, self.sweeps, self.accelerate)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Accretion halted at %s.", mass_repr(planetoid.mass))
         self.update_dust_lanes(planetoid)
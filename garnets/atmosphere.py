@@ -0,0 +1,116 @@
+"""
+Atmospheric composition, computed for every gas at once.
+
+`gas_amounts` is an array version of the per-gas loop in
+`garnets.scalar_gas_amounts`: it works on the float columns of
+`chemtable.GAS_ARRAYS` and takes plain floats in fixed units, so one call
+covers the whole gas table for a planet, or a whole batch of planets as a
+(planets x gases) array.
+"""
+
+import numpy as np
+
+from chemtable import GAS_ARRAYS
+from chemtable import REACTIVITY_ARRAYS
+from chemtable import TEMPERATE_REACTIVITY_ARRAYS
+from chemtable import gas_id
+from constants import MOLAR_GAS_CONST
+from xatu.core import dimensionless_with_units
+from xatu.units import K
+from xatu.units import bar
+from xatu.units import kg
+from xatu.units import m
+from xatu.units import mol
+from xatu.units import s
+from xatu.units import year
+
+MOLAR_GAS_CONST_SI = dimensionless_with_units(
+    MOLAR_GAS_CONST, m ** 2 * kg / s ** 2 / K / mol)
+
+HELIUM = gas_id('He')
+
+
+def _column(values):
+    # Per-planet values as a column, so they broadcast across the gases.
+    return np.asarray(values, dtype=float)[..., np.newaxis]
+
+
+def gas_amounts(pressure, low_temp, molec_weight, exospheric_temp,
+                esc_velocity, age, surf_temp, gas_fraction):
+    """Relative amount of each gas in the atmosphere, row-aligned with GASES.
+
+    Arguments are floats for one planet, or equal length arrays for a batch
+    of planets: surface pressure in bar, temperatures in K, the smallest
+    retained molecular weight in kg/mol, escape velocity in m/s, the star's
+    age in years and the planet's gas mass fraction. Returns an array of
+    shape (gases,) or (planets, gases); gases that are not retained get 0.
+    """
+    pressure = _column(pressure)
+    low_temp = _column(low_temp)
+    molec_weight = _column(molec_weight)
+    exospheric_temp = _column(exospheric_temp)
+    esc_velocity = _column(esc_velocity)
+    age = _column(age)
+    surf_temp = _column(surf_temp)
+    gas_fraction = _column(gas_fraction)
+
+    weight = GAS_ARRAYS.weight
+
+    # TODO(woursler): WTH is this?
+    with np.errstate(divide='ignore'):
+        yp = GAS_ARRAYS.boil / (
+            373. * ((np.log(pressure + 0.001) / -5050.5) + (1.0 / 373.)))
+    present = (yp >= 0) & (yp < low_temp) & (weight >= molec_weight)
+
+    vrms = np.sqrt(3 * MOLAR_GAS_CONST_SI * exospheric_temp / weight)
+    pvrms = (1 / (1 + vrms / esc_velocity)) ** (age / 1e9)
+
+    abund = np.broadcast_to(GAS_ARRAYS.abunds, present.shape).copy()
+    abund[..., HELIUM] *= 0.001 + gas_fraction[..., 0]
+
+    # Pick each planet's reactivity rules, then apply them to every gas.
+    temperate = (age > 2e9) & (surf_temp > 270) & (surf_temp < 400)
+    rules = [
+        np.where(temperate, getattr(TEMPERATE_REACTIVITY_ARRAYS, name),
+                 getattr(REACTIVITY_ARRAYS, name))
+        for name in ('decays', 'age_exponent', 'pressure_offset',
+                     'pressure_scale', 'factor')
+    ]
+    decays, age_exponent, pressure_offset, pressure_scale, factor = rules
+    aging = (age / 2e9) ** age_exponent
+    react = factor * np.where(
+        decays,
+        (1 / (1 + GAS_ARRAYS.reactivity)) ** (
+            aging * (pressure_offset + pressure_scale * pressure)),
+        aging,
+    )
+
+    fract = 1 - (molec_weight / weight)
+
+    return np.where(present, abund * pvrms * react * fract, 0.0)
+
+
+def _planet_arguments(star, planet):
+    return (
+        dimensionless_with_units(planet.surf_pressure, bar),
+        dimensionless_with_units(planet.low_temp, K),
+        dimensionless_with_units(planet.molec_weight, kg / mol),
+        dimensionless_with_units(planet.exospheric_temp, K),
+        dimensionless_with_units(planet.esc_velocity, m / s),
+        dimensionless_with_units(star.age, year),
+        dimensionless_with_units(planet.surf_temp, K),
+        float(planet.gas_mass / planet.mass),
+    )
+
+
+def planet_gas_amounts(star, planet):
+    """`gas_amounts` for a `Planet` orbiting `star`."""
+    return gas_amounts(*_planet_arguments(star, planet))
+
+
+def batch_gas_amounts(star, planets):
+    """`gas_amounts` for several planets around `star`, in one pass."""
+    if not planets:
+        return np.zeros((0, len(GAS_ARRAYS.symbols)))
+    columns = zip(*(_planet_arguments(star, planet) for planet in planets))
+    return gas_amounts(*(np.array(column) for column in columns))
@@ -0,0 +1,214 @@
+"""
+An on-disk cache of generated systems.
+
+`garnets.generate_seeded_stellar_system(seed, cache=SystemCache(directory))`
+(and the batch functions, which take the same `cache`) looks a system up
+before generating it, and stores it once it is generated. Entries are keyed
+by a hash of
+
+*   the seed, and the star: the inputs of one that was passed in, or the
+    mass of the random star drawn from the seed;
+*   the options that decide what is generated (`do_gases`, `do_moons`, the
+    accretion engine and so on), with defaults filled in;
+*   a fingerprint of `constants.py`, `data/gases.csv` and the code of every
+    module, so that changing any of them misses rather than returns stale
+    systems.
+
+Each entry is one file holding the zlib compressed pickle of the system. It
+is written under a temporary name and renamed into place, so any number of
+processes can read and write the same directory: a reader sees a whole entry
+or none. Reading an entry touches its modification time, and once the
+entries grow past `max_bytes` the least recently used ones are deleted until
+they are under EVICTION_TARGET of it. A process that deletes an entry while
+another is reading it does no harm; the reader has the file open.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import zlib
+
+from functools import lru_cache
+from pathlib import Path
+
+import constants
+
+from attr import attr
+from attr import attrs
+from chemtable import GASES_FILENAME
+from filters import SystemFilter
+from stellar_system import STAR_INPUTS
+
+LOCAL_DIR = Path(__file__).resolve().parent
+
+# Bump when the layout of entries changes.
+CACHE_FORMAT = 1
+
+DEFAULT_MAX_BYTES = 2**30
+
+# Eviction deletes entries until they take up this share of max_bytes.
+EVICTION_TARGET = 0.9
+
+ENTRY_SUFFIX = '.system'
+
+
+def file_digest(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def code_fingerprint():
+    """Hashes of what generated systems depend on besides the arguments."""
+    sources = hashlib.sha256()
+    for path in sorted(LOCAL_DIR.glob('*.py')):
+        sources.update(path.name.encode())
+        sources.update(path.read_bytes())
+    return {
+        'format': CACHE_FORMAT,
+        'constants': file_digest(constants.__file__),
+        'gases': file_digest(GASES_FILENAME),
+        'code': sources.hexdigest(),
+    }
+
+
+def option_key(value):
+    # Filters hold functions, whose reprs change from process to process.
+    if isinstance(value, SystemFilter):
+        return value.name
+    return repr(value)
+
+
+@attrs
+class CacheStats:
+    """What a SystemCache did."""
+
+    hits = attr(default=0)
+    misses = attr(default=0)
+    writes = attr(default=0)
+    evictions = attr(default=0)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def update(self, other):
+        """Add the counts of another CacheStats to these."""
+        self.hits += other.hits
+        self.misses += other.misses
+        self.writes += other.writes
+        self.evictions += other.evictions
+
+
+class SystemCache:
+    """Generated systems, stored in `directory`.
+
+    `fingerprint` defaults to code_fingerprint(). `stats` counts what this
+    process did with the cache.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES,
+                 fingerprint=None):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.fingerprint = (code_fingerprint() if fingerprint is None
+                            else fingerprint)
+        self.stats = CacheStats()
+        # An estimate of the bytes in the cache, from the last scan and the
+        # writes since. Other processes' writes are only seen by scanning.
+        self._size = None
+
+    def fork(self):
+        """A cache of the same directory, with stats of its own."""
+        return SystemCache(self.directory, self.max_bytes, self.fingerprint)
+
+    def key(self, seed, star, mass_ratio, options):
+        """The key of the system for `seed` generated with `options`."""
+        if star is None:
+            star_key = {'mass_ratio': repr(mass_ratio)}
+        else:
+            star_key = {name: repr(getattr(star, name))
+                        for name in STAR_INPUTS}
+        description = {
+            'seed': repr(seed),
+            'star': star_key,
+            'options': {name: option_key(value)
+                        for name, value in options.items()},
+            'fingerprint': self.fingerprint,
+        }
+        return hashlib.sha256(
+            json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+    def path(self, key):
+        return self.directory / key[:2] / (key + ENTRY_SUFFIX)
+
+    def lookup(self, key):
+        """(True, system) for a stored system, or (False, None).
+
+        A system may be stored as None: one that a filter rejected.
+        """
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(str(path))
+        except FileNotFoundError:
+            self.stats.misses += 1
+            return False, None
+        self.stats.hits += 1
+        return True, pickle.loads(zlib.decompress(data))
+
+    def store(self, key, system):
+        data = zlib.compress(pickle.dumps(system, pickle.HIGHEST_PROTOCOL))
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=str(path.parent),
+                                                 suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as stream:
+                stream.write(data)
+            os.replace(temporary, str(path))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.stats.writes += 1
+
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        """(last use, size, path) of every entry."""
+        entries = []
+        for path in self.directory.glob('*/*' + ENTRY_SUFFIX):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self):
+        """The bytes taken up by the entries."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Delete the least recently used entries, down to EVICTION_TARGET
+        of max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICTION_TARGET
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                self.stats.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
@@ -6,11 +6,15 @@ consider thick / thin atmospheres very well and does not consider reactions,
 either amoung gases in an atmosphere, or with regards to fixing in the crust.
 """
 
+import csv
 import os
-import pandas as pd
+import pickle
+
+import numpy as np
 
 from attr import attr
 from attr import attrs
+from xatu.core import dimensionless_with_units
 from xatu.core import quantity_formatter
 from xatu.units import g
 from xatu.units import kg
@@ -47,28 +51,222 @@ class Gas():
     max_ipp = attr()  # long double
 
 
-def load_gases():
+LOCAL_DIR = os.path.dirname(__file__)
+GASES_FILENAME = os.path.join(LOCAL_DIR, 'data/gases.csv')
+
+# Parsed rows of GASES_FILENAME, rebuilt whenever the csv changes.
+GASES_CACHE_FILENAME = os.path.join(LOCAL_DIR, 'data/gases.pickle')
+
+# Columns that are not plain floats.
+GAS_COLUMN_TYPES = {
+    'num': int,
+    'symbol': str,
+    'name': str,
+}
+
+
+def read_gas_rows(filename):
+    """Parse a gas table csv into a list of dicts of plain values."""
+    with open(filename, newline='') as csv_file:
+        return [
+            {
+                column: GAS_COLUMN_TYPES.get(column, float)(value)
+                for column, value in row.items()
+            }
+            for row in csv.DictReader(csv_file)
+        ]
+
+
+def cached_gas_rows(filename=GASES_FILENAME,
+                    cache_filename=GASES_CACHE_FILENAME):
+    """`read_gas_rows`, through a pickle that is kept next to the csv.
+
+    The cache records the csv's size and modification time and is ignored
+    once either changes. A missing, stale or unreadable cache is rebuilt; if
+    it cannot be written (e.g. a read-only install) the csv is just parsed.
+    """
+    stat = os.stat(filename)
+    key = (stat.st_size, stat.st_mtime_ns)
+    try:
+        with open(cache_filename, 'rb') as cache_file:
+            cached_key, rows = pickle.load(cache_file)
+        if cached_key == key:
+            return rows
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+
+    rows = read_gas_rows(filename)
+    temp_filename = '%s.%d.tmp' % (cache_filename, os.getpid())
+    try:
+        with open(temp_filename, 'wb') as cache_file:
+            pickle.dump((key, rows), cache_file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        # Atomic, so concurrent imports never see a partial cache.
+        os.replace(temp_filename, cache_filename)
+    except OSError:
+        try:
+            os.remove(temp_filename)
+        except OSError:
+            pass
+    return rows
+
+
+def load_gases(filename=GASES_FILENAME):
     """Load all the known gases from a file on disk."""
-    local_dir = os.path.dirname(__file__)
-    gases_filename = os.path.join(local_dir, 'data/gases.csv')
-    gases = pd.read_csv(gases_filename)
-    gases['melt'] = gases['melt'] * K
-    gases['boil'] = gases['boil'] * K
-    gases['weight'] = gases['weight'] * kg / mol
-    gases['min_ipp'] = gases['min_ipp'] * millibar
-    gases['max_ipp'] = gases['max_ipp'] * millibar
+    if filename == GASES_FILENAME:
+        rows = cached_gas_rows()
+    else:
+        rows = read_gas_rows(filename)
     return [
-        Gas(**gas_row)
-        for _, gas_row in gases.iterrows()
+        Gas(**dict(
+            row,
+            melt=row['melt'] * K,
+            boil=row['boil'] * K,
+            weight=row['weight'] * kg / mol,
+            min_ipp=row['min_ipp'] * millibar,
+            max_ipp=row['max_ipp'] * millibar,
+        ))
+        for row in rows
     ]
 
 
+@attrs(frozen=True)
+class GasArrays():
+    """The numeric columns of a gas table, as contiguous float arrays.
+
+    Row i describes the same gas as GASES[i], so per-gas math can be done
+    for the whole table at once. Arrays are plain floats in fixed units:
+    weight in kg/mol, temperatures in K and pressures in millibar.
+    """
+
+    symbols: tuple = attr()
+    num = attr()
+    weight = attr()
+    melt = attr()
+    boil = attr()
+    density = attr()
+    abunde = attr()
+    abunds = attr()
+    reactivity = attr()
+    min_ipp = attr()
+    max_ipp = attr()
+
+    @classmethod
+    def from_gases(cls, gases):
+        def column(values):
+            array = np.array(values, dtype=float)
+            array.flags.writeable = False
+            return array
+
+        return cls(
+            symbols=tuple(gas.symbol for gas in gases),
+            num=column([gas.num for gas in gases]),
+            weight=column([dimensionless_with_units(gas.weight, kg / mol)
+                           for gas in gases]),
+            melt=column([dimensionless_with_units(gas.melt, K)
+                         for gas in gases]),
+            boil=column([dimensionless_with_units(gas.boil, K)
+                         for gas in gases]),
+            density=column([gas.density for gas in gases]),
+            abunde=column([gas.abunde for gas in gases]),
+            abunds=column([gas.abunds for gas in gases]),
+            reactivity=column([gas.reactivity for gas in gases]),
+            min_ipp=column([dimensionless_with_units(gas.min_ipp, millibar)
+                            for gas in gases]),
+            max_ipp=column([dimensionless_with_units(gas.max_ipp, millibar)
+                            for gas in gases]),
+        )
+
+
 GASES = load_gases()
 
+# Row of each gas in GASES (and GAS_ARRAYS), by symbol.
+GAS_INDEX = {gas.symbol: i for i, gas in enumerate(GASES)}
+
+GAS_ARRAYS = GasArrays.from_gases(GASES)
+
+
+@attrs(frozen=True)
+class Reactivity():
+    """How much of a gas is left after reacting with the crust and air.
+
+    With `decays`, the surviving fraction is
+
+        factor * (1 / (1 + gas.reactivity)) ** (
+            age ** age_exponent * (pressure_offset + pressure_scale * pressure))
+
+    and otherwise just `factor * age ** age_exponent`, where age is the
+    star's age in units of 2 Gyr and pressure is the surface pressure in bar.
+    """
+
+    decays: bool = attr(default=True)
+    age_exponent: float = attr(default=1.0)
+    pressure_offset: float = attr(default=0.75)
+    pressure_scale: float = attr(default=1.0)
+    factor: float = attr(default=1.0)
+
+
+# Most gases just decay with age and pressure.
+DEFAULT_REACTIVITY = Reactivity()
+
+# Argon builds up over time instead.
+REACTIVITY = {
+    'Ar': Reactivity(decays=False, factor=.075),
+}
+
+# On planets older than 2 Gyr with surface temperatures between 270 K and
+# 400 K (where life may have got going) these rules replace the defaults.
+TEMPERATE_REACTIVITY = dict(REACTIVITY, **{
+    'O': Reactivity(age_exponent=0.25, pressure_offset=0.89,
+                    pressure_scale=0.25),
+    'O2': Reactivity(age_exponent=0.25, pressure_offset=0.89,
+                     pressure_scale=0.25),
+    'CO2': Reactivity(age_exponent=0.5, factor=1.5),
+})
+
+
+@attrs(frozen=True)
+class ReactivityArrays():
+    """A set of reactivity rules as arrays, row-aligned with GASES."""
+
+    decays = attr()
+    age_exponent = attr()
+    pressure_offset = attr()
+    pressure_scale = attr()
+    factor = attr()
+
+    @classmethod
+    def from_rules(cls, rules, symbols):
+        rows = [rules.get(symbol, DEFAULT_REACTIVITY) for symbol in symbols]
+
+        def column(name, dtype=float):
+            array = np.array([getattr(row, name) for row in rows], dtype=dtype)
+            array.flags.writeable = False
+            return array
+
+        return cls(
+            decays=column('decays', dtype=bool),
+            age_exponent=column('age_exponent'),
+            pressure_offset=column('pressure_offset'),
+            pressure_scale=column('pressure_scale'),
+            factor=column('factor'),
+        )
+
+
+REACTIVITY_ARRAYS = ReactivityArrays.from_rules(
+    REACTIVITY, GAS_ARRAYS.symbols)
+TEMPERATE_REACTIVITY_ARRAYS = ReactivityArrays.from_rules(
+    TEMPERATE_REACTIVITY, GAS_ARRAYS.symbols)
+
+
+def gas_id(symbol):
+    """The row of a gas in GASES, based on it's symbol."""
+    try:
+        return GAS_INDEX[symbol]
+    except KeyError:
+        raise NotImplementedError("Unknown Gas: " + symbol) from None
+
 
 def lookup_gas(symbol):
     """Look up a gas based on it's symbol."""
-    for gas in GASES:
-        if gas.symbol == symbol:
-            return gas
-    raise NotImplementedError("Unknown Gas: " + symbol)
+    return GASES[gas_id(symbol)]
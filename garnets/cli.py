@@ -0,0 +1,277 @@
+"""
+Command line catalog generator, after the flags of StarGen's main.c.
+
+    python garnets/cli.py -s 1 -n 100000 -g -M -j 8 -o catalog
+
+generates the systems for seeds s, s + i, s + 2i, ... (`-n` of them), with
+gases (`-g`) and moons (`-M`), on 8 worker processes. The run is split into
+parts of `--part-size` consecutive seeds; each part is generated and written
+to the output directory by one worker, under a temporary name until it is
+complete. Finished parts are recorded in `checkpoint.json` there, so running
+the same command again after an interruption only generates the parts that
+are missing.
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from pathlib import Path
+
+from accrete import FAST_ACCRETION
+from attr import asdict
+from attr import attr
+from attr import attrs
+from export import NdjsonWriter
+from export import ParquetWriter
+from filters import HABITABLE
+from filters import FilterStats
+from garnets import iter_stellar_systems
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILENAME = 'checkpoint.json'
+
+
+@attrs(frozen=True)
+class CatalogSettings:
+    """Everything that decides what a catalog contains.
+
+    A checkpoint is only resumed with the same settings.
+    """
+
+    mass: float = attr()
+    seed: int = attr()
+    increment: int = attr()
+    count: int = attr()
+    gases: bool = attr()
+    moons: bool = attr()
+    habitable: bool = attr()
+    format: str = attr()
+    part_size: int = attr()
+
+    def seeds(self, start, stop):
+        return range(self.seed + start * self.increment,
+                     self.seed + stop * self.increment,
+                     self.increment)
+
+    def parts(self):
+        return [(start, min(start + self.part_size, self.count))
+                for start in range(0, self.count, self.part_size)]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate a catalog of stellar systems.")
+    parser.add_argument('-m', '--mass', type=float, default=1.0,
+                        help="mass of the stars, in solar masses")
+    parser.add_argument('-s', '--seed', type=int, default=None,
+                        help="first seed (default: the checkpoint's, or the "
+                        "current time)")
+    parser.add_argument('-i', '--increment', type=int, default=1,
+                        help="step between seeds")
+    parser.add_argument('-n', '--count', type=int, default=1,
+                        help="number of systems to generate")
+    parser.add_argument('-g', '--gases', action='store_true',
+                        help="work out atmospheres")
+    parser.add_argument('-M', '--moons', action='store_true',
+                        help="generate moons")
+    parser.add_argument('-H', '--habitable', action='store_true',
+                        help="only keep systems with a habitable world "
+                        "(implies -g)")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU; 0 runs "
+                        "everything in this process)")
+    parser.add_argument('-o', '--output', type=Path, default=Path('.'),
+                        help="output directory")
+    parser.add_argument('-f', '--format', choices=['ndjson', 'parquet'],
+                        default='ndjson', help="output format")
+    parser.add_argument('--part-size', type=int, default=1000,
+                        help="systems per output file (and checkpoint step)")
+    args = parser.parse_args(argv)
+    if args.count < 0 or args.part_size < 1 or args.increment == 0:
+        parser.error("-n must be >= 0, --part-size >= 1 and -i nonzero")
+    return args
+
+
+def part_paths(settings, output, start, stop):
+    """The files a part is written to."""
+    stem = 'systems-%09d-%09d' % (start, stop)
+    if settings.format == 'parquet':
+        return [output / (stem + '-stars.parquet'),
+                output / (stem + '-planets.parquet')]
+    return [output / (stem + '.ndjson')]
+
+
+def write_part(settings, output, start, stop):
+    """Generate and write one part.
+
+    Returns the part's range, how many systems were kept and, with -H, the
+    habitability filter's FilterStats.
+    """
+    paths = part_paths(settings, output, start, stop)
+    temporary = [path.with_name(path.name + '.tmp') for path in paths]
+
+    stats = FilterStats()
+    systems = iter_stellar_systems(
+        settings.seeds(start, stop),
+        do_gases=settings.gases or settings.habitable,
+        do_moons=settings.moons,
+        accretion=FAST_ACCRETION,
+        mass_ratio=settings.mass,
+        system_filter=HABITABLE if settings.habitable else None,
+        filter_stats=stats,
+    )
+    kept = 0
+    if settings.format == 'parquet':
+        writer = ParquetWriter(str(temporary[0]), str(temporary[1]))
+        stream = None
+    else:
+        stream = open(temporary[0], 'w')
+        writer = NdjsonWriter(stream)
+    try:
+        for seed, star in systems:
+            writer.write_system(seed, star)
+            kept += 1
+    finally:
+        writer.close()
+        if stream is not None:
+            stream.close()
+
+    # The part only appears under its real name once it is complete.
+    for temporary_path, path in zip(temporary, paths):
+        os.replace(temporary_path, path)
+    return start, stop, kept, stats
+
+
+def merge_ranges(ranges):
+    """Sort [start, stop) ranges and join the ones that touch."""
+    merged = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], stop)
+        else:
+            merged.append([start, stop])
+    return merged
+
+
+def load_checkpoint(output, settings):
+    """The [start, stop) ranges finished in `output` with `settings`."""
+    path = output / CHECKPOINT_FILENAME
+    if not path.exists():
+        return []
+    checkpoint = json.loads(path.read_text())
+    if checkpoint['settings'] != asdict(settings):
+        raise SystemExit(
+            "%s was written with different settings: %s" %
+            (path, checkpoint['settings']))
+    return [list(r) for r in checkpoint['done']]
+
+
+def save_checkpoint(output, settings, done):
+    path = output / CHECKPOINT_FILENAME
+    temporary = path.with_name(path.name + '.tmp')
+    temporary.write_text(json.dumps(
+        {'settings': asdict(settings), 'done': done}, indent=1))
+    os.replace(temporary, path)
+
+
+def checkpointed_seed(output):
+    path = output / CHECKPOINT_FILENAME
+    if path.exists():
+        return json.loads(path.read_text())['settings']['seed']
+    return None
+
+
+def pending_parts(settings, done):
+    def finished(start, stop):
+        return any(a <= start and stop <= b for a, b in done)
+    return [(start, stop) for start, stop in settings.parts()
+            if not finished(start, stop)]
+
+
+def run(settings, output, workers=None):
+    """Write every part of the catalog not yet in the checkpoint.
+
+    Returns the number of systems kept by the parts written in this run, and
+    the habitability filter's FilterStats for them.
+    """
+    output.mkdir(parents=True, exist_ok=True)
+    done = load_checkpoint(output, settings)
+    todo = pending_parts(settings, done)
+    logger.info("%d of %d parts to generate.", len(todo),
+                len(settings.parts()))
+
+    kept = 0
+    stats = FilterStats()
+
+    def finish(result):
+        nonlocal done, kept
+        start, stop, part_kept, part_stats = result
+        kept += part_kept
+        stats.update(part_stats)
+        done = merge_ranges(done + [[start, stop]])
+        save_checkpoint(output, settings, done)
+        seeds = settings.seeds(start, stop)
+        logger.info("Seeds %d to %d done: kept %d of %d systems.",
+                    seeds[0], seeds[-1], part_kept, len(seeds))
+
+    if workers == 0:
+        for start, stop in todo:
+            finish(write_part(settings, output, start, stop))
+        return kept, stats
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        todo = iter(todo)
+        pending = set()
+        while True:
+            for start, stop in todo:
+                pending.add(executor.submit(write_part, settings, output,
+                                            start, stop))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                finish(future.result())
+    return kept, stats
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    seed = args.seed
+    if seed is None:
+        seed = checkpointed_seed(args.output)
+    if seed is None:
+        seed = int(time.time())
+    settings = CatalogSettings(
+        mass=args.mass,
+        seed=seed,
+        increment=args.increment,
+        count=args.count,
+        gases=args.gases or args.habitable,
+        moons=args.moons,
+        habitable=args.habitable,
+        format=args.format,
+        part_size=args.part_size,
+    )
+    kept, stats = run(settings, args.output, args.workers)
+    logger.info("Wrote %d systems to %s.", kept, args.output)
+    if settings.habitable:
+        logger.info(
+            "Rejected %.1f%% of systems, %.1f%% before generating their "
+            "planets, saving about %.0f s.", 100 * stats.rejection_rate,
+            100 * stats.early_rejection_rate, stats.time_saved)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
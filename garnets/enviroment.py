@@ -1,9 +1,14 @@
+import logging
+import random
+
 from enum import Enum
+from functools import lru_cache
 from math import exp
 from math import inf as INCREDIBLY_LARGE_NUMBER
 from math import log
 from math import pi
 
+from atmosphere import MOLAR_GAS_CONST_SI
 from attr import attr
 from attr import attrs
 from chemtable import lookup_gas
@@ -32,6 +37,7 @@ from constants import ROCKY_ALBEDO
 from constants import WATER_ALBEDO
 from tabulate import tabulate
 from xatu.core import dimensionless_with_units
+from xatu.core import quantity_formatter
 from xatu.core import quantity_repr
 from xatu.core import with_units
 from xatu.math import cos
@@ -58,7 +64,11 @@ from xatu.units import year
 
 # TODO(woursler): Break this file up.
 
-VERBOSE = True
+# The surface temperature readouts are logged at DEBUG, and only built when
+# that level is enabled.
+logger = logging.getLogger(__name__)
+
+H2O_WEIGHT = lookup_gas('H2O').weight
 
 
 class BreathabilityPhrase(Enum):
@@ -95,9 +105,10 @@ class Zone(Enum):
 
 def orb_zone(luminosity, orb_radius):
     '''The orbital 'zone' of the particle.'''
-    if orb_radius < (4 * sqrt(luminosity) * au):
+    sqrt_luminosity = sqrt(luminosity)
+    if orb_radius < (4 * sqrt_luminosity * au):
         return Zone.ZONE_1
-    elif orb_radius < (15 * sqrt(luminosity) * au):
+    elif orb_radius < (15 * sqrt_luminosity * au):
         return Zone.ZONE_2
     else:
         return Zone.ZONE_3
@@ -277,11 +288,11 @@ def day_length(planet):
     return day_length
 
 
-def inclination(orb_radius):
+def inclination(orb_radius, rng=random):
     '''The orbital radius is expected in units of Astronomical Units (AU).
     Inclination is returned in units of degrees. '''
     temp = int((orb_radius**0.2) *
-               random.uniform(EARTH_AXIAL_TILT - 0.4, EARTH_AXIAL_TILT + 0.4))
+               rng.uniform(EARTH_AXIAL_TILT - 0.4, EARTH_AXIAL_TILT + 0.4))
     return (temp % 360) * deg
 
 
@@ -415,7 +426,7 @@ def cloud_fraction(surf_temp, smallest_MW_retained, equat_radius,
 
     surf_temp = dimensionless_with_units(surf_temp, K)
 
-    if smallest_MW_retained > lookup_gas('H2O').weight:
+    if smallest_MW_retained > H2O_WEIGHT:
         return 0.0
     else:
         surf_area = 4.0 * pi * (equat_radius**2)
@@ -602,21 +613,110 @@ class GasWrapper:
     weight = attr()
 
 
+@attrs
+class RetentionCounter:
+    """Tallies the work done by `min_molec_weight`.
+
+    `gas_life_calls_saved` counts the gas_life evaluations the bisection in
+    `bisect_min_molec_weight` would have made for the same planets.
+    """
+
+    calls: int = attr(default=0)
+    memo_hits: int = attr(default=0)
+    gas_life_calls_saved: int = attr(default=0)
+
+
+RETENTION_COUNTER = RetentionCounter()
+
+# Gas lifetimes are only ever compared against stellar ages, so the answer
+# for a given radius, gravity, exospheric temperature and age never changes.
+RETENTION_MEMO_SIZE = 4096
+
+
+@lru_cache(maxsize=RETENTION_MEMO_SIZE)
+def retention_threshold(radius, surf_grav, exospheric_temp, target,
+                        lower_bound, upper_bound):
+    """Solve gas_life(weight) == target for the weight, in closed form.
+
+    All arguments are plain floats in SI units (weights in kg/mol). With
+    v ** 2 = 3 R T / M, gas_life is
+
+        ln t = 1.5 ln(3 r g) - ln(2 r g ** 2) - 1.5 ln(u) + u,  u = r g M / (R T)
+
+    which is convex in u with its minimum at u = 1.5, so there is one root
+    on the increasing branch and Newton's method from the right converges
+    to it monotonically. Returns the threshold weight (or `lower_bound`, if
+    that is already retained) and the number of gas_life calls the bisection
+    would have needed.
+    """
+    k = radius * surf_grav / (MOLAR_GAS_CONST_SI * exospheric_temp)
+    excess = log(target) - (1.5 * log(3 * radius * surf_grav)
+                            - log(2 * radius * surf_grav ** 2))
+
+    def residual(u):
+        return u - 1.5 * log(u) - excess
+
+    # If the planet can retain free hydrogen, it can retain any gas.
+    if residual(k * lower_bound) >= 0:
+        return lower_bound, 1
+
+    u = max(3.0, k * lower_bound, 2 * excess)
+    while residual(u) <= 0:
+        u *= 2
+    for _ in range(50):
+        step = residual(u) / (1 - 1.5 / u)
+        u -= step
+        if step <= 1e-14 * u:
+            break
+    weight = u / k
+
+    # The bisection checks hydrogen, doubles its upper bound until it is
+    # retained, then takes 25 steps.
+    doublings = 0
+    while upper_bound < weight:
+        upper_bound *= 2
+        doublings += 1
+    return weight, 1 + (doublings + 1) + 25
+
+
 def min_molec_weight(planet):
     '''Determines the smallest molecular weight expected to be retained in
     significant quantities.
 
-    While a fixed solution is possible
+    This is the weight at which gas_life equals the age of the system, found
+    by `retention_threshold` (and remembered there) rather than by bisection.
+    '''
+    if planet.sun:
+        target = planet.sun.age
+    else:
+        target = 5.0E9 * year
 
-    TODO(woursler): Not sure this is ported well with the guesses and all.
-    Also it's totally unreadable.
+    lower_bound = lookup_gas('H').weight
+    upper_bound = lookup_gas('N2').weight
 
-    # DO NOT COMMIT(woursler): Implement.
-    '''
+    args = (
+        dimensionless_with_units(planet.radius, m),
+        dimensionless_with_units(planet.surf_grav, m / s ** 2),
+        dimensionless_with_units(planet.exospheric_temp, K),
+        dimensionless_with_units(target, s),
+        dimensionless_with_units(lower_bound, kg / mol),
+        dimensionless_with_units(upper_bound, kg / mol),
+    )
+    hits = retention_threshold.cache_info().hits
+    weight, gas_life_calls = retention_threshold(*args)
+
+    RETENTION_COUNTER.calls += 1
+    RETENTION_COUNTER.memo_hits += retention_threshold.cache_info().hits - hits
+    RETENTION_COUNTER.gas_life_calls_saved += gas_life_calls
+    return weight * kg / mol
 
-    mass = planet.mass
-    radius = planet.radius
-    temp = planet.exospheric_temp
+
+def bisect_min_molec_weight(planet):
+    '''Determines the smallest molecular weight expected to be retained in
+    significant quantities, by bisection on gas_life.
+
+    This is the original search, kept as the reference for min_molec_weight.
+    '''
 
     if planet.sun:
         target = planet.sun.age
@@ -630,7 +730,7 @@ def min_molec_weight(planet):
     upper_bound = lookup_gas('N2').weight
 
     # If the planet can retain free hydrogen, it can retain any gas.
-    if gas_life(GasWrapper(weight=lower_bound), planet) < target:
+    if gas_life(GasWrapper(weight=lower_bound), planet) >= target:
         return lower_bound
 
     # Ensure that upper_bound > mmw while keeping lower_bound < mmw
@@ -656,15 +756,20 @@ def min_molec_weight(planet):
 
 
 def calculate_surface_temp(planet, first, last_water, last_clouds, last_ice,
-                           last_temp, last_albedo):
-    '''The temperature calculated is in degrees Kelvin. '''
+                           last_temp, last_albedo, damping=1/3):
+    '''The temperature calculated is in degrees Kelvin.
+
+    Unless `first`, the new values are blended with the last ones, taking
+    `damping` of the new value.
+    '''
 
     boil_off = False
+    r_ecosphere = planet.sun.context.r_ecosphere
 
     if first:
         planet.albedo = EARTH_ALBEDO
 
-        effective_temp = eff_temp(planet.sun.r_ecosphere, planet.orbit.a,
+        effective_temp = eff_temp(r_ecosphere, planet.orbit.a,
                                   planet.albedo)
         greenhouse_temp = green_rise(
             opacity(planet.molec_weight, planet.surf_pressure), effective_temp,
@@ -712,7 +817,7 @@ def calculate_surface_temp(planet, first, last_water, last_clouds, last_ice,
         planet.hydrosphere = 0.0
         boil_off = True
 
-        if planet.molec_weight > lookup_gas('H2O').weight:
+        if planet.molec_weight > H2O_WEIGHT:
             planet.cloud_cover = 0.0
         else:
             planet.cloud_cover = 1.0
@@ -723,8 +828,7 @@ def calculate_surface_temp(planet, first, last_water, last_clouds, last_ice,
     planet.albedo = planet_albedo(planet.hydrosphere, planet.cloud_cover,
                                   planet.ice_cover, planet.surf_pressure)
 
-    effective_temp = eff_temp(planet.sun.r_ecosphere, planet.orbit.a,
-                              planet.albedo)
+    effective_temp = eff_temp(r_ecosphere, planet.orbit.a, planet.albedo)
     greenhouse_temp = green_rise(
         opacity(planet.molec_weight, planet.surf_pressure), effective_temp,
         planet.surf_pressure)
@@ -732,16 +836,16 @@ def calculate_surface_temp(planet, first, last_water, last_clouds, last_ice,
 
     if not first:
         if not boil_off:
-            planet.hydrosphere = (planet.hydrosphere + (last_water * 2)) / 3
-        planet.cloud_cover = (planet.cloud_cover + (last_clouds * 2)) / 3
-        planet.ice_cover = (planet.ice_cover + (last_ice * 2)) / 3
-        planet.albedo = (planet.albedo + (last_albedo * 2)) / 3
-        planet.surf_temp = (planet.surf_temp + (last_temp * 2)) / 3
+            planet.hydrosphere = blend(planet.hydrosphere, last_water, damping)
+        planet.cloud_cover = blend(planet.cloud_cover, last_clouds, damping)
+        planet.ice_cover = blend(planet.ice_cover, last_ice, damping)
+        planet.albedo = blend(planet.albedo, last_albedo, damping)
+        planet.surf_temp = blend(planet.surf_temp, last_temp, damping)
 
     set_temp_range(planet)
 
-    if VERBOSE:
-        print("calculate_surface_temp readout\n" + tabulate([
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("calculate_surface_temp readout\n%s", tabulate([
             ["Orbital Radius", quantity_repr(planet.orbit.a, au)],
             ["Surface Temp", quantity_repr(planet.surf_temp, K)],
             ["Effective Temp", quantity_repr(effective_temp, K)],
@@ -755,15 +859,112 @@ def calculate_surface_temp(planet, first, last_water, last_clouds, last_ice,
         ]))
 
 
-def iterate_surface_temp(planet):
+def blend(new, last, damping):
+    return last + damping * (new - last)
+
+
+@attrs
+class SurfaceTempConvergence:
+    """How a surface temperature solve went."""
+
+    iterations: int = attr(default=0)
+    converged: bool = attr(default=False)
+    # The size of the last change in surface temperature.
+    last_change = attr(default=None, repr=quantity_formatter(K))
+    # The damping used for the last iteration.
+    damping: float = attr(default=None)
+
+
+@attrs
+class SurfaceTempSolver:
+    """Iterates calculate_surface_temp until the surface temperature settles.
+
+    Each iteration takes `damping` of the newly calculated values and keeps
+    the rest of the last ones. With `adaptive`, the ratio of successive
+    temperature changes estimates the slope of the update (a secant step),
+    and the damping is rescaled towards the value that would land on the
+    fixed point: up when the changes shrink slowly in the same direction,
+    down when they oscillate, and halved if they stop shrinking at all. The
+    damping is kept within [min_damping, max_damping].
+
+    RELAXATION_SOLVER is StarGen's original scheme, a fixed 1/3 damping, and
+    the default. ADAPTIVE_SOLVER takes fewer iterations and lands closer to
+    the fixed point, which can change the type of a planet close to a
+    boundary, so it is opt-in.
+    """
+
+    tolerance = attr(factory=lambda: 0.25 * K, repr=quantity_formatter(K))
+    max_iterations: int = attr(default=26)
+    damping: float = attr(default=1.0)
+    adaptive: bool = attr(default=True)
+    min_damping: float = attr(default=0.1)
+    max_damping: float = attr(default=1.0)
+
+    def next_damping(self, damping, change, last_change):
+        if not self.adaptive or last_change is None or last_change == 0 * K:
+            return damping
+        ratio = change / last_change
+        if ratio < 1:
+            damping = damping / (1 - ratio)
+        else:
+            damping = damping / 2
+        return min(max(damping, self.min_damping), self.max_damping)
+
+    def solve(self, planet):
+        calculate_surface_temp(planet, True, 0, 0, 0, 0, 0)
+
+        stats = SurfaceTempConvergence()
+        damping = self.damping
+        last_change = None
+        for _ in range(self.max_iterations):
+            last_water = planet.hydrosphere
+            last_clouds = planet.cloud_cover
+            last_ice = planet.ice_cover
+            last_temp = planet.surf_temp
+            last_albedo = planet.albedo
+
+            calculate_surface_temp(planet, False, last_water, last_clouds,
+                                   last_ice, last_temp, last_albedo,
+                                   damping=damping)
+            stats.iterations += 1
+            stats.damping = damping
+
+            change = planet.surf_temp - last_temp
+            stats.last_change = abs(change)
+            if abs(change) < self.tolerance:
+                stats.converged = True
+                break
+
+            damping = self.next_damping(damping, change, last_change)
+            last_change = change
+        return stats
+
+
+# The original fixed-damping relaxation.
+RELAXATION_SOLVER = SurfaceTempSolver(damping=1/3, adaptive=False)
+
+# Takes about a quarter fewer iterations than the relaxation, but lands
+# closer to the fixed point, so a planet near a type boundary can be
+# classified differently (one moon in 30 seeded systems goes from ICE to
+# TERRESTRIAL). Catalogs made with it differ from the default's.
+ADAPTIVE_SOLVER = SurfaceTempSolver()
+
+SURFACE_TEMP_SOLVER = RELAXATION_SOLVER
+
+
+def iterate_surface_temp(planet, solver=None):
+    '''Find the planet's surface temperature, using `solver` (by default
+    SURFACE_TEMP_SOLVER). The solver's statistics are kept on the planet as
+    `surf_temp_convergence`.'''
     initial_temp = est_temp(
-        planet.sun.r_ecosphere,
+        planet.sun.context.r_ecosphere,
         planet.orbit.a,
         planet.albedo,
     )
 
-    if VERBOSE:
-        print(
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "iterate_surface_temp inputs\n%s",
             tabulate([
                 ["Initial temp", quantity_repr(initial_temp, K)],
                 ["Solar Ecosphere", quantity_repr(planet.sun.r_ecosphere, au)],
@@ -776,33 +977,21 @@ def iterate_surface_temp(planet):
         n2_life = gas_life(lookup_gas('N2'), planet)
         n_life = gas_life(lookup_gas('N'), planet)
 
-        print('Gas lifetimes:\n' + tabulate([
+        logger.debug('Gas lifetimes:\n%s', tabulate([
             ['H2', quantity_repr(h2_life, year)],
             ['H2O', quantity_repr(h2o_life, year)],
             ['N', quantity_repr(n_life, year)],
             ['N2', quantity_repr(n2_life, year)],
         ]))
 
-    calculate_surface_temp(planet, True, 0, 0, 0, 0, 0)
-
-    # TODO(woursler): WTF is this magic number? just an iteration limit? Should be a param.
-    for _ in range(26):
-        last_water = planet.hydrosphere
-        last_clouds = planet.cloud_cover
-        last_ice = planet.ice_cover
-        last_temp = planet.surf_temp
-        last_albedo = planet.albedo
-
-        calculate_surface_temp(planet, False, last_water, last_clouds,
-                               last_ice, last_temp, last_albedo)
-
-        if abs(planet.surf_temp - last_temp) < 0.25 * K:
-            break
+    if solver is None:
+        solver = SURFACE_TEMP_SOLVER
+    planet.surf_temp_convergence = solver.solve(planet)
 
     planet.greenhs_rise = planet.surf_temp - initial_temp
 
-    if VERBOSE:
-        print("iterate_surface_temp readout\n" + tabulate([
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("iterate_surface_temp readout\n%s", tabulate([
             ["greenhs_rise", quantity_repr(planet.greenhs_rise, K)],
             ["surf_temp", quantity_repr(planet.surf_temp, K)],
             ["surf_temp - FREEZING_POINT_OF_WATER",
@@ -830,27 +1019,23 @@ def breathability(planet):
     '''This function uses figures on the maximum inspired partial pressures
     of Oxygen, atmospheric and traces gases as laid out on pages 15,
     16 and 18 of Dole's Habitable Planets for Man to derive breathability
-    of the planet's atmosphere.                                       JLB'''
-    oxygen_ok = False
+    of the planet's atmosphere.                                       JLB
 
-    if planet.gases == 0:
+    The gas table keeps Dole's oxygen limits as atomic oxygen's min_ipp and
+    max_ipp, and leaves max_ipp at 0 for gases with no known limit.'''
+    if not planet.atmosphere:
         return BreathabilityPhrase.NONE
 
-    for index in range(planet.gases):
-        gas_no = 0
-
-        ipp = inspired_partial_pressure(planet.surf_pressure,
-                                        planet.atmosphere[index].surf_pressure)
+    oxygen_ok = False
 
-        for n in range(len(planet.gases)):
-            if planet.gases[n].num == planet.atmosphere[index].num:
-                gas_no = n
+    for gas, gas_pressure in planet.atmosphere:
+        ipp = inspired_partial_pressure(planet.surf_pressure, gas_pressure)
 
-        if ipp > planet.gases[gas_no].max_ipp:
+        if gas.max_ipp > 0 * bar and ipp > gas.max_ipp:
             return BreathabilityPhrase.POISONOUS
 
-        if planet.atmosphere[index].num == AN_O:
-            oxygen_ok = ((ipp >= MIN_O2_IPP) and (ipp <= MAX_O2_IPP))
+        if gas.symbol == 'O':
+            oxygen_ok = gas.min_ipp <= ipp <= gas.max_ipp
 
     if oxygen_ok:
         return BreathabilityPhrase.BREATHABLE
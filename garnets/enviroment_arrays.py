@@ -0,0 +1,528 @@
+"""
+Planetary environments for whole tables of bodies at once.
+
+NumPy counterparts of the scalar functions in `enviroment.py`, and a
+pipeline (`planet_environments`) that runs the non-iterative part of
+`garnets.generate_planet` over N protoplanets in one pass. Everything works
+on plain float arrays in fixed units:
+
+    masses            solar masses
+    orbital radii     AU
+    radii             km
+    densities         g/cm^3
+    velocities        m/s
+    accelerations     m/s^2
+    temperatures      K
+    pressures         atm
+    molecular weights kg/mol (as in chemtable.GAS_ARRAYS)
+    times             years, except day lengths (hours) and periods (days)
+"""
+
+import numpy as np
+
+from atmosphere import MOLAR_GAS_CONST_SI
+from chemtable import GAS_ARRAYS
+from chemtable import gas_id
+from constants import CHANGE_IN_EARTH_ANG_VEL
+from constants import EARTH_ALBEDO
+from constants import EARTH_AVERAGE_TEMP
+from constants import EARTH_CONVECTION_FACTOR
+from constants import EARTH_DENSITY
+from constants import EARTH_EFFECTIVE_TEMP
+from constants import EARTH_EXOSPHERE_TEMP
+from constants import EARTH_RADIUS
+from constants import FREEZING_POINT_OF_WATER
+from constants import GAS_RETENTION_THRESHOLD
+from constants import GRAV_CONSTANT
+from constants import GREENHOUSE_TRIGGER_ALBEDO
+from constants import J
+from xatu.core import dimensionless_with_units
+from xatu.units import K
+from xatu.units import atm
+from xatu.units import au
+from xatu.units import bar
+from xatu.units import cm
+from xatu.units import earth_mass
+from xatu.units import g
+from xatu.units import hour
+from xatu.units import kg
+from xatu.units import km
+from xatu.units import m
+from xatu.units import rad
+from xatu.units import s
+from xatu.units import solar_mass
+from xatu.units import turn
+from xatu.units import year
+
+# Constants and conversion factors, as floats in the units above.
+SOLAR_MASS_KG = dimensionless_with_units(1 * solar_mass, kg)
+EARTH_MASSES_PER_SOLAR_MASS = dimensionless_with_units(
+    1 * solar_mass, earth_mass)
+AU_KM = dimensionless_with_units(1 * au, km)
+CM_PER_KM = dimensionless_with_units(1 * km, cm)
+SECONDS_PER_YEAR = dimensionless_with_units(1 * year, s)
+SECONDS_PER_HOUR = dimensionless_with_units(1 * hour, s)
+SECONDS_PER_DAY = 24 * SECONDS_PER_HOUR
+ATM_PER_BAR = dimensionless_with_units(1 * bar, atm)
+
+G = dimensionless_with_units(GRAV_CONSTANT, m ** 3 / kg / s ** 2)
+J_CGS = dimensionless_with_units(J, cm ** 2 / s ** 2 / g)
+EARTH_SPIN_DOWN = dimensionless_with_units(
+    CHANGE_IN_EARTH_ANG_VEL, rad / s / year)
+EARTH_RADIUS_KM = dimensionless_with_units(EARTH_RADIUS, km)
+EARTH_DENSITY_CGS = dimensionless_with_units(EARTH_DENSITY, g / cm ** 3)
+EARTH_EXOSPHERE_TEMP_K = dimensionless_with_units(EARTH_EXOSPHERE_TEMP, K)
+EARTH_EFFECTIVE_TEMP_K = dimensionless_with_units(EARTH_EFFECTIVE_TEMP, K)
+EARTH_AVERAGE_TEMP_K = dimensionless_with_units(EARTH_AVERAGE_TEMP, K)
+FREEZING_POINT_OF_WATER_K = dimensionless_with_units(
+    FREEZING_POINT_OF_WATER, K)
+RADIANS_PER_TURN = dimensionless_with_units(1 * turn, rad)
+
+H_WEIGHT = GAS_ARRAYS.weight[gas_id('H')]
+HE_WEIGHT = GAS_ARRAYS.weight[gas_id('He')]
+N2_WEIGHT = GAS_ARRAYS.weight[gas_id('N2')]
+
+# Gas lifetimes past this are treated as forever, as in enviroment.gas_life.
+MAX_GAS_LIFE = 2.0E10  # years
+
+ZONE_1 = 1
+ZONE_2 = 2
+ZONE_3 = 3
+
+# (atomic weight, atomic number) by zone, for rocky and giant bodies.
+KOTHARI_MATERIALS = {
+    (ZONE_1, False): (15.0, 8.0),
+    (ZONE_1, True): (9.5, 4.5),
+    (ZONE_2, False): (10.0, 5.0),
+    (ZONE_2, True): (2.47, 2.0),
+    (ZONE_3, False): (10.0, 5.0),
+    (ZONE_3, True): (7.0, 4.0),
+}
+
+# Fogg's volatile inventory proportions, by zone.
+VOLATILE_PROPORTIONS = {
+    ZONE_1: 140000.0,
+    ZONE_2: 75000.0,
+    ZONE_3: 250.0,
+}
+
+
+def orb_zone(luminosity, orb_radius):
+    """enviroment.orb_zone, as ints 1-3."""
+    orb_radius = np.asarray(orb_radius, dtype=float)
+    root = np.sqrt(luminosity)
+    return np.where(orb_radius < 4 * root, ZONE_1,
+                    np.where(orb_radius < 15 * root, ZONE_2, ZONE_3))
+
+
+def kothari_radius(mass, giant, zone):
+    """enviroment.kothari_radius; mass in solar masses, radius in km."""
+    mass, giant, zone = np.broadcast_arrays(
+        np.asarray(mass, dtype=float), giant, zone)
+    atomic_weight = np.empty(mass.shape)
+    atomic_num = np.empty(mass.shape)
+    for (material_zone, material_giant), (weight, num) in \
+            KOTHARI_MATERIALS.items():
+        rows = (zone == material_zone) & (giant == material_giant)
+        atomic_weight[rows] = weight
+        atomic_num[rows] = num
+
+    # Kothari eq. 25
+    radius_maximizing_mass = 1.04 * 10 ** -3 * \
+        (atomic_num ** 3 / atomic_weight ** 2)
+    # Kothari eq. 26
+    maximum_radius = 1.12 * 10 ** 10 * \
+        (atomic_num ** (2/3) / atomic_num) / CM_PER_KM
+
+    # Kothari eq. 26'
+    mass_ratio = mass / radius_maximizing_mass
+    return maximum_radius * 2 * mass_ratio ** (1/3) / (1 + mass_ratio ** (2/3))
+
+
+def empirical_density(mass, orb_radius, r_ecosphere, gas_giant):
+    """enviroment.empirical_density, in g/cm^3."""
+    temp = (np.sqrt(mass * EARTH_MASSES_PER_SOLAR_MASS) * r_ecosphere
+            / orb_radius) ** (1/4)
+    return temp * np.where(gas_giant, 1.2, 5.5)
+
+
+def volume_radius(mass, density):
+    """enviroment.volume_radius; radius in km."""
+    volume = mass * SOLAR_MASS_KG * 1000 / density  # cm^3
+    return (volume / ((4/3) * np.pi)) ** (1/3) / CM_PER_KM
+
+
+def volume_density(mass, equat_radius):
+    """enviroment.volume_density, in g/cm^3."""
+    volume = (4 / 3) * np.pi * (equat_radius * CM_PER_KM) ** 3
+    return mass * SOLAR_MASS_KG * 1000 / volume
+
+
+def period(separation, small_mass, large_mass):
+    """enviroment.period, in days. Masses in solar masses."""
+    small_mass, large_mass = (np.minimum(small_mass, large_mass),
+                              np.maximum(small_mass, large_mass))
+    reduced_mass = np.where(
+        small_mass == 0, large_mass,
+        small_mass * large_mass / (small_mass + large_mass))
+    seconds = 2 * np.pi * np.sqrt(
+        (separation * AU_KM * 1000) ** 3 / (reduced_mass * SOLAR_MASS_KG) / G)
+    return seconds / SECONDS_PER_DAY
+
+
+def escape_vel(mass, radius):
+    """enviroment.escape_vel, in m/s."""
+    return np.sqrt(2 * G * mass * SOLAR_MASS_KG / (radius * 1000))
+
+
+def rms_vel(molecular_weight, exospheric_temp):
+    """enviroment.rms_vel, in m/s."""
+    return np.sqrt(3 * MOLAR_GAS_CONST_SI * exospheric_temp / molecular_weight)
+
+
+def acceleration(mass, radius):
+    """enviroment.acceleration, in m/s^2."""
+    return G * mass * SOLAR_MASS_KG / (radius * 1000) ** 2
+
+
+def gas_life(molecular_weight, exospheric_temp, radius, surf_grav):
+    """enviroment.gas_life, in years (inf past MAX_GAS_LIFE)."""
+    v = rms_vel(molecular_weight, exospheric_temp)
+    radius = radius * 1000
+    with np.errstate(over='ignore'):
+        t = v ** 3 / (2 * radius * surf_grav ** 2) * \
+            np.exp(3 * radius * surf_grav / v ** 2) / SECONDS_PER_YEAR
+    return np.where(t > MAX_GAS_LIFE, np.inf, t)
+
+
+def min_molec_weight(radius, surf_grav, exospheric_temp, age):
+    """enviroment.min_molec_weight, in kg/mol.
+
+    The same closed form solve as enviroment.retention_threshold, with every
+    row's Newton iteration run in lock step.
+    """
+    radius, surf_grav, exospheric_temp, age = np.broadcast_arrays(
+        radius * 1000., surf_grav, exospheric_temp, age * SECONDS_PER_YEAR)
+    k = radius * surf_grav / (MOLAR_GAS_CONST_SI * exospheric_temp)
+    excess = np.log(age) - (1.5 * np.log(3 * radius * surf_grav)
+                            - np.log(2 * radius * surf_grav ** 2))
+
+    def residual(u):
+        return u - 1.5 * np.log(u) - excess
+
+    # If the planet can retain free hydrogen, it can retain any gas.
+    retains_all = residual(k * H_WEIGHT) >= 0
+
+    u = np.maximum.reduce([np.full(k.shape, 3.0), k * H_WEIGHT, 2 * excess])
+    low = residual(u) <= 0
+    while low.any():
+        u[low] *= 2
+        low = residual(u) <= 0
+    for _ in range(50):
+        step = residual(u) / (1 - 1.5 / u)
+        u -= step
+        if np.all(step <= 1e-14 * u):
+            break
+    return np.where(retains_all, H_WEIGHT, u / k)
+
+
+def vol_inventory(mass, escape_vel, rms_vel, stellar_mass, zone,
+                  greenhouse_effect, accreted_gas):
+    """enviroment.vol_inventory; mass in solar masses."""
+    proportion = np.select(
+        [zone == ZONE_1, zone == ZONE_2, zone == ZONE_3],
+        [VOLATILE_PROPORTIONS[ZONE_1], VOLATILE_PROPORTIONS[ZONE_2],
+         VOLATILE_PROPORTIONS[ZONE_3]],
+        np.nan,
+    )
+    temp2 = proportion * mass * EARTH_MASSES_PER_SOLAR_MASS / stellar_mass
+    temp2 = np.where(greenhouse_effect | accreted_gas, temp2, temp2 / 140.0)
+    return np.where(escape_vel / rms_vel >= GAS_RETENTION_THRESHOLD, temp2, 0.0)
+
+
+def boiling_point(surf_pressure):
+    """enviroment.boiling_point, in K."""
+    with np.errstate(divide='ignore'):
+        return 1.0 / ((np.log(np.asarray(surf_pressure) / ATM_PER_BAR)
+                       / -5050.5) + (1.0 / 373.0))
+
+
+def eff_temp(ecosphere_radius, orb_radius, albedo):
+    """enviroment.eff_temp, in K."""
+    return EARTH_EFFECTIVE_TEMP_K * np.sqrt(ecosphere_radius / orb_radius) * (
+        (1.0 - albedo) / (1.0 - EARTH_ALBEDO)) ** (1/4)
+
+
+def est_temp(ecosphere_radius, orb_radius, albedo):
+    """enviroment.est_temp, in K."""
+    return EARTH_AVERAGE_TEMP_K * np.sqrt(ecosphere_radius / orb_radius) * (
+        (1.0 - albedo) / (1.0 - EARTH_ALBEDO)) ** (1/4)
+
+
+def grnhouse(r_ecosphere, orb_radius):
+    """enviroment.grnhouse."""
+    temp = eff_temp(r_ecosphere, orb_radius, GREENHOUSE_TRIGGER_ALBEDO)
+    return temp > FREEZING_POINT_OF_WATER_K
+
+
+# Optical depth by molecular weight band (g/mol), as in enviroment.opacity.
+OPACITY_WEIGHT_BANDS = [0, 10, 20, 30, 45, 100]
+OPACITY_BY_WEIGHT = [3.0, 2.34, 1.0, 0.15, 0.05]
+
+# Optical depth multipliers by surface pressure (atm), highest first.
+OPACITY_PRESSURE_STEPS = [70, 50, 30, 10, 5]
+OPACITY_BY_PRESSURE = [8.333, 6.666, 3.333, 2.0, 1.5]
+
+
+def opacity(molecular_weight, surf_pressure):
+    """enviroment.opacity.
+
+    Note the bands are in the same numbers as the scalar version, which
+    compares the weight against kg/mol.
+    """
+    molecular_weight = np.asarray(molecular_weight, dtype=float)
+    surf_pressure = np.asarray(surf_pressure, dtype=float)
+    band = np.searchsorted(OPACITY_WEIGHT_BANDS, molecular_weight,
+                           side='right') - 1
+    in_band = (band >= 0) & (band < len(OPACITY_BY_WEIGHT))
+    optical_depth = np.where(
+        in_band,
+        np.take(OPACITY_BY_WEIGHT, np.clip(band, 0, len(OPACITY_BY_WEIGHT) - 1)),
+        0.0,
+    )
+    return optical_depth * np.select(
+        [surf_pressure >= step for step in OPACITY_PRESSURE_STEPS],
+        OPACITY_BY_PRESSURE,
+        1.0,
+    )
+
+
+def green_rise(optical_depth, effective_temp, surf_pressure):
+    """enviroment.green_rise, in K."""
+    convection_factor = EARTH_CONVECTION_FACTOR * surf_pressure ** 0.4
+    rise = ((1.0 + 0.75 * optical_depth) ** (1/4) - 1.0) * \
+        effective_temp * convection_factor
+    return np.maximum(rise, 0.0)
+
+
+def lim(x):
+    return x / np.sqrt(np.sqrt(1 + x ** 4))
+
+
+def soft(v, max, min):  # pylint: disable=redefined-builtin
+    dv = v - min
+    dm = max - min
+    return (lim(2 * dv / dm - 1) + 1) / 2 * dm + min
+
+
+def set_temp_range(surf_pressure, surf_temp, day, axial_tilt, e):
+    """enviroment.set_temp_range.
+
+    Surface pressure in atm, day length in hours and axial tilt in degrees.
+    Returns the (high, low, max, min) temperatures, in K.
+    """
+    surf_press = surf_pressure / ATM_PER_BAR
+
+    pressmod = 1 / np.sqrt(1 + 20 * surf_press)
+    ppmod = 1 / np.sqrt(10 + 5 * surf_press)
+
+    tiltmod = np.abs(np.cos(np.radians(axial_tilt)) * (1 + e) ** 2)
+    daymod = 1 / (200 / day + 1)
+    mh = (1 + daymod) ** pressmod
+    ml = (1 - daymod) ** pressmod
+    hi = mh * surf_temp
+    lo = ml * surf_temp
+    sh = hi + ((100 + hi) * tiltmod) ** np.sqrt(ppmod)
+    wl = lo - ((150 + lo) * tiltmod) ** np.sqrt(ppmod)
+    max_ = surf_temp + np.sqrt(surf_temp) * 10
+    min_ = surf_temp / np.sqrt(day + 24)
+
+    lo = np.maximum(lo, min_)
+    wl = np.maximum(wl, 0)
+
+    return (soft(hi, max_, min_), soft(lo, max_, min_),
+            soft(sh, max_, min_), soft(wl, max_, min_))
+
+
+def day_length(mass, radius, density, orb_period, a, e, giant,
+               stellar_mass_ratio, age):
+    """enviroment.day_length, in hours, and whether each is resonant."""
+    year_length = orb_period * SECONDS_PER_DAY / SECONDS_PER_HOUR
+    k2 = np.where(giant, 0.24, 0.33)
+
+    mass_g = mass * SOLAR_MASS_KG * 1000
+    radius_cm = radius * CM_PER_KM
+    base_angular_velocity = np.sqrt(2.0 * J_CGS * mass_g / (k2 * radius_cm ** 2))
+
+    change_in_angular_velocity = EARTH_SPIN_DOWN \
+        * (density / EARTH_DENSITY_CGS) \
+        * (radius / EARTH_RADIUS_KM) \
+        / (mass * EARTH_MASSES_PER_SOLAR_MASS) \
+        * (stellar_mass_ratio ** 2) \
+        / (a ** 6)
+
+    ang_velocity = base_angular_velocity + change_in_angular_velocity * age
+    stopped = ang_velocity <= 0
+    with np.errstate(divide='ignore'):
+        day = np.where(
+            stopped, np.inf,
+            RADIANS_PER_TURN / ang_velocity / SECONDS_PER_HOUR)
+
+    locked = (day >= year_length) | stopped
+    resonant = locked & (e > 0.1)
+    day = np.where(
+        locked,
+        np.where(resonant, (1.0 - e) / (1.0 + e), 1.0) * year_length,
+        day)
+    return day, resonant
+
+
+def planet_environments(star, table):
+    """Derive the environment of every protoplanet in `table` around `star`.
+
+    `table` maps column names to equal length arrays: `a`, `e`, `dust_mass`
+    and `gas_mass` are required, `zone` and `axial_tilt` (degrees, default 0)
+    are optional. This is the part of garnets.generate_planet before the
+    surface temperature iteration; the returned dict holds the input columns
+    plus every column that part derives:
+
+    mass, gas_mass (after hydrogen and helium loss), zone, giant,
+    orb_period, exospheric_temp, rms_velocity, core_radius, radius, density,
+    surf_accel, esc_velocity, molec_weight, day, resonant_period,
+    estimated_terr_temp, greenhouse_effect, volatile_gas_inventory,
+    surf_pressure and boil_point.
+
+    It also gives a first estimate of the surface temperature, the one
+    enviroment.calculate_surface_temp starts from (Earth albedo, plus the
+    greenhouse rise): surf_temp, high_temp, low_temp, max_temp and min_temp.
+    As in generate_planet, gas giants get inf for the surface pressure,
+    temperature, boiling point and inventory, and 0 for the temperature
+    range.
+    """
+    a = np.asarray(table['a'], dtype=float)
+    e = np.asarray(table['e'], dtype=float)
+    dust_mass = np.asarray(table['dust_mass'], dtype=float)
+    gas_mass = np.asarray(table['gas_mass'], dtype=float)
+    mass = dust_mass + gas_mass
+    axial_tilt = np.broadcast_to(
+        np.asarray(table.get('axial_tilt', 0.0), dtype=float), a.shape)
+
+    mass_ratio = star.mass_ratio
+    age = dimensionless_with_units(star.age, year)
+    r_ecosphere = dimensionless_with_units(star.r_ecosphere, au)
+
+    zone = table.get('zone')
+    if zone is None:
+        zone = orb_zone(star.luminosity_ratio, a)
+    zone = np.asarray(zone)
+
+    orb_period = period(a, mass, mass_ratio)
+    exospheric_temp = EARTH_EXOSPHERE_TEMP_K / ((a / r_ecosphere) ** 2)
+    rms_velocity = rms_vel(N2_WEIGHT, exospheric_temp)
+    core_radius = kothari_radius(dust_mass, False, zone)
+
+    # Calculate the radius as a gas giant, to verify it will retain gas.
+    density = empirical_density(mass, a, r_ecosphere, True)
+    radius = volume_radius(mass, density)
+    surf_accel = acceleration(mass, radius)
+    molec_weight = min_molec_weight(radius, surf_accel, exospheric_temp, age)
+
+    gas_fraction = gas_mass / mass
+    giant = ((mass * EARTH_MASSES_PER_SOLAR_MASS > 1)
+             & (gas_fraction > 0.05)
+             & (molec_weight <= HE_WEIGHT))
+    rocky = ~giant
+
+    # Rocky planets get their Kothari radius, and lose light gases.
+    rocky_radius = kothari_radius(mass, False, zone)
+    radius = np.where(rocky, rocky_radius, radius)
+    density = np.where(rocky, volume_density(mass, rocky_radius), density)
+    surf_accel = acceleration(mass, radius)
+
+    losing = rocky & (gas_fraction > 0.000001)
+    h2_mass = gas_mass * 0.85
+    he_mass = (gas_mass - h2_mass) * 0.999
+    h2_life = gas_life(H_WEIGHT, exospheric_temp, radius, surf_accel)
+    he_life = gas_life(HE_WEIGHT, exospheric_temp, radius, surf_accel)
+    with np.errstate(divide='ignore'):
+        h2_loss = np.where(losing & (h2_life < age),
+                           (1.0 - np.exp(-age / h2_life)) * h2_mass, 0.0)
+        he_loss = np.where(losing & (he_life < age),
+                           (1.0 - np.exp(-age / he_life)) * he_mass, 0.0)
+    gas_mass = gas_mass - h2_loss - he_loss
+    mass = mass - h2_loss - he_loss
+    surf_accel = acceleration(mass, radius)
+
+    day, resonant_period = day_length(mass, radius, density, orb_period, a, e,
+                                      giant, mass_ratio, age)
+    esc_velocity = escape_vel(mass, radius)
+    molec_weight = min_molec_weight(radius, surf_accel, exospheric_temp, age)
+
+    estimated_terr_temp = est_temp(r_ecosphere, a, EARTH_ALBEDO)
+    greenhouse_effect = rocky & grnhouse(r_ecosphere, a)
+    volatile_gas_inventory = np.where(
+        rocky,
+        vol_inventory(mass, esc_velocity, rms_velocity, mass_ratio, zone,
+                      greenhouse_effect, gas_fraction > 0.000001),
+        np.inf)
+    # generate_planet holds rocky surface pressures at 1 atm for now.
+    surf_pressure = np.where(rocky, 1.0, np.inf)
+    boil_point = np.where(
+        rocky,
+        np.where(surf_pressure == 0, 0.0, boiling_point(surf_pressure)),
+        np.inf)
+
+    effective_temp = eff_temp(r_ecosphere, a, EARTH_ALBEDO)
+    with np.errstate(invalid='ignore'):
+        surf_temp = effective_temp + green_rise(
+            opacity(molec_weight, surf_pressure), effective_temp,
+            surf_pressure)
+        high_temp, low_temp, max_temp, min_temp = set_temp_range(
+            surf_pressure, surf_temp, day, axial_tilt, e)
+    surf_temp = np.where(rocky, surf_temp, np.inf)
+
+    return {
+        'a': a,
+        'e': e,
+        'axial_tilt': axial_tilt,
+        'dust_mass': dust_mass,
+        'gas_mass': gas_mass,
+        'mass': mass,
+        'zone': zone,
+        'giant': giant,
+        'orb_period': orb_period,
+        'exospheric_temp': exospheric_temp,
+        'rms_velocity': rms_velocity,
+        'core_radius': core_radius,
+        'radius': radius,
+        'density': density,
+        'surf_accel': surf_accel,
+        'esc_velocity': esc_velocity,
+        'molec_weight': molec_weight,
+        'day': day,
+        'resonant_period': resonant_period,
+        'estimated_terr_temp': estimated_terr_temp,
+        'greenhouse_effect': greenhouse_effect,
+        'volatile_gas_inventory': volatile_gas_inventory,
+        'surf_pressure': surf_pressure,
+        'boil_point': boil_point,
+        'surf_temp': surf_temp,
+        'high_temp': np.where(rocky, high_temp, 0.0),
+        'low_temp': np.where(rocky, low_temp, 0.0),
+        'max_temp': np.where(rocky, max_temp, 0.0),
+        'min_temp': np.where(rocky, min_temp, 0.0),
+    }
+
+
+def protoplanet_table(protoplanets):
+    """The `planet_environments` input columns for a list of Protoplanets."""
+    return {
+        'a': np.array([dimensionless_with_units(p.orbit.a, au)
+                       for p in protoplanets], dtype=float),
+        'e': np.array([p.orbit.e for p in protoplanets], dtype=float),
+        'dust_mass': np.array([dimensionless_with_units(p.dust_mass,
+                                                        solar_mass)
+                               for p in protoplanets], dtype=float),
+        'gas_mass': np.array([dimensionless_with_units(p.gas_mass, solar_mass)
+                              for p in protoplanets], dtype=float),
+    }
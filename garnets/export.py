@@ -0,0 +1,226 @@
+"""
+Streaming export of generated systems, for building catalogs.
+
+Each system is flattened into plain records, one per star and one per planet
+or moon, that carry the seed the system came from. `NdjsonWriter` writes them
+as newline-delimited JSON and `ParquetWriter` as two Parquet files (stars and
+planets). Both write as they go, holding at most one row group in memory, so
+together with `garnets.iter_stellar_systems` a catalog of any size can be
+produced in constant memory:
+
+    with open('systems.ndjson', 'w') as stream:
+        export_systems(iter_stellar_systems(range(10**6)),
+                       [NdjsonWriter(stream)])
+
+Parquet output needs pyarrow, which is only imported when a ParquetWriter is
+created.
+"""
+
+import json
+import math
+
+from planet_table import COLUMNS
+from xatu.core import dimensionless_with_units
+from xatu.units import atm
+from xatu.units import au
+from xatu.units import year
+
+# The planet_table.COLUMNS fields that hold flags.
+BOOLEAN_FIELDS = {'resonant_period', 'greenhouse_effect'}
+
+# Record fields and their types. Planet records also carry every field in
+# planet_table.COLUMNS, as numbers in the units listed there.
+STAR_FIELDS = [
+    ('seed', 'seed'),
+    ('name', 'str'),
+    ('mass_ratio', 'float'),
+    ('age', 'float'),  # years
+    ('luminosity_ratio', 'float'),
+    ('r_ecosphere', 'float'),  # AU
+    ('planets', 'int'),
+]
+
+PLANET_FIELDS = [
+    ('seed', 'seed'),
+    ('planet', 'int'),  # index of the planet in its system
+    ('moon', 'int'),  # index of the moon around that planet, or None
+    ('type', 'str'),  # PlanetType name
+    ('orbit_zone', 'int'),
+    ('a', 'float'),  # AU; for moons, the distance from the planet
+    ('e', 'float'),
+] + [
+    (name, 'bool' if name in BOOLEAN_FIELDS
+     else {'d': 'float', 'b': 'int'}[typecode])
+    for name, _, typecode in COLUMNS
+] + [
+    ('atmosphere', 'atmosphere'),  # [{'gas': symbol, 'pressure': atm}, ...]
+]
+
+
+def star_record(seed, star):
+    return {
+        'seed': seed,
+        'name': star.name,
+        'mass_ratio': float(star.mass_ratio),
+        'age': dimensionless_with_units(star.age, year),
+        'luminosity_ratio': float(star.luminosity_ratio),
+        'r_ecosphere': dimensionless_with_units(star.r_ecosphere, au),
+        'planets': len(star.planets),
+    }
+
+
+def _planet_record(seed, planet, planet_index, moon_index):
+    record = {
+        'seed': seed,
+        'planet': planet_index,
+        'moon': moon_index,
+        'type': planet.type.name,
+        'orbit_zone': planet.orbit_zone.value if planet.orbit_zone else None,
+        'a': dimensionless_with_units(planet.orbit.a, au),
+        'e': float(planet.orbit.e),
+    }
+    for name, unit, _ in COLUMNS:
+        value = getattr(planet, name)
+        if unit is not None:
+            value = dimensionless_with_units(value, unit)
+        if name in BOOLEAN_FIELDS:
+            value = bool(value)
+        record[name] = value
+    if planet.atmosphere is None:
+        record['atmosphere'] = None
+    else:
+        record['atmosphere'] = [
+            {'gas': gas.symbol,
+             'pressure': dimensionless_with_units(pressure, atm)}
+            for gas, pressure in planet.atmosphere
+        ]
+    return record
+
+
+def planet_records(seed, star):
+    """One record per planet of `star`, each followed by its moons'."""
+    for planet_index, planet in enumerate(star.planets):
+        yield _planet_record(seed, planet, planet_index, None)
+        for moon_index, moon in enumerate(planet.moons):
+            yield _planet_record(seed, moon, planet_index, moon_index)
+
+
+def _finite(value):
+    # JSON has no infinities; gas giants' surface pressure and temperature
+    # are written as null.
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class NdjsonWriter:
+    """Writes each star and planet record as a line of compact JSON.
+
+    Star records have `"record": "star"` and planet records
+    `"record": "planet"`. The stream is not closed by `close()`.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def _write(self, kind, record):
+        line = {'record': kind}
+        line.update((name, _finite(value)) for name, value in record.items())
+        self.stream.write(json.dumps(line, separators=(',', ':')))
+        self.stream.write('\n')
+
+    def write_system(self, seed, star):
+        self._write('star', star_record(seed, star))
+        for record in planet_records(seed, star):
+            self._write('planet', record)
+
+    def close(self):
+        self.stream.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ParquetWriter:
+    """Writes star and planet records to two Parquet files.
+
+    Records are buffered and written a row group of `row_group_size` rows at
+    a time. Seeds are stored as strings, so int and str seeds can share a
+    file. Needs pyarrow.
+    """
+
+    def __init__(self, stars_path, planets_path, row_group_size=65536):
+        try:
+            import pyarrow  # pylint: disable=import-outside-toplevel
+            import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+        except ImportError as e:
+            raise ImportError(
+                "Parquet output needs pyarrow (pip install pyarrow)") from e
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.row_group_size = row_group_size
+        self._outputs = [
+            self._open(stars_path, STAR_FIELDS),
+            self._open(planets_path, PLANET_FIELDS),
+        ]
+
+    def _open(self, path, fields):
+        pa = self._pa
+        types = {
+            'seed': pa.string(),
+            'str': pa.string(),
+            'float': pa.float64(),
+            'int': pa.int64(),
+            'bool': pa.bool_(),
+            'atmosphere': pa.list_(pa.struct([('gas', pa.string()),
+                                              ('pressure', pa.float64())])),
+        }
+        schema = pa.schema([(name, types[kind]) for name, kind in fields])
+        return {'writer': self._pq.ParquetWriter(path, schema),
+                'schema': schema,
+                'rows': []}
+
+    def _add(self, output, record):
+        record['seed'] = str(record['seed'])
+        output['rows'].append(record)
+        if len(output['rows']) >= self.row_group_size:
+            self._flush(output)
+
+    def _flush(self, output):
+        if output['rows']:
+            output['writer'].write_table(self._pa.Table.from_pylist(
+                output['rows'], schema=output['schema']))
+            output['rows'] = []
+
+    def write_system(self, seed, star):
+        stars, planets = self._outputs
+        self._add(stars, star_record(seed, star))
+        for record in planet_records(seed, star):
+            self._add(planets, record)
+
+    def close(self):
+        for output in self._outputs:
+            self._flush(output)
+            output['writer'].close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_systems(systems, writers):
+    """Write every (seed, star) in `systems` to each writer, as it arrives.
+
+    Returns the number of systems written.
+    """
+    count = 0
+    for seed, star in systems:
+        for writer in writers:
+            writer.write_system(seed, star)
+        count += 1
+    return count
@@ -0,0 +1,338 @@
+"""
+Unit-free accretion engine.
+
+This mirrors `accrete.CircumstellarDisk` and the protoplanet bookkeeping in
+`garnets.generate_planetary_masses`, but works on plain floats in canonical
+units (AU for distances, solar masses for masses) so the hot loop never
+touches xatu quantities. Quantities are only converted when the finished
+protoplanets are handed back.
+"""
+
+# pylint: disable=too-few-public-methods
+
+import logging
+import random
+
+from math import exp
+from math import pi
+from math import sqrt
+
+from accrete import DustLanes
+from accrete import InjectionSampler
+from accrete import OrbitIndex
+from accrete import SweepCounter
+from accrete import record_accretion
+from accrete import sweep_until_converged
+from attr import attr
+from attr import attrs
+from constants import ALPHA
+from constants import B
+from constants import DISK_ECCENTRICITY
+from constants import DUST_DENSITY_COEFF
+from constants import GAS_DUST_RATIO
+from constants import PROTOPLANET_MASS
+from instrumentation import NULL_INSTRUMENTATION
+from stellar_system import Orbit
+from stellar_system import Protomoon
+from stellar_system import Protoplanet
+from xatu.core import dimensionless_with_units
+from xatu.units import au
+from xatu.units import earth_mass
+from xatu.units import solar_mass
+
+# Conversion factors, computed once at import.
+EARTH_MASS = dimensionless_with_units(1 * earth_mass, solar_mass)
+PROTOPLANET_MASS_RATIO = dimensionless_with_units(PROTOPLANET_MASS, solar_mass)
+
+logger = logging.getLogger(__name__)
+
+
+@attrs(slots=True)
+class FastDustLane:
+    inner: float = attr()  # AU
+    outer: float = attr()  # AU
+
+    dust_present: bool = attr()
+    gas_present: bool = attr()
+
+
+@attrs(slots=True)
+class FastPlanetoid:
+    a: float = attr()  # AU
+    e: float = attr()
+    dust_mass: float = attr()  # solar masses
+    gas_mass: float = attr()  # solar masses
+    moons: list = attr(factory=list)
+
+    @property
+    def mass(self):
+        return self.dust_mass + self.gas_mass
+
+    def reduced_mass(self, star_mass_ratio):
+        # See stellar_system.Planetoid.reduced_mass.
+        mass = self.mass
+        return (mass / (star_mass_ratio + mass))**0.25
+
+    @property
+    def inner_effect_limit(self):
+        return self.a * (1.0 - self.e) / (1.0 + DISK_ECCENTRICITY)
+
+    @property
+    def outer_effect_limit(self):
+        return self.a * (1.0 + self.e) / (1.0 - DISK_ECCENTRICITY)
+
+    @property
+    def periapsis(self):
+        return (1 - self.e) * self.a
+
+    @property
+    def apoapsis(self):
+        return (1 + self.e) * self.a
+
+    @property
+    def mass_of_moons(self):
+        return sum(moon.mass for moon in self.moons)
+
+    def critical_mass(self, sqrt_luminosity):
+        return B * (self.a * (1 - self.e) * sqrt_luminosity)**-0.75
+
+
+@attrs
+class FastCircumstellarDisk:
+    """Float counterpart of `accrete.CircumstellarDisk`."""
+
+    mass_ratio: float = attr()
+    luminosity_ratio: float = attr()
+    stellar_dust_limit: float = attr()  # AU
+    lanes = attr(default=None)
+    accelerate: bool = attr(default=False)
+    sweeps: SweepCounter = attr(factory=SweepCounter)
+
+    @classmethod
+    def for_star(cls, star, accelerate=False):
+        context = star.context
+        return cls(
+            mass_ratio=context.mass_ratio,
+            luminosity_ratio=context.luminosity_ratio,
+            stellar_dust_limit=dimensionless_with_units(
+                context.stellar_dust_limit, au),
+            accelerate=accelerate,
+        )
+
+    def __attrs_post_init__(self):
+        self.sqrt_luminosity = sqrt(self.luminosity_ratio)
+        self.sqrt_mass_ratio = sqrt(self.mass_ratio)
+        if self.lanes is None:
+            self.lanes = DustLanes([
+                FastDustLane(
+                    0.0,
+                    self.stellar_dust_limit,
+                    dust_present=True,
+                    gas_present=True,
+                )
+            ])
+
+    @property
+    def planet_inner_bound(self):
+        return 0.3 * (self.mass_ratio**(1/3))
+
+    @property
+    def planet_outer_bound(self):
+        return 50 * (self.mass_ratio**(1/3))
+
+    def dust_density(self, a):
+        return (
+            DUST_DENSITY_COEFF
+            * self.sqrt_mass_ratio
+            * exp(-ALPHA * (a**(1/3)))
+        )
+
+    @property
+    def dust_left(self):
+        return self.lanes.dust_left
+
+    def dust_available(self, inner, outer):
+        return self.lanes.dust_at_either_edge(inner, outer)
+
+    def collect_dust(self, planetoid):
+        a = planetoid.a
+        e = planetoid.e
+        mass = planetoid.mass
+        critical_mass = planetoid.critical_mass(self.sqrt_luminosity)
+        inner_effect_limit = planetoid.inner_effect_limit
+        outer_effect_limit = planetoid.outer_effect_limit
+        bandwidth = outer_effect_limit - inner_effect_limit
+        sweep_area = 4 * pi * (a ** 2) * planetoid.reduced_mass(
+            self.mass_ratio)
+
+        new_dust_mass = 0.0
+        new_gas_mass = 0.0
+        for lane in self.lanes.overlapping(inner_effect_limit,
+                                           outer_effect_limit):
+            if not lane.dust_present:
+                # Nothing left to sweep up in this lane.
+                continue
+
+            dust_density = self.dust_density(a)
+            if mass < critical_mass or not lane.gas_present:
+                gas_density = 0.0
+            else:
+                gas_density = (GAS_DUST_RATIO - 1) * dust_density / (
+                    1 + sqrt(critical_mass / mass) * (GAS_DUST_RATIO - 1))
+
+            width = min(lane.outer, outer_effect_limit) - \
+                max(lane.inner, inner_effect_limit)
+
+            temp1 = max(outer_effect_limit - lane.outer, 0.0)
+            temp2 = max(lane.inner - inner_effect_limit, 0.0)
+
+            volume = sweep_area * \
+                (1 - e * (temp1 - temp2) / bandwidth) * width
+
+            new_dust_mass += volume * dust_density
+            new_gas_mass += volume * gas_density
+        return new_dust_mass, new_gas_mass
+
+    def update_dust_lanes(self, planetoid):
+        gas = not planetoid.mass > planetoid.critical_mass(
+            self.sqrt_luminosity)
+        self.lanes.sweep(planetoid.inner_effect_limit,
+                         planetoid.outer_effect_limit,
+                         gas)
+
+    def accrete_dust(self, planetoid):
+        sweep_until_converged(self, planetoid, self.sweeps, self.accelerate)
+        self.update_dust_lanes(planetoid)
+
+    def reach(self, planetoid):
+        return reach(planetoid, self.mass_ratio)
+
+
+def reach(planetoid, star_mass_ratio=1.0):
+    """Float counterpart of `garnets.planetoid_reach`."""
+    reduced_mass = planetoid.reduced_mass(star_mass_ratio)
+    return (planetoid.a,
+            planetoid.periapsis * (1 - reduced_mass),
+            planetoid.apoapsis * (1 + reduced_mass))
+
+
+def coalesce_planetesimals(disk, planets, canidate, do_moons,
+                           instrumentation=NULL_INSTRUMENTATION):
+    """Float counterpart of `garnets.coalesce_planetesimals`."""
+    index = planets.first_overlap(*disk.reach(canidate))
+    if index is None:
+        planets.add(canidate)
+        instrumentation.count('protoplanets')
+        return
+
+    planet = planets[index]
+    a = (planet.mass + canidate.mass) / \
+        ((planet.mass / planet.a) + (canidate.mass / canidate.a))
+
+    temp = planet.mass * sqrt(planet.a) * sqrt(1 - (planet.e**2))
+    temp = temp + (canidate.mass * sqrt(canidate.a) *
+                   sqrt(sqrt(1 - (canidate.e**2))))
+    temp = temp / ((planet.mass + canidate.mass) * sqrt(canidate.a))
+    temp = 1 - (temp**2)
+    if temp < 0 or temp >= 1:
+        temp = 0
+    e = sqrt(temp)
+
+    if do_moons:
+        if canidate.mass < canidate.critical_mass(disk.sqrt_luminosity):
+            if canidate.mass < 2.5 * EARTH_MASS \
+                    and canidate.mass > .0001 * EARTH_MASS \
+                    and planet.mass_of_moons < planet.mass * .05 \
+                    and planet.mass > canidate.mass:
+                planet.moons.append(canidate)
+                instrumentation.count('moon_captures')
+                logger.debug("Moon captured at %f AU.", planet.a)
+                return
+
+    instrumentation.count('coalescences')
+    planet.a = a
+    planet.e = e
+    planet.dust_mass = planet.dust_mass + canidate.dust_mass
+    planet.gas_mass = planet.gas_mass + canidate.gas_mass
+
+    disk.accrete_dust(planet)
+    planets.moved(index)
+
+
+def to_protoplanet(planetoid, star):
+    """Convert a float planetoid back into a `Protoplanet` with units."""
+    protoplanet = Protoplanet(
+        star=star,
+        orbit=Orbit(a=planetoid.a * au, e=planetoid.e),
+        dust_mass=planetoid.dust_mass * solar_mass,
+        gas_mass=planetoid.gas_mass * solar_mass,
+    )
+    for moon in planetoid.moons:
+        protoplanet.add_moon(
+            Protomoon(
+                protoplanet=protoplanet,
+                orbit=Orbit(a=None, e=None),
+                dust_mass=moon.dust_mass * solar_mass,
+                gas_mass=moon.gas_mass * solar_mass,
+            )
+        )
+    return protoplanet
+
+
+def generate_planetary_masses(star, inner_dust, outer_dust, do_moons=True,
+                              accelerate=False, rng=random,
+                              targeted_injection=False, injections=None,
+                              instrumentation=NULL_INSTRUMENTATION):
+    """Drop-in replacement for `garnets.generate_planetary_masses`.
+
+    Consumes the random stream in exactly the same order as the reference
+    implementation, so both produce the same protoplanets for a given seed.
+    """
+    disk = FastCircumstellarDisk.for_star(star, accelerate=accelerate)
+
+    planets = OrbitIndex(disk.reach)
+
+    sampler = InjectionSampler(disk.lanes, disk.planet_inner_bound,
+                               disk.planet_outer_bound,
+                               targeted=targeted_injection)
+
+    # As in garnets.generate_planetary_masses, the per-planetesimal stages
+    # are only entered when something is listening.
+    timed = instrumentation.enabled
+    while disk.dust_left:
+        if timed:
+            with instrumentation.stage('injection'):
+                orbit = sampler.draw(rng)
+        else:
+            orbit = sampler.draw(rng)
+        if orbit is None:
+            break
+        canidate = FastPlanetoid(
+            a=orbit[0],
+            e=orbit[1],
+            dust_mass=PROTOPLANET_MASS_RATIO,
+            gas_mass=0.0,
+        )
+
+        if timed:
+            with instrumentation.stage('accrete_dust') as span:
+                sweeps = disk.sweeps.sweeps
+                disk.accrete_dust(canidate)
+                span.annotate(a=canidate.a,
+                              sweeps=disk.sweeps.sweeps - sweeps)
+        else:
+            disk.accrete_dust(canidate)
+
+        if canidate.mass > PROTOPLANET_MASS_RATIO:
+            if timed:
+                with instrumentation.stage('coalescence'):
+                    coalesce_planetesimals(disk, planets, canidate,
+                                           do_moons, instrumentation)
+            else:
+                coalesce_planetesimals(disk, planets, canidate, do_moons,
+                                       instrumentation)
+
+    if injections is not None:
+        injections.update(sampler.counter)
+    record_accretion(instrumentation, sampler.counter, disk.sweeps)
+    return [to_protoplanet(planet, star) for planet in planets]
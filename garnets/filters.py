@@ -0,0 +1,255 @@
+"""
+System filters, after StarGen's -H, -2, -E and Jovian habitable flags.
+
+A `SystemFilter` pairs the full test for a generated system (`accept`) with a
+cheap test (`prefilter`) that `garnets.generate_stellar_system` runs on the
+protoplanets as soon as accretion is done. A system that fails the prefilter
+is dropped before its planets' temperatures, atmospheres and moons are worked
+out, which is where most of the time goes. A prefilter must therefore only
+reject systems that `accept` would reject too.
+
+Following StarGen's notion that living worlds orbit within the star's
+ecosphere (`Star.min_r_ecosphere` to `Star.max_r_ecosphere`), the habitable
+and earth-like filters only accept planets there, and moons of planets
+there, which is what lets their prefilters look at the ecosphere alone.
+
+`FilterStats` counts what was rejected where, and estimates the time the
+prefilter saved.
+"""
+
+from attr import attr
+from attr import attrs
+from constants import EARTH_ALBEDO
+from constants import EARTH_AVERAGE_TEMP
+from constants import EARTH_RADIUS
+from constants import FREEZING_POINT_OF_WATER
+from constants import GRAV_CONSTANT
+from enviroment import BreathabilityPhrase
+from enviroment import PlanetType
+from enviroment import acceleration
+from enviroment import breathability
+from enviroment import est_temp
+from enviroment import kothari_radius
+from enviroment import orb_zone
+from xatu.core import dimensionless_with_units
+from xatu.units import K
+from xatu.units import atm
+from xatu.units import earth_mass
+from xatu.units import hour
+from xatu.units import year
+
+EARTH_GRAVITY = GRAV_CONSTANT * earth_mass / EARTH_RADIUS ** 2
+
+GIANT_TYPES = (PlanetType.GAS_GIANT, PlanetType.SUB_GAS_GIANT,
+               PlanetType.SUB_SUB_GAS_GIANT)
+
+
+# Full tests, on generated planets.
+
+
+def is_habitable(planet):
+    """StarGen's test for a habitable world.
+
+    Its air is breathable, and its day is not locked to its year.
+    """
+    return (breathability(planet) == BreathabilityPhrase.BREATHABLE
+            and not planet.resonant_period
+            and int(dimensionless_with_units(planet.day, hour))
+            != int(dimensionless_with_units(planet.orb_period, hour)))
+
+
+def is_earthlike(planet):
+    """StarGen's test for an earth-like world.
+
+    Earth's gravity, temperature and pressure give or take a little, mostly
+    ice-free with some ocean and cloud, and breathable air.
+    """
+    gravity = planet.surf_grav / EARTH_GRAVITY
+    relative_temp = dimensionless_with_units(
+        planet.surf_temp - EARTH_AVERAGE_TEMP, K)
+    pressure = dimensionless_with_units(planet.surf_pressure, atm)
+    return (0.8 <= gravity <= 1.2
+            and -2.0 <= relative_temp <= 3.0
+            and planet.ice_cover <= 0.1
+            and 0.5 <= pressure <= 2.0
+            and 0.4 <= planet.cloud_cover <= 0.8
+            and 0.5 <= planet.hydrosphere <= 0.8
+            and planet.type != PlanetType.WATER
+            and breathability(planet) == BreathabilityPhrase.BREATHABLE)
+
+
+def is_habitable_jovian(planet):
+    """A gas giant at earth-like temperatures around a star over 2 Gyr old."""
+    return (planet.type in GIANT_TYPES
+            and FREEZING_POINT_OF_WATER <= planet.estimated_terr_temp
+            <= EARTH_AVERAGE_TEMP + 10 * K
+            and planet.sun.age > 2.0E9 * year)
+
+
+def in_ecosphere(star, a):
+    """Whether an orbit of semi-major axis `a` lies in `star`'s ecosphere."""
+    return star.min_r_ecosphere <= a <= star.max_r_ecosphere
+
+
+def _ecosphere_bodies(star, planets):
+    """The planets (or protoplanets) in the ecosphere, each followed by its
+    moons."""
+    for planet in planets:
+        if in_ecosphere(star, planet.orbit.a):
+            yield planet
+            yield from planet.moons
+
+
+def habitable_worlds(star):
+    """The planets in `star`'s ecosphere, and their moons, that pass
+    `is_habitable`."""
+    return [body for body in _ecosphere_bodies(star, star.planets)
+            if is_habitable(body)]
+
+
+# Prefilters, on the protoplanets of an accreted system.
+
+
+def may_be_habitable(star, protoplanets):
+    return any(True for _ in _ecosphere_bodies(star, protoplanets))
+
+
+def may_be_multi_habitable(star, protoplanets):
+    bodies = _ecosphere_bodies(star, protoplanets)
+    return next(bodies, None) is not None and next(bodies, None) is not None
+
+
+def max_rocky_gravity(star, a, mass):
+    """The most surface gravity a rocky body that accreted `mass` at `a` can
+    end up with.
+
+    A rocky planet keeps the radius it had before losing any gas, so its
+    final gravity can only fall from what its accreted mass gives.
+    """
+    zone = orb_zone(star.luminosity_ratio, a)
+    return acceleration(mass, kothari_radius(mass, False, zone))
+
+
+def may_be_earthlike(star, protoplanets):
+    for protoplanet in protoplanets:
+        if not in_ecosphere(star, protoplanet.orbit.a):
+            continue
+        for body in [protoplanet] + protoplanet.moons:
+            if max_rocky_gravity(star, protoplanet.orbit.a, body.mass) \
+                    >= 0.8 * EARTH_GRAVITY:
+                return True
+    return False
+
+
+def may_have_habitable_jovian(star, protoplanets):
+    if not star.age > 2.0E9 * year:
+        return False
+    return any(
+        FREEZING_POINT_OF_WATER
+        <= est_temp(star.r_ecosphere, protoplanet.orbit.a, EARTH_ALBEDO)
+        <= EARTH_AVERAGE_TEMP + 10 * K
+        for protoplanet in protoplanets)
+
+
+# Filters.
+
+
+def _no_prefilter(star, protoplanets):
+    return True
+
+
+@attrs(frozen=True)
+class SystemFilter:
+    """Which systems to keep, with a cheap test to reject most others early.
+
+    `accept(star)` decides on a generated system. `prefilter(star,
+    protoplanets)` is asked first, on the accreted protoplanets; it may pass
+    systems `accept` turns down, but must not turn down any `accept` would
+    pass. Both should be module level functions, so that filters can be sent
+    to worker processes.
+    """
+
+    name = attr()
+    accept = attr()
+    prefilter = attr(default=_no_prefilter)
+
+
+def _has_habitable(star):
+    return any(is_habitable(body)
+               for body in _ecosphere_bodies(star, star.planets))
+
+
+def _has_multi_habitable(star):
+    return len(habitable_worlds(star)) > 1
+
+
+def _has_earthlike(star):
+    return any(is_earthlike(body)
+               for body in _ecosphere_bodies(star, star.planets))
+
+
+def _has_habitable_jovian(star):
+    return any(is_habitable_jovian(planet) for planet in star.planets)
+
+
+HABITABLE = SystemFilter('habitable', _has_habitable, may_be_habitable)
+MULTI_HABITABLE = SystemFilter('multi-habitable', _has_multi_habitable,
+                               may_be_multi_habitable)
+EARTHLIKE = SystemFilter('earthlike', _has_earthlike, may_be_earthlike)
+JOVIAN_HABITABLE = SystemFilter('jovian-habitable', _has_habitable_jovian,
+                                may_have_habitable_jovian)
+
+
+# Statistics.
+
+
+@attrs
+class FilterStats:
+    """What a filter did to the systems it was shown.
+
+    Times are in seconds. `accretion_time` covers every system;
+    `generation_time` the rest of the work, for the systems that got past
+    the prefilter.
+    """
+
+    systems = attr(default=0)
+    rejected_early = attr(default=0)
+    rejected_late = attr(default=0)
+    accepted = attr(default=0)
+    accretion_time = attr(default=0.0)
+    generation_time = attr(default=0.0)
+
+    @property
+    def rejected(self):
+        return self.rejected_early + self.rejected_late
+
+    @property
+    def rejection_rate(self):
+        """The fraction of systems rejected, early or late."""
+        return self.rejected / self.systems if self.systems else 0.0
+
+    @property
+    def early_rejection_rate(self):
+        """The fraction of systems the prefilter rejected."""
+        return self.rejected_early / self.systems if self.systems else 0.0
+
+    @property
+    def time_saved(self):
+        """An estimate of the generation time the prefilter saved.
+
+        Each early rejection is taken to have saved the average generation
+        time of the systems that were generated in full.
+        """
+        generated = self.rejected_late + self.accepted
+        if not generated:
+            return 0.0
+        return self.rejected_early * self.generation_time / generated
+
+    def update(self, other):
+        """Add the counts and times of another FilterStats to these."""
+        self.systems += other.systems
+        self.rejected_early += other.rejected_early
+        self.rejected_late += other.rejected_late
+        self.accepted += other.accepted
+        self.accretion_time += other.accretion_time
+        self.generation_time += other.generation_time
@@ -1,7 +1,15 @@
+import inspect
 import logging
 import math
+import os
 import random
+import time
 
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from itertools import islice
 from math import exp
 from math import inf as INCREDIBLY_LARGE_NUMBER
 from math import log
@@ -11,14 +19,22 @@ from jinja2 import Environment
 from jinja2 import FileSystemLoader
 from jinja2 import select_autoescape
 
+import numpy as np
+
+import fast_accrete
+
+from accrete import DEFAULT_ACCRETION
 from accrete import CircumstellarDisk
+from accrete import InjectionSampler
+from accrete import OrbitIndex
+from accrete import record_accretion
+from atmosphere import planet_gas_amounts
 from chemtable import GASES
 from chemtable import lookup_gas
 from constants import ASTEROID_MASS_LIMIT
 from constants import EARTH_ALBEDO
 from constants import EARTH_AVERAGE_TEMP
 from constants import EARTH_EXOSPHERE_TEMP
-from constants import ECCENTRICITY_COEFF
 from constants import FREEZING_POINT_OF_WATER
 from constants import GAS_GIANT_ALBEDO
 from constants import PROTOPLANET_MASS
@@ -41,6 +57,8 @@ from enviroment import rms_vel
 from enviroment import vol_inventory
 from enviroment import volume_density
 from enviroment import volume_radius
+from filters import FilterStats
+from instrumentation import NULL_INSTRUMENTATION
 from stellar_system import Orbit
 from stellar_system import Planet
 from stellar_system import Planetesimal
@@ -64,80 +82,391 @@ from xatu.units import m
 from xatu.units import millibar
 from xatu.units import year
 
-logging.getLogger().setLevel(logging.INFO)
-
-VERBOSE = True  # TODO(woursler): Move to logging.
+# Accretion progress is logged at INFO and the per-planet readouts at DEBUG.
+# Messages whose arguments are costly to format are guarded by isEnabledFor,
+# so nothing is formatted unless someone is listening.
+logger = logging.getLogger(__name__)
 
 
-def random_star():  # TODO: Add seed?
+def random_star(rng=random, mass_ratio=1):
     # Sources
     # exoplanets.co/exoplanet-correlations/host-star-mass-distribution.html
     # en.wikipedia.org/wiki/Main_sequence#mediaviewer/File:HRDiagram.png
     # TODO: Code up generation.
-    age = random.randrange(1 * 10**9, 6 * 10**9) * year
-    return Star(age=age, mass_ratio=1)
-
-
-def generate_stellar_system(star, do_gases=True, do_moons=True):
-    protoplanets = generate_planetary_masses(star,
-                                             0.0,
-                                             star.stellar_dust_limit,
-                                             do_moons=do_moons)
-    star.planets = [
-        generate_planet(p, star, do_gases=do_gases, do_moons=do_moons)
-        for p in protoplanets
-        if p.mass > 0*kg
-    ]
+    age = rng.randrange(1 * 10**9, 6 * 10**9) * year
+    return Star(age=age, mass_ratio=mass_ratio)
+
+
+def generate_stellar_system(star, do_gases=True, do_moons=True,
+                            accretion=DEFAULT_ACCRETION, rng=random,
+                            surface_temp_solver=None, system_filter=None,
+                            filter_stats=None, lazy=False,
+                            instrumentation=NULL_INSTRUMENTATION):
+    '''Populate star.planets.
+
+    All randomness is drawn from `rng` (a random.Random, or the random module
+    itself by default), so passing random.Random(seed) makes the system
+    reproducible and independent of any other generation going on at the
+    same time. `surface_temp_solver` overrides enviroment.SURFACE_TEMP_SOLVER,
+    the fixed relaxation. enviroment.ADAPTIVE_SOLVER takes fewer iterations,
+    but can classify planets near a type boundary differently.
+
+    `accretion`, an accrete.AccretionOptions, chooses the accretion engine,
+    whether dust sweeps are extrapolated and whether planetesimals are only
+    drawn where they will find dust.
+
+    With a `system_filter` (see filters.py), returns None for systems it
+    rejects; its prefilter is run on the protoplanets before any planets are
+    generated. What it did is added to `filter_stats`, a FilterStats.
+
+    With `lazy`, star.planets holds LazyPlanets, which only work out
+    temperatures, atmospheres and moons when these are asked for.
+
+    Time spent in each stage, and counts of what was done, are reported to
+    `instrumentation` (see instrumentation.py).
+    '''
+    instrumentation.count('systems')
+    if system_filter is not None:
+        if filter_stats is None:
+            filter_stats = FilterStats()
+        filter_stats.systems += 1
+        started = time.perf_counter()
+
+    protoplanets = accrete_protoplanets(star, do_moons=do_moons,
+                                        accretion=accretion, rng=rng,
+                                        instrumentation=instrumentation)
+
+    if system_filter is not None:
+        accreted = time.perf_counter()
+        filter_stats.accretion_time += accreted - started
+        if not system_filter.prefilter(star, protoplanets):
+            filter_stats.rejected_early += 1
+            return None
+
+    populate_planets(star, protoplanets, do_gases=do_gases, do_moons=do_moons,
+                     rng=rng, surface_temp_solver=surface_temp_solver,
+                     lazy=lazy, instrumentation=instrumentation)
+
+    if system_filter is not None:
+        filter_stats.generation_time += time.perf_counter() - accreted
+        if not system_filter.accept(star):
+            filter_stats.rejected_late += 1
+            return None
+        filter_stats.accepted += 1
     return star
 
 
-# Create protoplanets.
-
-
-def random_planetesimal(disk):
-    a = random.uniform(disk.planet_inner_bound, disk.planet_outer_bound)
-    e = 1.0 - (random.uniform(0.0, 1.0)**ECCENTRICITY_COEFF)
-    if e > .99:
-        e = .99
-    return Planetesimal(
-        disk=disk,
-        orbit=Orbit(
-            a=a,
-            e=e,
-        ),
-        dust_mass=PROTOPLANET_MASS,
-        gas_mass=0,
-    )
-
-
-def generate_planetary_masses(star, inner_dust, outer_dust, do_moons=True):
-    disk = CircumstellarDisk(star)
+def accrete_protoplanets(star, do_moons=True, accretion=DEFAULT_ACCRETION,
+                         rng=random, instrumentation=NULL_INSTRUMENTATION):
+    """The first stage of generate_stellar_system: the protoplanets of
+    `star` that have mass, with their protomoons."""
+    if accretion.fast:
+        # Same protoplanets, but accreted on plain floats.
+        accrete = fast_accrete.generate_planetary_masses
+    else:
+        accrete = generate_planetary_masses
+    with instrumentation.stage('accretion'):
+        return [
+            p for p in accrete(star,
+                               0.0,
+                               star.stellar_dust_limit,
+                               do_moons=do_moons,
+                               accelerate=accretion.accelerate,
+                               rng=rng,
+                               targeted_injection=accretion.targeted_injection,
+                               instrumentation=instrumentation)
+            if p.mass > 0*kg
+        ]
+
+
+def populate_planets(star, protoplanets, do_gases=True, do_moons=True,
+                     rng=random, surface_temp_solver=None, lazy=False,
+                     instrumentation=NULL_INSTRUMENTATION):
+    """The second stage of generate_stellar_system: fill star.planets from
+    the protoplanets that accrete_protoplanets made."""
+    # Each planet draws from a generator of its own, so that a LazyPlanet
+    # becomes the same planet whenever it is looked at.
+    planet_seeds = [rng.getrandbits(64) for _ in protoplanets]
+    if lazy:
+        star.planets = [
+            LazyPlanet(p, star, seed, do_gases=do_gases, do_moons=do_moons,
+                       surface_temp_solver=surface_temp_solver,
+                       instrumentation=instrumentation)
+            for p, seed in zip(protoplanets, planet_seeds)
+        ]
+        return
 
     planets = []
+    with instrumentation.stage('planets'):
+        for index, (p, seed) in enumerate(zip(protoplanets, planet_seeds)):
+            with instrumentation.stage('planet', planet=index):
+                planets.append(generate_planet(
+                    p, star, do_gases=do_gases, do_moons=do_moons,
+                    rng=random.Random(seed),
+                    surface_temp_solver=surface_temp_solver,
+                    instrumentation=instrumentation))
+    star.planets = planets
+
+
+# The options of generate_stellar_system that change the system it makes,
+# with their defaults, which cache keys are made from.
+CACHE_KEY_OPTIONS = {
+    name: parameter.default
+    for name, parameter in inspect.signature(
+        generate_stellar_system).parameters.items()
+    if name not in ('star', 'rng', 'filter_stats', 'lazy', 'instrumentation')
+}
+
+
+# Batch generation.
+
+
+def generate_seeded_stellar_system(seed, star=None, mass_ratio=1, cache=None,
+                                   **kwargs):
+    """Generate the system for `seed`, around a random star unless given one.
+
+    Everything is drawn from a fresh random.Random(seed), so the result only
+    depends on the seed (and star), not on what was generated before it. A
+    random star has the given `mass_ratio`.
+
+    With a `cache` (a cache.SystemCache), a system generated before with the
+    same seed, star and options is loaded instead; `star` is then left as it
+    was, and `filter_stats` is not told about the system. Lazy systems are
+    worked out in full before they are stored.
+    """
+    instrumentation = kwargs.get('instrumentation', NULL_INSTRUMENTATION)
+    if cache is not None:
+        key = cache.key(seed, star, mass_ratio, {
+            name: kwargs.get(name, default)
+            for name, default in CACHE_KEY_OPTIONS.items()
+        })
+        hit, system = cache.lookup(key)
+        instrumentation.count('cache_hits' if hit else 'cache_misses')
+        if hit:
+            return system
+
+    with instrumentation.stage('system', seed=seed):
+        rng = random.Random(seed)
+        if star is None:
+            star = random_star(rng, mass_ratio)
+        system = generate_stellar_system(star, rng=rng, **kwargs)
+
+    if cache is not None:
+        if system is not None:
+            materialize_system(system)
+        cache.store(key, system)
+    return system
+
+
+def _generate_chunk(chunk, kwargs, instrumentation_class=None, cache=None):
+    stats = FilterStats()
+    if instrumentation_class is None:
+        instrumentation = NULL_INSTRUMENTATION
+    else:
+        instrumentation = instrumentation_class()
+    # A cache of its own, whose stats only count this chunk.
+    if cache is not None:
+        cache = cache.fork()
+    systems = [
+        (seed, generate_seeded_stellar_system(
+            seed, star, filter_stats=stats, instrumentation=instrumentation,
+            cache=cache, **kwargs))
+        for seed, star in chunk
+    ]
+    return systems, stats, instrumentation, cache and cache.stats
+
+
+def _initialize_worker():
+    """Runs once in each worker process, before it generates any systems."""
+    # Importing this module already loaded the gas table; touching it here
+    # makes sure that happens at pool start-up rather than in the first chunk.
+    len(GASES)
+
+
+def _chunks(iterable, chunksize):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def generate_stellar_systems(seeds, stars=None, workers=None, chunksize=1,
+                             ordered=True, filter_stats=None,
+                             instrumentation=None, cache=None, **kwargs):
+    """Generate one system per seed, fanned out over worker processes.
+
+    Yields (seed, system) pairs as they become available: in the order of
+    `seeds` if `ordered`, otherwise as soon as each chunk completes. Seeds are
+    sent to the workers `chunksize` at a time, and only a few chunks per
+    worker are in flight at once, so `seeds` may be a very long (or endless)
+    iterable. `stars`, if given, supplies the star for each seed.
+
+    Every system is generated by `generate_seeded_stellar_system`, so the
+    result for a seed is the same whatever `workers` and `chunksize` are.
+    With `workers=0` everything runs in this process. The remaining keyword
+    arguments are passed on to `generate_stellar_system`.
+
+    Systems rejected by a `system_filter` are not yielded. The workers'
+    FilterStats are added to `filter_stats`, if given, as their chunks come
+    in, and likewise their stage times and counters to `instrumentation`, an
+    instrumentation.Instrumentation (or Tracer). With a `cache` (see
+    `generate_seeded_stellar_system`), the workers' hits and misses are
+    added to its `stats`.
+    """
+    if instrumentation is None:
+        instrumentation_class = None
+    else:
+        instrumentation_class = type(instrumentation)
+    if stars is None:
+        items = ((seed, None) for seed in seeds)
+    else:
+        items = zip(seeds, stars)
+
+    if workers == 0:
+        for chunk in _chunks(items, chunksize):
+            yield from _emit(
+                [_generate_chunk(chunk, kwargs, instrumentation_class,
+                                 cache)],
+                filter_stats, instrumentation, cache)
+        return
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_initialize_worker) as executor:
+        pending = deque()
+        for chunk in _chunks(items, chunksize):
+            pending.append(executor.submit(_generate_chunk, chunk, kwargs,
+                                           instrumentation_class, cache))
+            if len(pending) >= 2 * workers:
+                yield from _emit(_collect(pending, ordered), filter_stats,
+                                 instrumentation, cache)
+        while pending:
+            yield from _emit(_collect(pending, ordered), filter_stats,
+                             instrumentation, cache)
+
+
+def iter_stellar_systems(seeds, workers=0, **kwargs):
+    """Lazily generate the system for each seed, yielding (seed, star).
+
+    `seeds` may be endless: each system is generated as it is asked for, in
+    seed order, and nothing is kept once it has been handed out, so memory
+    use does not grow with the number of systems. This is what the writers in
+    `export` consume. `workers` and the other keyword arguments are as for
+    `generate_stellar_systems`; by default everything runs in this process.
+    """
+    return generate_stellar_systems(seeds, workers=workers, **kwargs)
+
+
+def _collect(pending, ordered):
+    """Wait for the oldest chunk (or, if not `ordered`, any chunk)."""
+    if ordered:
+        return [pending.popleft().result()]
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    results = []
+    for future in done:
+        pending.remove(future)
+        results.append(future.result())
+    return results
+
+
+def _emit(results, filter_stats, instrumentation=None, cache=None):
+    """The systems of finished chunks, less those a filter rejected."""
+    for systems, stats, chunk_instrumentation, cache_stats in results:
+        if filter_stats is not None:
+            filter_stats.update(stats)
+        if instrumentation is not None:
+            instrumentation.update(chunk_instrumentation)
+        if cache is not None:
+            cache.stats.update(cache_stats)
+        for seed, system in systems:
+            if system is not None:
+                yield seed, system
+
 
-    sequential_failures = 0
+# Create protoplanets.
 
-    while disk.dust_left and sequential_failures < 10**3:
-        canidate = random_planetesimal(disk)
 
-        iel = canidate.inner_effect_limit
-        oel = canidate.outer_effect_limit
+def generate_planetary_masses(star, inner_dust, outer_dust, do_moons=True,
+                              accelerate=False, rng=random,
+                              targeted_injection=False, injections=None,
+                              instrumentation=NULL_INSTRUMENTATION):
+    """Accrete the protoplanets of `star`.
+
+    Planetesimals are injected at orbits drawn by an
+    `accrete.InjectionSampler`, targeted at the remaining dust with
+    `targeted_injection`. What it drew is added to `injections`, an
+    `accrete.InjectionCounter`, and reported to `instrumentation`.
+    """
+    disk = CircumstellarDisk(star, accelerate=accelerate)
+
+    planets = OrbitIndex(planetoid_reach)
+
+    sampler = InjectionSampler(disk.lanes, disk.planet_inner_bound,
+                               disk.planet_outer_bound,
+                               targeted=targeted_injection)
+
+    # The stages below run once per planetesimal, so they are only entered
+    # when something is listening.
+    timed = instrumentation.enabled
+    while disk.dust_left:
+        if timed:
+            with instrumentation.stage('injection'):
+                orbit = sampler.draw(rng)
+        else:
+            orbit = sampler.draw(rng)
+        if orbit is None:
+            break
+        a, e = orbit
+        canidate = Planetesimal(
+            disk=disk,
+            orbit=Orbit(
+                a=a,
+                e=e,
+            ),
+            dust_mass=PROTOPLANET_MASS,
+            gas_mass=0,
+        )
 
-        if disk.dust_available(iel, oel) > 0:
-            sequential_failures = 0
-            logging.info("Injecting planetesimal at %s..." %
-                         quantity_repr(canidate.orbit.a, au))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Injecting planetesimal at %s...",
+                        quantity_repr(canidate.orbit.a, au))
 
+        if timed:
+            with instrumentation.stage('accrete_dust') as span:
+                sweeps = disk.sweeps.sweeps
+                disk.accrete_dust(canidate)
+                span.annotate(a=canidate.orbit.a,
+                              sweeps=disk.sweeps.sweeps - sweeps)
+        else:
             disk.accrete_dust(canidate)
 
-            if canidate.mass > PROTOPLANET_MASS:
-                coalesce_planetesimals(disk, planets, canidate, do_moons)
-                logging.info("\tsuccess.")
+        if canidate.mass > PROTOPLANET_MASS:
+            if timed:
+                with instrumentation.stage('coalescence'):
+                    coalesce_planetesimals(disk, planets, canidate,
+                                           do_moons, instrumentation)
             else:
-                logging.info("\tfailed due to large neighbor.")
+                coalesce_planetesimals(disk, planets, canidate, do_moons,
+                                       instrumentation)
+            logger.info("\tsuccess.")
         else:
-            sequential_failures += 1
-    return planets
+            logger.info("\tfailed due to large neighbor.")
+
+    if injections is not None:
+        injections.update(sampler.counter)
+    record_accretion(instrumentation, sampler.counter, disk.sweeps)
+    return list(planets)
+
+
+def planetoid_reach(planetoid):
+    """The semi-major axis, and how far in and out a planetoid reaches."""
+    reduced_mass = planetoid.reduced_mass
+    return (planetoid.orbit.a,
+            planetoid.orbit.periapsis * (1 - reduced_mass),
+            planetoid.orbit.apoapsis * (1 + reduced_mass))
 
 
 def convert_planetesimal_to_protoplanet(planetesimal):
@@ -148,7 +477,7 @@ def convert_planetesimal_to_protoplanet(planetesimal):
 
 
 def convert_planetesimal_to_protomoon(planetesimal, planet):
-    print("Capturing a protomoon.")
+    logger.debug("Capturing a protomoon.")
     return Protomoon(
         protoplanet=planet,
         orbit=Orbit(
@@ -160,179 +489,176 @@ def convert_planetesimal_to_protomoon(planetesimal, planet):
     )
 
 
-def coalesce_planetesimals(disk, planets, canidate, do_moons):
-    finished = False
-
-    # First we try to find an existing planet with an over-lapping orbit.
-    for planet in planets:
-        print("Out of order", planet, canidate)
+def coalesce_planetesimals(disk, planets, canidate, do_moons,
+                           instrumentation=NULL_INSTRUMENTATION):
+    # As in StarGen, the innermost planet with an over-lapping orbit takes
+    # the candidate, as a moon or in a collision; only if there is none does
+    # the candidate become a planet itself. `planets` is an OrbitIndex.
+    index = planets.first_overlap(*planetoid_reach(canidate))
 
-        diff = planet.orbit.a - canidate.orbit.a
+    if index is None:
+        # TODO: Extra info.
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("New Protoplanet at %s.",
+                        quantity_repr(canidate.orbit.a, au))
+        planets.add(convert_planetesimal_to_protoplanet(canidate))
+        instrumentation.count('protoplanets')
+        return
+
+    planet = planets[index]
+
+    # Figure out the new orbit.
+    a = (planet.mass + canidate.mass) / \
+        ((planet.mass / planet.orbit.a) +
+         (canidate.mass / canidate.orbit.a))
+
+    temp = planet.mass * sqrt(
+        planet.orbit.a) * sqrt(1 - (planet.orbit.e**2))
+    temp = temp + (canidate.mass * sqrt(canidate.orbit.a) *
+                   sqrt(sqrt(1 - (canidate.orbit.e**2))))
+    temp = temp / (
+        (planet.mass + canidate.mass) * sqrt(canidate.orbit.a))
+    temp = 1 - (temp**2)
+    if temp < 0 or temp >= 1:
+        temp = 0
+    e = sqrt(temp)
+
+    if do_moons:
+        if canidate.mass < canidate.critical_mass:
+            if canidate.mass < 2.5 * earth_mass \
+                    and canidate.mass > .0001 * earth_mass \
+                    and planet.mass_of_moons < planet.mass * .05 \
+                    and planet.mass > canidate.mass:
+                # TODO: Remove planet.mass > canidate.mass distinction, just switch the canidate and planet!
+                planet.add_moon(
+                    convert_planetesimal_to_protomoon(
+                        canidate, planet))
+                instrumentation.count('moon_captures')
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(
+                        "Moon captured at %s. Planet Mass: %s, Moon mass: %s.",
+                        quantity_repr(planet.orbit.a, au),
+                        mass_repr(planet.mass),
+                        mass_repr(canidate.mass),
+                    )
+                return
+            else:
+                # TODO: Reasons.
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(
+                        "Did not capture potential moon at %s. Collision imminent.",
+                        quantity_repr(planet.orbit.a, au),
+                    )
 
-        if diff > 0 * m:
-            dist1 = canidate.orbit.apoapsis * \
-                (1 + canidate.reduced_mass) - canidate.orbit.a
-            # x aphelion
-            dist2 = planet.orbit.a - (planet.orbit.periapsis *
-                                      (1 - planet.reduced_mass))
-        else:
-            dist1 = canidate.orbit.a - (canidate.orbit.periapsis *
-                                        (1 - canidate.reduced_mass))
-            # x perihelion
-            dist2 = (planet.orbit.apoapsis *
-                     (1 + planet.reduced_mass)) - planet.orbit.a
-
-        if abs(diff) <= abs(dist1) or abs(diff) <= abs(dist2):
-            # Figure out the new orbit.
-            a = (planet.mass + canidate.mass) / \
-                ((planet.mass / planet.orbit.a) +
-                 (canidate.mass / canidate.orbit.a))
-
-            temp = planet.mass * sqrt(
-                planet.orbit.a) * sqrt(1 - (planet.orbit.e**2))
-            temp = temp + (canidate.mass * sqrt(canidate.orbit.a) *
-                           sqrt(sqrt(1 - (canidate.orbit.e**2))))
-            temp = temp / (
-                (planet.mass + canidate.mass) * sqrt(canidate.orbit.a))
-            temp = 1 - (temp**2)
-            if temp < 0 or temp >= 1:
-                temp = 0
-            e = sqrt(temp)
-
-            if do_moons:
-                if canidate.mass < canidate.critical_mass:
-                    if canidate.mass < 2.5 * earth_mass \
-                            and canidate.mass > .0001 * earth_mass \
-                            and planet.mass_of_moons < planet.mass * .05 \
-                            and planet.mass > canidate.mass:
-                        # TODO: Remove planet.mass > canidate.mass distinction, just switch the canidate and planet!
-                        planet.add_moon(
-                            convert_planetesimal_to_protomoon(
-                                canidate, planet))
-                        logging.info(
-                            "Moon captured at %s. Planet Mass: %s, Moon mass: %s." % (
-                                quantity_repr(planet.orbit.a, au),
-                                mass_repr(planet.mass),
-                                mass_repr(canidate.mass)
-                            )
-                        )
-                        finished = True
-                        break
-                    else:
-                        # TODO: Reasons.
-                        logging.info(
-                            "Did not capture potential moon at %s. Collision imminent." % quantity_repr(
-                                planet.orbit.a, au)
-                        )
+    logger.info(
+        "Collision between two planetesimals! Computing new orbit and accumulating additional mass."
+    )
 
-            logging.info(
-                "Collision between two planetesimals! Computing new orbit and accumulating additional mass."
-            )
+    instrumentation.count('coalescences')
+    planet.orbit = Orbit(a=a, e=e)
+    planet.dust_mass = planet.dust_mass + canidate.dust_mass  # + new_dust
+    planet.gas_mass = planet.gas_mass + canidate.gas_mass  # + new_gas
 
-            planet.orbit = Orbit(a=a, e=e)
-            planet.dust_mass = planet.dust_mass + canidate.dust_mass  # + new_dust
-            planet.gas_mass = planet.gas_mass + canidate.gas_mass  # + new_gas
-            finished = True
+    # Accrete MORE DUST! TODO: Refactor to this, mark the planet as needing to re-accrete.
+    disk.accrete_dust(planet)
+    planets.moved(index)
 
-            # Accrete MORE DUST! TODO: Refactor to this, mark the planet as needing to re-accrete.
-            disk.accrete_dust(planet)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Conglomerate is now %s at %s.",
+                    mass_repr(planet.mass),
+                    quantity_repr(planet.orbit.a, au))
 
-            logging.info("Conglomerate is now %s at %s." % (
-                mass_repr(planet.mass),
-                quantity_repr(planet.orbit.a, au)
-            ))
 
-    if not finished:
-        # TODO: Extra info.
-        logging.info("New Protoplanet at %s." %
-                     quantity_repr(canidate.orbit.a, au))
-        planets.append(convert_planetesimal_to_protoplanet(canidate))
+def scalar_gas_amounts(star, planet):
+    '''Relative amount of each gas in the atmosphere, one gas at a time.
 
+    This is the direct port of StarGen's loop, kept as the reference for
+    `atmosphere.gas_amounts`, which calculate_gases uses.
+    '''
+    amount = [0 for _ in range(len(GASES))]
+    pressure = dimensionless_with_units(planet.surf_pressure, bar)
 
-def calculate_gases(star, planet, planet_id):
-    if planet.surf_pressure > 0 * atm:
+    for i in range(len(GASES)):
 
-        amount = [0 for _ in range(len(GASES))]
-        totamount = 0
-        pressure = dimensionless_with_units(planet.surf_pressure, bar)
-        n = 0
+        # TODO(woursler): WTH is this?
+        yp = GASES[i].boil / \
+            (373. * ((log((pressure) + 0.001) / -5050.5) + (1.0 / 373.)))
 
-        for i in range(len(GASES)):
+        if ((yp >= 0*K and yp < planet.low_temp)
+                and (GASES[i].weight >= planet.molec_weight)):
 
-            # TODO(woursler): WTH is this?
-            yp = GASES[i].boil / \
-                (373. * ((log((pressure) + 0.001) / -5050.5) + (1.0 / 373.)))
+            vrms = rms_vel(GASES[i].weight, planet.exospheric_temp)
+            pvrms = pow(1 / (1 + vrms / planet.esc_velocity),
+                        star.age / 1e9 / year)
+            abund = GASES[i].abunds  # GASES[i].abunde
+            react = 1.0
+            fract = 1.0
+            pres2 = 1.0
 
-            if ((yp >= 0*K and yp < planet.low_temp)
-                    and (GASES[i].weight >= planet.molec_weight)):
+            # These rules are tabulated as chemtable.REACTIVITY.
+            if GASES[i].symbol == "Ar":
+                react = .15 * star.age / 4e9 / year
 
-                vrms = rms_vel(GASES[i].weight, planet.exospheric_temp)
-                pvrms = pow(1 / (1 + vrms / planet.esc_velocity),
-                            star.age / 1e9 / year)
-                abund = GASES[i].abunds  # GASES[i].abunde
-                react = 1.0
-                fract = 1.0
-                pres2 = 1.0
+            elif GASES[i].symbol == "He":
 
-                # TODO(woursler): This needs to go in the chemtable somehow.
+                abund = abund * (0.001 + (planet.gas_mass / planet.mass))
+                pres2 = (0.75 + pressure)
+                react = pow(1 / (1 + GASES[i].reactivity),
+                            star.age / 2e9 / year * pres2)
 
-                if GASES[i].symbol == "Ar":
-                    react = .15 * star.age / 4e9 / year
+            elif (
+                    GASES[i].symbol == "O" or GASES[i].symbol == "O2"
+            ) and star.age > 2e9 * year and planet.surf_temp > 270 * K and planet.surf_temp < 400 * K:
+                pres2 = (0.89 + pressure / 4)
+                react = pow(1 / (1 + GASES[i].reactivity),
+                            pow(star.age / 2e9 / year, 0.25) * pres2)
 
-                elif GASES[i].symbol == "He":
+            elif GASES[
+                    i].symbol == "CO2" and star.age > 2e9 * year and planet.surf_temp > 270 * K and planet.surf_temp < 400 * K:
+                pres2 = (0.75 + pressure)
+                react = pow(1 / (1 + GASES[i].reactivity),
+                            pow(star.age / 2e9 / year, 0.5) * pres2)
+                react *= 1.5
 
-                    abund = abund * (0.001 + (planet.gas_mass / planet.mass))
-                    pres2 = (0.75 + pressure)
-                    react = pow(1 / (1 + GASES[i].reactivity),
-                                star.age / 2e9 / year * pres2)
+            else:
+                pres2 = 0.75 + pressure
+                react = pow(1 / (1 + GASES[i].reactivity),
+                            star.age / 2e9 / year * pres2)
+
+            fract = (1 - (planet.molec_weight / GASES[i].weight))
+
+            amount[i] = abund * pvrms * react * fract
+            '''if ((flag_verbose & 0x4000) and
+                (strcmp(GASES[i].symbol, "O") == 0 or
+                 strcmp(GASES[i].symbol, "N") == 0 or
+                 strcmp(GASES[i].symbol, "Ar") == 0 or
+                 strcmp(GASES[i].symbol, "He") == 0 or
+                 strcmp(GASES[i].symbol, "CO2") == 0))
+
+                fprintf (stderr, "%-5.2Lf %-3.3s, %-5.2Lf = a %-5.2Lf * p %-5.2Lf * r %-5.2Lf * p2 %-5.2Lf * f %-5.2Lf\t(%.3Lf%%)\n",
+                          planet.mass * SUN_MASS_IN_EARTH_MASSES,
+                          GASES[i].symbol,
+                          amount[i],
+                          abund,
+                          pvrms,
+                          react,
+                          pres2,
+                          fract,
+                          100.0 * (planet.gas_mass / planet.mass)
+                         )'''
 
-                elif (
-                        GASES[i].symbol == "O" or GASES[i].symbol == "O2"
-                ) and star.age > 2e9 * year and planet.surf_temp > 270 * K and planet.surf_temp < 400 * K:
-                    pres2 = (0.89 + pressure / 4)
-                    react = pow(1 / (1 + GASES[i].reactivity),
-                                pow(star.age / 2e9 / year, 0.25) * pres2)
+        else:
+            amount[i] = 0.0
 
-                elif GASES[
-                        i].symbol == "CO2" and star.age > 2e9 * year and planet.surf_temp > 270 * K and planet.surf_temp < 400 * K:
-                    pres2 = (0.75 + pressure)
-                    react = pow(1 / (1 + GASES[i].reactivity),
-                                pow(star.age / 2e9 / year, 0.5) * pres2)
-                    react *= 1.5
+    return amount
 
-                else:
-                    pres2 = 0.75 + pressure
-                    react = pow(1 / (1 + GASES[i].reactivity),
-                                star.age / 2e9 / year * pres2)
-
-                fract = (1 - (planet.molec_weight / GASES[i].weight))
-
-                amount[i] = abund * pvrms * react * fract
-                '''if ((flag_verbose & 0x4000) and
-                    (strcmp(GASES[i].symbol, "O") == 0 or
-                     strcmp(GASES[i].symbol, "N") == 0 or
-                     strcmp(GASES[i].symbol, "Ar") == 0 or
-                     strcmp(GASES[i].symbol, "He") == 0 or
-                     strcmp(GASES[i].symbol, "CO2") == 0))
-
-                    fprintf (stderr, "%-5.2Lf %-3.3s, %-5.2Lf = a %-5.2Lf * p %-5.2Lf * r %-5.2Lf * p2 %-5.2Lf * f %-5.2Lf\t(%.3Lf%%)\n",
-                              planet.mass * SUN_MASS_IN_EARTH_MASSES,
-                              GASES[i].symbol,
-                              amount[i],
-                              abund,
-                              pvrms,
-                              react,
-                              pres2,
-                              fract,
-                              100.0 * (planet.gas_mass / planet.mass)
-                             )'''
 
-                totamount += amount[i]
-                if (amount[i] > 0.0):
-                    n += 1
+def calculate_gases(star, planet, planet_id):
+    if planet.surf_pressure > 0 * atm:
 
-            else:
-                amount[i] = 0.0
+        amount = planet_gas_amounts(star, planet)
+        totamount = amount.sum()
+        n = int(np.count_nonzero(amount > 0.0))
 
         if n > 0:
 
@@ -346,7 +672,7 @@ def calculate_gases(star, planet, planet_id):
                     planet.atmosphere.append(
                         (
                             GASES[i],
-                            planet.surf_pressure * amount[i] / totamount,
+                            planet.surf_pressure * float(amount[i] / totamount),
                         )
                     )
 
@@ -394,7 +720,26 @@ def generate_planet(protoplanet,
                     planet_id=None,
                     do_gases=True,
                     do_moons=True,
-                    is_moon=False):
+                    is_moon=False,
+                    rng=random,
+                    surface_temp_solver=None,
+                    instrumentation=NULL_INSTRUMENTATION):
+    planet = generate_planet_bulk(protoplanet, star, random_tilt, rng,
+                                  instrumentation)
+    generate_planet_details(planet, protoplanet, star, random_tilt,
+                            planet_id, do_gases, do_moons, is_moon, rng,
+                            surface_temp_solver, instrumentation)
+    return planet
+
+
+def generate_planet_bulk(protoplanet, star, random_tilt=0, rng=random,
+                         instrumentation=NULL_INSTRUMENTATION):
+    """The first, cheap part of generate_planet.
+
+    Settles the fields in BULK_FIELDS: size, mass (after any gas lost to
+    space), year and day, and whether the planet is a gas giant.
+    """
+    context = star.context
     planet = Planet(
         sun=star,
         orbit=protoplanet.orbit,
@@ -402,21 +747,21 @@ def generate_planet(protoplanet,
         gas_mass=protoplanet.gas_mass,
         mass=protoplanet.mass,
         axial_tilt=inclination(
-            protoplanet.orbit.a) if random_tilt else 0 * deg,
+            protoplanet.orbit.a, rng) if random_tilt else 0 * deg,
         atmosphere=None,
         surf_temp=0 * K,
         high_temp=0 * K,
         low_temp=0 * K,
         max_temp=0 * K,
         min_temp=0 * K,
-        greenhs_rise=0,
+        greenhs_rise=0 * K,
         resonant_period=False,
-        orbit_zone=orb_zone(star.luminosity_ratio, protoplanet.orbit.a),
+        orbit_zone=orb_zone(context.luminosity_ratio, protoplanet.orbit.a),
         orb_period=period(protoplanet.orbit.a, protoplanet.mass,
-                          star.mass))
+                          context.mass))
 
     planet.exospheric_temp = EARTH_EXOSPHERE_TEMP / \
-        ((planet.orbit.a / star.r_ecosphere) ** 2)
+        ((planet.orbit.a / context.r_ecosphere) ** 2)
     planet.rms_velocity = rms_vel(lookup_gas(
         'N2').weight, planet.exospheric_temp)
     planet.core_radius = kothari_radius(planet.dust_mass, False,
@@ -427,13 +772,14 @@ def generate_planet(protoplanet,
     # some flavor of gas giant.
 
     planet.density = empirical_density(planet.mass, planet.orbit.a,
-                                       star.r_ecosphere, True)
+                                       context.r_ecosphere, True)
     planet.radius = volume_radius(planet.mass, planet.density)
 
     planet.surf_accel = acceleration(planet.mass, planet.radius)
     planet.surf_grav = planet.surf_accel  # TODO(woursler): Remove ambiguity.
 
-    planet.molec_weight = min_molec_weight(planet)
+    with instrumentation.stage('min_molec_weight'):
+        planet.molec_weight = min_molec_weight(planet)
 
     if ((planet.mass > 1 * earth_mass)
             # TODO(woursler): Understand where this comes from.
@@ -492,7 +838,19 @@ def generate_planet(protoplanet,
 
     planet.day = day_length(planet)  # Modifies planet.resonant_period
     planet.esc_velocity = escape_vel(planet.mass, planet.radius)
+    return planet
 
+
+def generate_planet_details(planet, protoplanet, star, random_tilt=0,
+                            planet_id=None, do_gases=True, do_moons=True,
+                            is_moon=False, rng=random,
+                            surface_temp_solver=None,
+                            instrumentation=NULL_INSTRUMENTATION):
+    """The rest of generate_planet, on a planet from generate_planet_bulk.
+
+    Works out temperatures, atmosphere and type, and generates the moons.
+    """
+    context = star.context
     if planet.type == PlanetType.GAS_GIANT or planet.type == PlanetType.SUB_GAS_GIANT or planet.type == PlanetType.SUB_SUB_GAS_GIANT:
 
         planet.greenhouse_effect = False
@@ -502,47 +860,49 @@ def generate_planet(protoplanet,
         planet.boil_point = INCREDIBLY_LARGE_NUMBER * K
 
         planet.surf_temp = INCREDIBLY_LARGE_NUMBER * K
-        planet.greenhs_rise = 0
-        planet.albedo = random.uniform(GAS_GIANT_ALBEDO - 0.1, GAS_GIANT_ALBEDO + 0.1)
+        planet.greenhs_rise = 0 * K
+        planet.albedo = rng.uniform(GAS_GIANT_ALBEDO - 0.1, GAS_GIANT_ALBEDO + 0.1)
         planet.hydrosphere = 1.0
         planet.cloud_cover = 1.0
         planet.ice_cover = 0.0
         planet.surf_grav = planet.surf_accel
-        planet.molec_weight = min_molec_weight(planet)
-        planet.estimated_temp = est_temp(star.r_ecosphere, planet.orbit.a,
+        with instrumentation.stage('min_molec_weight'):
+            planet.molec_weight = min_molec_weight(planet)
+        planet.estimated_temp = est_temp(context.r_ecosphere, planet.orbit.a,
                                          planet.albedo)
-        planet.estimated_terr_temp = est_temp(star.r_ecosphere, planet.orbit.a,
-                                              EARTH_ALBEDO)
+        planet.estimated_terr_temp = est_temp(context.r_ecosphere,
+                                              planet.orbit.a, EARTH_ALBEDO)
 
         temp = planet.estimated_terr_temp
 
         if (temp >= FREEZING_POINT_OF_WATER) and (
                 temp <= EARTH_AVERAGE_TEMP + 10 * K) and (star.age > 2.0E9 * year):
-            if VERBOSE:
-                print(
-                    "%s\t%s (%s, %s old)%s with earth-like temperature (%s)." % (
-                        planet_id,
-                        str(planet.type),
-                        mass_repr(planet.mass),
-                        quantity_repr(star.age, year),
-                        "" if planet.first_moon == None else " with moon",
-                        quantity_repr(temp, K),
-                    )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "%s\t%s (%s, %s old)%s with earth-like temperature (%s).",
+                    planet_id,
+                    str(planet.type),
+                    mass_repr(planet.mass),
+                    quantity_repr(star.age, year),
+                    " with moon" if planet.moons else "",
+                    quantity_repr(temp, K),
                 )
     else:
 
-        planet.estimated_temp = est_temp(star.r_ecosphere, planet.orbit.a,
+        planet.estimated_temp = est_temp(context.r_ecosphere, planet.orbit.a,
                                          EARTH_ALBEDO)
-        planet.estimated_terr_temp = est_temp(star.r_ecosphere, planet.orbit.a,
-                                              EARTH_ALBEDO)
+        planet.estimated_terr_temp = est_temp(context.r_ecosphere,
+                                              planet.orbit.a, EARTH_ALBEDO)
 
         planet.surf_grav = planet.surf_accel
-        planet.molec_weight = min_molec_weight(planet)
+        with instrumentation.stage('min_molec_weight'):
+            planet.molec_weight = min_molec_weight(planet)
 
-        planet.greenhouse_effect = grnhouse(star.r_ecosphere, planet.orbit.a)
+        planet.greenhouse_effect = grnhouse(context.r_ecosphere,
+                                            planet.orbit.a)
         planet.volatile_gas_inventory = vol_inventory(
             planet.mass, planet.esc_velocity, planet.rms_velocity,
-            star.mass_ratio, planet.orbit_zone, planet.greenhouse_effect,
+            context.mass_ratio, planet.orbit_zone, planet.greenhouse_effect,
             (planet.gas_mass / planet.mass) > 0.000001)
         planet.surf_pressure = 1 * atm
 
@@ -568,11 +928,17 @@ def generate_planet(protoplanet,
         # planet.hydrosphere
         # planet.cloud_cover
         # planet.ice_cover
-        iterate_surface_temp(planet)
+        with instrumentation.stage('surface_temp'):
+            iterate_surface_temp(planet, surface_temp_solver)
+        iterations = planet.surf_temp_convergence.iterations
+        instrumentation.count('surface_temp_planets')
+        instrumentation.count('surface_temp_iterations', iterations)
+        instrumentation.peak('surface_temp_iterations', iterations)
 
         if (do_gases and (planet.max_temp >= FREEZING_POINT_OF_WATER)
                 and (planet.min_temp <= planet.boil_point)):
-            calculate_gases(star, planet, planet_id)
+            with instrumentation.stage('gases'):
+                calculate_gases(star, planet, planet_id)
 
         # Next we assign a type to the planet.
 
@@ -635,67 +1001,166 @@ def generate_planet(protoplanet,
                 protomoon.orbit = planet.orbit
 
                 # Note: adjusts density, which is used in computing the roche limit.
-                moon = generate_planet(
-                    protoplanet=protomoon,
-                    star=star,
-                    random_tilt=random_tilt,
-                    do_gases=do_gases,
-                    do_moons=do_moons,
-                    is_moon=True,
-                )
+                with instrumentation.stage('moons', moon=len(planet.moons)):
+                    moon = generate_planet(
+                        protoplanet=protomoon,
+                        star=star,
+                        random_tilt=random_tilt,
+                        do_gases=do_gases,
+                        do_moons=do_moons,
+                        is_moon=True,
+                        rng=rng,
+                        surface_temp_solver=surface_temp_solver,
+                        instrumentation=instrumentation,
+                    )
 
                 roche_limit_r = roche_limit(planet, moon)
                 hill_sphere_r = hill_sphere(planet, star)
 
                 if roche_limit_r * 1.5 < hill_sphere_r / 2:
-                    moon_a = random.uniform(
+                    moon_a = rng.uniform(
                         roche_limit_r * 1.5,
                         hill_sphere_r / 2,
                     )
-                    moon_e = random.uniform(0, 0.2)
+                    moon_e = rng.uniform(0, 0.2)
                     moon.orbit = Orbit(a=moon_a, e=moon_e)
 
                 else:
                     # TODO(woursler): This seems like an error?
                     # The moon has no stable space to orbit.
-                    moon.orbit = Orbit(a=0, e=0)
+                    moon.orbit = Orbit(a=0 * km, e=0)
 
                 planet.moons.append(moon)
 
-                if VERBOSE:
-                    print(
-                        "Planet %s: %s, Moon #%d %s" % (
-                            planet_id,
-                            mass_repr(planet.mass),
-                            len(planet.moons),
-                            mass_repr(moon.mass),
-                        ),
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "Planet %s: %s, Moon #%d %s",
+                        planet_id,
+                        mass_repr(planet.mass),
+                        len(planet.moons),
+                        mass_repr(moon.mass),
                     )
-                    print(
-                        "Roche limit: %s (planet.radius = %s, planet.density = %s, moon.density = %s)" % (
-                            quantity_repr(roche_limit_r, km),
-                            quantity_repr(planet.radius, km),
-                            quantity_repr(planet.density, kg/m**3),
-                            quantity_repr(moon.density, kg/m**3),
-                        ),
+                    logger.debug(
+                        "Roche limit: %s (planet.radius = %s, planet.density = %s, moon.density = %s)",
+                        quantity_repr(roche_limit_r, km),
+                        quantity_repr(planet.radius, km),
+                        quantity_repr(planet.density, kg/m**3),
+                        quantity_repr(moon.density, kg/m**3),
                     )
-                    print(
-                        "Hill Sphere: %s (planet.orbit.a = %s, planet.mass = %s, star.mass = %s)" % (
-                            quantity_repr(hill_sphere_r, km),
-                            quantity_repr(planet.orbit.a, km),
-                            mass_repr(planet.mass),
-                            mass_repr(star.mass),
-                        ),
+                    logger.debug(
+                        "Hill Sphere: %s (planet.orbit.a = %s, planet.mass = %s, star.mass = %s)",
+                        quantity_repr(hill_sphere_r, km),
+                        quantity_repr(planet.orbit.a, km),
+                        mass_repr(planet.mass),
+                        mass_repr(star.mass),
                     )
-                    print(
-                        "Moon orbit: a = %s, e = %f" % (
-                            quantity_repr(moon.orbit.a, km),
-                            moon.orbit.e
-                        ),
+                    logger.debug(
+                        "Moon orbit: a = %s, e = %f",
+                        quantity_repr(moon.orbit.a, km),
+                        moon.orbit.e,
                     )
     return planet
 
 
+# Lazy planets.
+
+
+# The Planet fields generate_planet_bulk settles for good, which a LazyPlanet
+# can give without working out the rest.
+BULK_FIELDS = frozenset([
+    'axial_tilt',
+    'mass',
+    'dust_mass',
+    'gas_mass',
+    'orbit_zone',
+    'orb_period',
+    'exospheric_temp',
+    'rms_velocity',
+    'core_radius',
+    'radius',
+    'density',
+    'surf_accel',
+    'day',
+    'resonant_period',
+    'esc_velocity',
+])
+
+
+class LazyPlanet:
+    """A planet that is only worked out as far as it is looked at.
+
+    `orbit` and `sun` come straight from the protoplanet, the fields in
+    BULK_FIELDS only need generate_planet_bulk, and anything else (moons
+    included) runs generate_planet_details once and is then read from the
+    finished Planet, which `materialize()` returns.
+
+    Everything is drawn from random.Random(seed), so the planet comes out
+    the same whenever, and in whatever order, it is looked at.
+    """
+
+    __slots__ = ('protoplanet', 'orbit', 'sun', '_seed', '_options', '_rng',
+                 '_planet', '_materialized')
+
+    def __init__(self, protoplanet, star, seed, random_tilt=0, do_gases=True,
+                 do_moons=True, surface_temp_solver=None,
+                 instrumentation=NULL_INSTRUMENTATION):
+        self.protoplanet = protoplanet
+        self.orbit = protoplanet.orbit
+        self.sun = star
+        self._seed = seed
+        self._options = {
+            'random_tilt': random_tilt,
+            'do_gases': do_gases,
+            'do_moons': do_moons,
+            'surface_temp_solver': surface_temp_solver,
+            'instrumentation': instrumentation,
+        }
+        self._rng = None
+        self._planet = None
+        self._materialized = False
+
+    def _bulk(self):
+        if self._planet is None:
+            self._rng = random.Random(self._seed)
+            self._planet = generate_planet_bulk(
+                self.protoplanet, self.sun, self._options['random_tilt'],
+                self._rng, self._options['instrumentation'])
+        return self._planet
+
+    def materialize(self):
+        """The fully generated Planet."""
+        planet = self._bulk()
+        if not self._materialized:
+            generate_planet_details(planet, self.protoplanet, self.sun,
+                                    rng=self._rng, **self._options)
+            self._materialized = True
+            self._rng = None
+        return planet
+
+    def __getattr__(self, name):
+        # Only reached for names that are not slots (or are unset slots,
+        # while unpickling).
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name in BULK_FIELDS:
+            return getattr(self._bulk(), name)
+        return getattr(self.materialize(), name)
+
+    def __repr__(self):
+        if self._materialized:
+            return repr(self._planet)
+        return 'LazyPlanet(%r)' % (self.protoplanet,)
+
+
+def materialize_system(star):
+    """Replace the LazyPlanets of `star` with the Planets they become."""
+    star.planets = [
+        planet.materialize() if isinstance(planet, LazyPlanet) else planet
+        for planet in star.planets
+    ]
+    return star
+
+
 ###
 # Smoke Test
 ###
@@ -707,17 +1172,12 @@ JINJA2_ENVIROMENT = Environment(
     autoescape=select_autoescape(['html', 'xml', 'svg']),
 )
 
-if __name__ == '__main__':
-    # TODO(woursler): Generate a random seed if not provided.
-    SEED = 'WhoPatentsMath'
-    #random.seed(SEED)
-    # TODO(woursler): Pass in the seed.
-    system = generate_stellar_system(random_star())
-
-    print(system)
 
-    # Output SVG TODO(woursler): Configure as flags?
+def render_system(system, seed):
+    """Render the SVG and HTML views of a generated system.
 
+    Returns the text of templates/system.svg and templates/system.html.
+    """
     max_x = 1500
     max_y = 120
     margin = 20
@@ -751,7 +1211,7 @@ if __name__ == '__main__':
     JINJA2_ENVIROMENT.filters['mass_repr'] = mass_repr
 
     template_args = {
-        'seed': SEED,
+        'seed': seed,
         'star': system,
         'progname': 'garnets',
         'progversion': '0.0.1',
@@ -769,10 +1229,26 @@ if __name__ == '__main__':
         'base_url': 'http://localhost:8000',
     }
 
-    svg_path = Path(__file__).resolve().parents[2] / Path('test.svg')
     svg_template = JINJA2_ENVIROMENT.get_template('system.svg')
-    svg_path.write_text(svg_template.render(**template_args))
+    html_template = JINJA2_ENVIROMENT.get_template('system.html')
+    return (svg_template.render(**template_args),
+            html_template.render(**template_args))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    # TODO(woursler): Generate a random seed if not provided.
+    SEED = 'WhoPatentsMath'
+    system = generate_seeded_stellar_system(SEED)
+
+    print(system)
+
+    # Output SVG TODO(woursler): Configure as flags?
+    svg, html = render_system(system, SEED)
+
+    svg_path = Path(__file__).resolve().parents[2] / Path('test.svg')
+    svg_path.write_text(svg)
 
     html_path = Path(__file__).resolve().parents[2] / Path('test_system.html')
-    html_template = JINJA2_ENVIROMENT.get_template('system.html')
-    html_path.write_text(html_template.render(**template_args))
+    html_path.write_text(html)
@@ -0,0 +1,266 @@
+"""
+Opt-in timing and counters for system generation.
+
+Pass an `Instrumentation` to `garnets.generate_stellar_system` (or to
+`generate_stellar_systems`, which gathers one from each worker) and it
+records the wall and CPU time spent in each stage, and counts what
+accretion and planet generation did. Stages nest, and a stage's time
+includes the stages run inside it:
+
+    system                generate_seeded_stellar_system
+      accretion           generate_planetary_masses, either engine
+        injection         drawing the orbits of new planetesimals
+        accrete_dust      the first sweep of each new planetesimal
+        coalescence       collisions (and the sweeps after them), captures
+      planets             generating every planet of a system
+        planet            generating one planet
+          min_molec_weight
+          surface_temp    iterate_surface_temp
+          gases           calculate_gases
+          moons           generating a moon (its stages nest inside)
+
+Planets of a lazy system report their stages when they are worked out,
+outside of `planets`.
+
+The counters are `systems`; from accretion, `injections`, `draws`, `misses`
+and `skipped` (as in accrete.InjectionCounter), `accretions`, `sweeps` and
+`sweeps_saved` (as in accrete.SweepCounter), `protoplanets`, `coalescences`
+and `moon_captures`; `surface_temp_planets` and `surface_temp_iterations`;
+and, with a cache.SystemCache, `cache_hits` and `cache_misses`. The peaks
+are `lanes` (the most dust lanes at an injection), `sequential_failures`
+(the longest run of failed draws before an injection) and
+`surface_temp_iterations` (the most for one planet).
+
+By default everything reports into NULL_INSTRUMENTATION, which does nothing.
+
+A `Tracer` is an Instrumentation that also keeps every stage as an event of
+the Chrome trace event format, which chrome://tracing and Perfetto show as a
+timeline. Stages carry arguments: the seed of a `system`, the index of a
+`planet` or a moon, and the semi-major axis and sweeps of an
+`accrete_dust`. Counts are added to the arguments of the innermost stage
+open when they are made, so that a `coalescence` shows whether it was a
+collision, a capture or a new protoplanet.
+"""
+
+import json
+import os
+
+from time import perf_counter
+from time import process_time
+
+from attr import attr
+from attr import attrs
+
+
+@attrs
+class StageTimes:
+    """The calls to a stage, and the seconds spent in them."""
+
+    calls = attr(default=0)
+    wall = attr(default=0.0)
+    cpu = attr(default=0.0)
+
+    def update(self, other):
+        """Add the calls and times of another StageTimes to these."""
+        self.calls += other.calls
+        self.wall += other.wall
+        self.cpu += other.cpu
+
+
+class _StageTimer:
+    """Context manager adding the time spent in it to a StageTimes."""
+
+    __slots__ = ('times', 'wall', 'cpu')
+
+    def __init__(self, times):
+        self.times = times
+
+    def __enter__(self):
+        self.wall = perf_counter()
+        self.cpu = process_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        times = self.times
+        times.cpu += process_time() - self.cpu
+        times.wall += perf_counter() - self.wall
+        times.calls += 1
+
+    def annotate(self, **args):
+        """Arguments for the stage, which only a Tracer keeps."""
+
+
+@attrs
+class Instrumentation:
+    """Stage times, counters and peaks, gathered over any number of systems.
+
+    `stages` maps stage names to StageTimes, `counters` names to totals and
+    `peaks` names to the largest value seen.
+    """
+
+    enabled = True
+
+    stages = attr(factory=dict)
+    counters = attr(factory=dict)
+    peaks = attr(factory=dict)
+
+    def stage(self, name, **args):
+        """A context manager timing the stage `name`.
+
+        `args` describe this run of the stage; only a Tracer keeps them.
+        """
+        return _StageTimer(self._times(name))
+
+    def _times(self, name):
+        times = self.stages.get(name)
+        if times is None:
+            times = self.stages[name] = StageTimes()
+        return times
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def peak(self, name, value):
+        if name not in self.peaks or value > self.peaks[name]:
+            self.peaks[name] = value
+
+    def ratio(self, numerator, denominator):
+        """The ratio of two counters, or 0.0 if the denominator is 0."""
+        total = self.counters.get(denominator, 0)
+        return self.counters.get(numerator, 0) / total if total else 0.0
+
+    def update(self, other):
+        """Add the stages, counters and peaks of another Instrumentation."""
+        for name, times in other.stages.items():
+            self.stages.setdefault(name, StageTimes()).update(times)
+        for name, amount in other.counters.items():
+            self.count(name, amount)
+        for name, value in other.peaks.items():
+            self.peak(name, value)
+
+    def report(self):
+        """The stages, counters and peaks as lines of text."""
+        lines = ["%-24s %8s %10s %10s" % ('stage', 'calls', 'wall s',
+                                          'cpu s')]
+        for name, times in self.stages.items():
+            lines.append("%-24s %8d %10.4f %10.4f" %
+                         (name, times.calls, times.wall, times.cpu))
+        for name in sorted(self.counters):
+            lines.append("%-24s %8d" % (name, self.counters[name]))
+        for name in sorted(self.peaks):
+            lines.append("%-24s %8d (peak)" % (name, self.peaks[name]))
+        return lines
+
+
+class _TraceSpan(_StageTimer):
+    """A _StageTimer that also adds a trace event to a Tracer."""
+
+    __slots__ = ('tracer', 'name', 'args')
+
+    def __init__(self, tracer, name, args):
+        super().__init__(tracer._times(name))
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.tracer._open.append(self)
+        return super().__enter__()
+
+    def __exit__(self, *exc_info):
+        start = self.wall
+        super().__exit__(*exc_info)
+        tracer = self.tracer
+        tracer._open.pop()
+        tracer.events.append({
+            'name': self.name,
+            'cat': 'garnets',
+            'ph': 'X',
+            'ts': start * 1e6,
+            'dur': (perf_counter() - start) * 1e6,
+            'pid': tracer.pid,
+            'tid': tracer.pid,
+            'args': self.args,
+        })
+
+    def annotate(self, **args):
+        self.args.update(args)
+
+
+@attrs
+class Tracer(Instrumentation):
+    """An Instrumentation that also records each stage it times as a trace
+    event.
+
+    Events are complete events (`"ph": "X"`), timed by time.perf_counter in
+    microseconds, for the process that made them, so the events of a batch
+    show one timeline per worker.
+    """
+
+    events = attr(factory=list)
+    pid = attr(factory=os.getpid)
+    _open = attr(factory=list, init=False, repr=False)
+
+    def stage(self, name, **args):
+        return _TraceSpan(self, name, args)
+
+    def count(self, name, amount=1):
+        super().count(name, amount)
+        if self._open:
+            args = self._open[-1].args
+            args[name] = args.get(name, 0) + amount
+
+    def update(self, other):
+        super().update(other)
+        self.events.extend(other.events)
+
+    def trace(self):
+        """The events, as a trace event format object."""
+        return {'traceEvents': self.events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path):
+        """Save the trace as JSON, for chrome://tracing or Perfetto.
+
+        Arguments that are not JSON, such as quantities, are written as
+        strings.
+        """
+        with open(path, 'w') as stream:
+            json.dump(self.trace(), stream, default=str)
+
+
+class _NullStage:
+    """A context manager that does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def annotate(self, **args):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullInstrumentation:
+    """Takes the reports of an Instrumentation, and drops them."""
+
+    __slots__ = ()
+
+    enabled = False
+
+    def stage(self, name, **args):
+        return _NULL_STAGE
+
+    def count(self, name, amount=1):
+        pass
+
+    def peak(self, name, value):
+        pass
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
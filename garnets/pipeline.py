@@ -0,0 +1,260 @@
+"""
+System generation in two stages, with the first kept on disk.
+
+    accretion     accrete_protoplanets: the protoplanets (and protomoons)
+                  of a star
+    environment   populate_planets: the planets made from them
+
+The stages depend on different constants: the disk's (DUST_DENSITY_COEFF,
+ECCENTRICITY_COEFF, GAS_DUST_RATIO, B and so on) only matter to accretion,
+and the albedos, GAS_RETENTION_THRESHOLD and the gas table only to the
+environment. A `Pipeline` stores what accretion made of each seed as an
+`AccretionArtifact`, keyed by the accretion stage's fingerprint alone, so
+that after an environment constant changes, systems are generated again from
+the stored protoplanets without accreting them again.
+
+A stage's fingerprint hashes the code of the modules it runs (of
+garnets.py, which holds both stages, accretion only takes the functions it
+reaches), the constants those modules use (by the values they hold, so a
+constant changed at run time counts too), its data files and the
+fingerprint of the stage before it. `Pipeline` keeps the fingerprints of
+its last run in the directory and logs the stages a change invalidated;
+`affected_stages` says which stages a constant feeds.
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import os
+import random
+import types
+
+from pathlib import Path
+
+import constants
+import xatu.units
+
+from attr import attr
+from accrete import DEFAULT_ACCRETION
+from attr import attrs
+from cache import DEFAULT_MAX_BYTES
+from cache import SystemCache
+from cache import file_digest
+from chemtable import GASES_FILENAME
+from garnets import accrete_protoplanets
+from garnets import populate_planets
+from garnets import random_star
+from instrumentation import NULL_INSTRUMENTATION
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('accretion', 'environment')
+
+# The modules whose code each stage runs.
+STAGE_MODULES = {
+    'accretion': ('accrete', 'fast_accrete', 'stellar_system'),
+    'environment': ('enviroment', 'atmosphere', 'chemtable',
+                    'stellar_system', 'garnets'),
+}
+
+# Where a stage runs part of a module: the module, and the functions the
+# stage enters it by. garnets.py holds the environment stage too, so
+# accretion only fingerprints the functions of it these reach.
+STAGE_FUNCTIONS = {
+    'accretion': ('garnets', ('random_star', 'accrete_protoplanets')),
+    'environment': None,
+}
+
+# The modules whose constants each stage uses. The only accretion constant
+# garnets.py imports, PROTOPLANET_MASS, is used by fast_accrete.py too.
+STAGE_CONSTANT_MODULES = {
+    'accretion': ('accrete', 'fast_accrete', 'stellar_system'),
+    'environment': ('enviroment', 'atmosphere', 'chemtable',
+                    'stellar_system', 'garnets'),
+}
+
+STAGE_DATA = {
+    'accretion': (),
+    'environment': (GASES_FILENAME,),
+}
+
+FINGERPRINTS_FILENAME = 'fingerprints.json'
+
+
+def stage_constants(stage):
+    """The constants the modules of `stage` use, by name."""
+    found = {}
+    for module_name in STAGE_CONSTANT_MODULES[stage]:
+        module = importlib.import_module(module_name)
+        for name, value in vars(module).items():
+            if name.isupper() and hasattr(constants, name) \
+                    and not hasattr(xatu.units, name):
+                found[name] = value
+    return found
+
+
+def _referenced_names(code):
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            names |= _referenced_names(constant)
+    return names
+
+
+def stage_functions(stage):
+    """The functions a stage runs of the module in STAGE_FUNCTIONS, by name:
+    those it enters by, and the module's own functions they call."""
+    if STAGE_FUNCTIONS[stage] is None:
+        return {}
+    module_name, entry_points = STAGE_FUNCTIONS[stage]
+    module = importlib.import_module(module_name)
+    found = {}
+    pending = list(entry_points)
+    while pending:
+        name = pending.pop()
+        function = getattr(module, name, None)
+        if name in found or not inspect.isfunction(function) \
+                or function.__module__ != module_name:
+            continue
+        found[name] = function
+        pending.extend(_referenced_names(function.__code__))
+    return found
+
+
+def stage_fingerprints():
+    """The fingerprint of each stage, which includes those before it."""
+    fingerprints = {}
+    upstream = None
+    for stage in STAGES:
+        description = {
+            'upstream': upstream,
+            'code': {
+                name: file_digest(importlib.import_module(name).__file__)
+                for name in STAGE_MODULES[stage]
+            },
+            'functions': {
+                name: hashlib.sha256(
+                    inspect.getsource(function).encode()).hexdigest()
+                for name, function in stage_functions(stage).items()
+            },
+            'constants': {name: repr(value)
+                          for name, value in stage_constants(stage).items()},
+            'data': {os.path.basename(path): file_digest(path)
+                     for path in STAGE_DATA[stage]},
+        }
+        upstream = fingerprints[stage] = hashlib.sha256(
+            json.dumps(description, sort_keys=True).encode()).hexdigest()
+    return fingerprints
+
+
+def invalidated_stages(old, new):
+    """The stages whose fingerprints differ between `old` and `new`."""
+    return [stage for stage in STAGES if old.get(stage) != new.get(stage)]
+
+
+def affected_stages(constant):
+    """The stages that have to run again when `constant` changes."""
+    affected = []
+    for stage in STAGES:
+        if affected or constant in stage_constants(stage):
+            affected.append(stage)
+    return affected
+
+
+@attrs
+class AccretionArtifact:
+    """What accretion made of a seed: the star, its protoplanets, and the
+    state of the seed's random.Random afterwards, which the environment
+    stage carries on drawing from."""
+
+    seed = attr()
+    star = attr()
+    protoplanets = attr()
+    rng_state = attr()
+
+
+class Pipeline:
+    """Generates systems, reusing the accretion stored in `directory`.
+
+    `generate` gives the same system as
+    `garnets.generate_seeded_stellar_system` with the same arguments.
+    `invalidated` lists the stages whose fingerprints changed since the last
+    Pipeline on this directory, and `artifacts` (a cache.SystemCache) counts
+    the accretions reused in its `stats`.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.fingerprints = stage_fingerprints()
+        self.artifacts = SystemCache(
+            self.directory / 'accretion', max_bytes,
+            fingerprint={'accretion': self.fingerprints['accretion']})
+        self.invalidated = self._check_fingerprints()
+
+    def _check_fingerprints(self):
+        path = self.directory / FINGERPRINTS_FILENAME
+        if not path.exists():
+            previous = None
+            invalidated = []
+        else:
+            previous = json.loads(path.read_text())
+            invalidated = invalidated_stages(previous, self.fingerprints)
+        if invalidated:
+            logger.info("Changed since the last run, so run again: %s.",
+                        ", ".join(invalidated))
+        if previous != self.fingerprints:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_name('%s.%d.tmp' % (path.name,
+                                                      os.getpid()))
+            temporary.write_text(json.dumps(self.fingerprints, indent=1))
+            os.replace(str(temporary), str(path))
+        return invalidated
+
+    def accrete(self, seed, star=None, mass_ratio=1, do_moons=True,
+                accretion=DEFAULT_ACCRETION,
+                instrumentation=NULL_INSTRUMENTATION):
+        """The AccretionArtifact for `seed`, loaded if it was stored."""
+        key = self.artifacts.key(seed, star, mass_ratio, {
+            'do_moons': do_moons,
+            'accretion': accretion,
+        })
+        hit, artifact = self.artifacts.lookup(key)
+        if hit:
+            return artifact
+
+        rng = random.Random(seed)
+        if star is None:
+            star = random_star(rng, mass_ratio)
+        protoplanets = accrete_protoplanets(star, do_moons=do_moons,
+                                            accretion=accretion, rng=rng,
+                                            instrumentation=instrumentation)
+        artifact = AccretionArtifact(seed=seed, star=star,
+                                     protoplanets=protoplanets,
+                                     rng_state=rng.getstate())
+        self.artifacts.store(key, artifact)
+        return artifact
+
+    def generate(self, seed, star=None, mass_ratio=1, do_gases=True,
+                 do_moons=True, accretion=DEFAULT_ACCRETION,
+                 surface_temp_solver=None, lazy=False,
+                 instrumentation=NULL_INSTRUMENTATION):
+        """The system for `seed`, from its stored accretion if there is one.
+
+        As with a cache, a star passed in is only filled in when the seed is
+        accreted, not when its accretion is loaded.
+        """
+        with instrumentation.stage('system', seed=seed):
+            instrumentation.count('systems')
+            artifact = self.accrete(seed, star, mass_ratio,
+                                    do_moons=do_moons, accretion=accretion,
+                                    instrumentation=instrumentation)
+            rng = random.Random()
+            rng.setstate(artifact.rng_state)
+            populate_planets(
+                artifact.star, artifact.protoplanets, do_gases=do_gases,
+                do_moons=do_moons, rng=rng,
+                surface_temp_solver=surface_temp_solver, lazy=lazy,
+                instrumentation=instrumentation)
+        return artifact.star
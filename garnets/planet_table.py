@@ -0,0 +1,214 @@
+"""
+A columnar store for large numbers of generated planets.
+
+A `Planet` is a Python object holding a few dozen unit quantities, which
+adds up when a run keeps millions of them around. `PlanetTable` keeps the
+same fields as one flat typed array per field (plus a ragged layout for the
+atmospheres), and only builds `Planet` objects when a row is asked for.
+
+Columns are stored as plain numbers in fixed units, listed in `COLUMNS`.
+Moons are rows of their own, stored right after their planet.
+"""
+
+from array import array
+
+import numpy as np
+
+from chemtable import GASES
+from chemtable import gas_id
+from enviroment import PlanetType
+from enviroment import Zone
+from stellar_system import Orbit
+from stellar_system import Planet
+from stellar_system import Star
+from xatu.core import dimensionless_with_units
+from xatu.units import K
+from xatu.units import atm
+from xatu.units import au
+from xatu.units import cm
+from xatu.units import deg
+from xatu.units import g
+from xatu.units import hour
+from xatu.units import kg
+from xatu.units import km
+from xatu.units import m
+from xatu.units import mol
+from xatu.units import s
+from xatu.units import solar_mass
+
+DAY = 24 * hour
+
+# (field, unit, array typecode) for every stored Planet field. A unit of
+# None means the field is a plain number.
+COLUMNS = [
+    ('axial_tilt', deg, 'd'),
+    ('mass', solar_mass, 'd'),
+    ('dust_mass', solar_mass, 'd'),
+    ('gas_mass', solar_mass, 'd'),
+    ('core_radius', km, 'd'),
+    ('radius', km, 'd'),
+    ('density', g / cm ** 3, 'd'),
+    ('orb_period', DAY, 'd'),
+    ('day', hour, 'd'),
+    ('resonant_period', None, 'b'),
+    ('esc_velocity', m / s, 'd'),
+    ('surf_accel', m / s ** 2, 'd'),
+    ('rms_velocity', m / s, 'd'),
+    ('molec_weight', kg / mol, 'd'),
+    ('volatile_gas_inventory', None, 'd'),
+    ('surf_pressure', atm, 'd'),
+    ('greenhouse_effect', None, 'b'),
+    ('boil_point', K, 'd'),
+    ('albedo', None, 'd'),
+    ('exospheric_temp', K, 'd'),
+    ('estimated_temp', K, 'd'),
+    ('estimated_terr_temp', K, 'd'),
+    ('surf_temp', K, 'd'),
+    ('greenhs_rise', K, 'd'),
+    ('high_temp', K, 'd'),
+    ('low_temp', K, 'd'),
+    ('max_temp', K, 'd'),
+    ('min_temp', K, 'd'),
+    ('hydrosphere', None, 'd'),
+    ('cloud_cover', None, 'd'),
+    ('ice_cover', None, 'd'),
+    ('gases', None, 'b'),
+]
+
+# Columns that are not Planet fields of the same name.
+EXTRA_COLUMNS = [
+    ('a', 'd'),  # orbit.a, in AU
+    ('e', 'd'),  # orbit.e
+    ('type', 'b'),  # PlanetType value
+    ('orbit_zone', 'b'),  # Zone value, or 0 if unset
+    ('star', 'l'),  # index into PlanetTable.stars
+    ('moon_count', 'l'),  # number of moon rows following this one
+    ('is_moon', 'b'),
+    ('atmosphere_start', 'l'),  # first entry in the atmosphere arrays
+    ('atmosphere_count', 'b'),  # number of entries, or -1 for None
+]
+
+
+class PlanetTable:
+    """Generated planets, stored a column per field.
+
+    Build one with `PlanetTable.from_stars(stars)` or add systems with
+    `append_star`. `column(name)` gives a NumPy copy of any column,
+    `table[i]` rebuilds row i as a `Planet` (with its moons), and iterating
+    yields every top-level planet.
+
+    Unlike the Planet it came from, a rebuilt planet gets a new `Star` with
+    the same mass, age and name, but no planet list, and `surf_grav` is set
+    to `surf_accel`, as generate_planet leaves it.
+    """
+
+    def __init__(self):
+        self.stars = []
+        self._columns = {name: array(typecode)
+                         for name, _, typecode in COLUMNS}
+        self._columns.update({name: array(typecode)
+                              for name, typecode in EXTRA_COLUMNS})
+        self._atmosphere_gas = array('b')
+        self._atmosphere_pressure = array('d')
+
+    @classmethod
+    def from_stars(cls, stars):
+        table = cls()
+        for star in stars:
+            table.append_star(star)
+        return table
+
+    def __len__(self):
+        return len(self._columns['a'])
+
+    def append_star(self, star):
+        """Add every planet (and moon) of `star`."""
+        self.stars.append(Star(mass_ratio=star.mass_ratio, age=star.age,
+                               name=star.name))
+        star_index = len(self.stars) - 1
+        for planet in star.planets:
+            self._append(planet, star_index, len(planet.moons), False)
+            for moon in planet.moons:
+                self._append(moon, star_index, 0, True)
+
+    def _append(self, planet, star_index, moon_count, is_moon):
+        columns = self._columns
+        for name, unit, _ in COLUMNS:
+            value = getattr(planet, name)
+            if unit is not None:
+                value = dimensionless_with_units(value, unit)
+            columns[name].append(value)
+
+        columns['a'].append(dimensionless_with_units(planet.orbit.a, au))
+        columns['e'].append(planet.orbit.e)
+        columns['type'].append(planet.type.value)
+        columns['orbit_zone'].append(
+            planet.orbit_zone.value if planet.orbit_zone else 0)
+        columns['star'].append(star_index)
+        columns['moon_count'].append(moon_count)
+        columns['is_moon'].append(is_moon)
+
+        columns['atmosphere_start'].append(len(self._atmosphere_gas))
+        if planet.atmosphere is None:
+            columns['atmosphere_count'].append(-1)
+        else:
+            columns['atmosphere_count'].append(len(planet.atmosphere))
+            for gas, pressure in planet.atmosphere:
+                self._atmosphere_gas.append(gas_id(gas.symbol))
+                self._atmosphere_pressure.append(
+                    dimensionless_with_units(pressure, atm))
+
+    def column(self, name):
+        """A copy of column `name` as a NumPy array, one entry per row."""
+        return np.array(self._columns[name])
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        planet = self._planet(index)
+        for moon_index in range(index + 1,
+                                index + 1 + self._columns['moon_count'][index]):
+            planet.moons.append(self._planet(moon_index))
+        return planet
+
+    def __iter__(self):
+        is_moon = self._columns['is_moon']
+        for index in range(len(self)):
+            if not is_moon[index]:
+                yield self[index]
+
+    def _planet(self, index):
+        columns = self._columns
+        values = {}
+        for name, unit, typecode in COLUMNS:
+            value = columns[name][index]
+            if typecode == 'b' and name != 'gases':
+                value = bool(value)
+            if unit is not None:
+                value = value * unit
+            values[name] = value
+
+        zone = columns['orbit_zone'][index]
+        planet = Planet(
+            orbit=Orbit(a=columns['a'][index] * au, e=columns['e'][index]),
+            sun=self.stars[columns['star'][index]],
+            type=PlanetType(columns['type'][index]),
+            orbit_zone=Zone(zone) if zone else 0,
+            atmosphere=self._atmosphere(index),
+            **values,
+        )
+        planet.surf_grav = planet.surf_accel
+        return planet
+
+    def _atmosphere(self, index):
+        count = self._columns['atmosphere_count'][index]
+        if count < 0:
+            return None
+        start = self._columns['atmosphere_start'][index]
+        return [
+            (GASES[self._atmosphere_gas[i]],
+             self._atmosphere_pressure[i] * atm)
+            for i in range(start, start + count)
+        ]
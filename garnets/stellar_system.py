@@ -25,6 +25,73 @@ from xatu.units import year
 
 # pylint: disable=no-member, too-few-public-methods
 
+# Assigning any of these clears Star's cached context.
+STAR_INPUTS = frozenset(['mass_ratio', 'age'])
+
+
+def luminosity_ratio(mass_ratio):
+    # Approximates the luminosity of a star.
+    # TODO: express only as ratio?
+    # Source: http://en.wikipedia.org/wiki/Mass%E2%80%93luminosity_relation
+    if (mass_ratio < .43):
+        return .23 * (mass_ratio**2.3)
+    if (mass_ratio < 2):
+        return (mass_ratio**4)
+    # Main Sequence Stars
+    if (mass_ratio < 20):
+        return 1.5 * (mass_ratio**3.5)
+    # For HUGE stars...
+    return 3200 * mass_ratio
+
+
+@attrs(frozen=True, slots=True)
+class StarContext:
+    """The quantities derived from a star's mass, worked out once.
+
+    Accretion and the environment code read these over and over, so a Star
+    builds its context on first use (`Star.context`) and its properties
+    read from it. Distances are quantities; ratios are plain numbers.
+    """
+
+    mass_ratio = attr()
+    mass = attr(repr=quantity_formatter(solar_mass))
+    age = attr(repr=quantity_formatter(year))
+    luminosity_ratio = attr()
+    sqrt_luminosity = attr()
+    sqrt_mass_ratio = attr()
+    r_ecosphere = attr(repr=quantity_formatter(au))
+    min_r_ecosphere = attr(repr=quantity_formatter(au))
+    max_r_ecosphere = attr(repr=quantity_formatter(au))
+    stellar_dust_limit = attr(repr=quantity_formatter(au))
+    planet_inner_bound = attr(repr=quantity_formatter(au))
+    planet_outer_bound = attr(repr=quantity_formatter(au))
+    life = attr()
+
+    @classmethod
+    def for_star(cls, star):
+        luminosity = luminosity_ratio(star.mass_ratio)
+        cube_root = star.mass_ratio**(1/3)
+        return cls(
+            mass_ratio=star.mass_ratio,
+            mass=star.mass_ratio * solar_mass,
+            age=star.age,
+            luminosity_ratio=luminosity,
+            sqrt_luminosity=sqrt(luminosity),
+            sqrt_mass_ratio=sqrt(star.mass_ratio),
+            # Source: StarGen, TODO Name? Value? Possible habitable zone?
+            r_ecosphere=sqrt(luminosity) * au,
+            min_r_ecosphere=sqrt(luminosity / 1.51) * au,
+            max_r_ecosphere=sqrt(luminosity / 0.48) * au,
+            # Source: StarGen, TODO Verify against current data.
+            stellar_dust_limit=200 * cube_root * au,
+            # TODO(woursler): Confirm AU?
+            planet_inner_bound=0.3 * cube_root * au,
+            planet_outer_bound=50 * cube_root * au,
+            # Source: StarGen, TODO Name? Value?
+            life=10**10 * (star.mass_ratio / luminosity),
+        )
+
+
 @attrs(repr=False)
 class Star():
     mass_ratio = attr()
@@ -34,46 +101,46 @@ class Star():
 
     planets = attr(factory=list)
 
+    _context = attr(default=None, init=False, repr=False, eq=False)
+
+    def __setattr__(self, name, value):
+        if name in STAR_INPUTS:
+            object.__setattr__(self, '_context', None)
+        object.__setattr__(self, name, value)
+
+    @property
+    def context(self):
+        if self._context is None:
+            self._context = StarContext.for_star(self)
+        return self._context
+
     @property
     def mass(self):
-        return self.mass_ratio * solar_mass
-    
+        return self.context.mass
 
     @property
-    # Approximates the luminosity of the star.
-    # TODO: express only as ratio?
-    # Source: http://en.wikipedia.org/wiki/Mass%E2%80%93luminosity_relation
     def luminosity_ratio(self):
-        if (self.mass_ratio < .43):
-            return .23 * (self.mass_ratio**2.3)
-        if (self.mass_ratio < 2):
-            return (self.mass_ratio**4)
-        # Main Sequence Stars
-        if (self.mass_ratio < 20):
-            return 1.5 * (self.mass_ratio**3.5)
-        # For HUGE stars...
-        return 3200 * self.mass_ratio
+        return self.context.luminosity_ratio
 
     @property
-    # Source: StarGen, TODO Verify against current data.
     def stellar_dust_limit(self):
-        return 200 * (self.mass_ratio**(1/3)) * au
+        return self.context.stellar_dust_limit
 
     @property
-    def r_ecosphere(self):  # Source: StarGen, TODO Name? Value? Possible habitable zone?
-        return sqrt(self.luminosity_ratio) * au
+    def r_ecosphere(self):
+        return self.context.r_ecosphere
 
     @property
     def min_r_ecosphere(self):
-        return sqrt(self.luminosity_ratio / 1.51) * au
+        return self.context.min_r_ecosphere
 
     @property
     def max_r_ecosphere(self):
-        return sqrt(self.luminosity_ratio / 0.48) * au
+        return self.context.max_r_ecosphere
 
     @property
-    def life(self):  # Source: StarGen, TODO Name? Value?
-        return 10**10 * (self.mass_ratio / self.luminosity_ratio)
+    def life(self):
+        return self.context.life
 
     @property
     def innermost_planet(self):
@@ -112,18 +179,44 @@ class Orbit:
         return (1 + self.e) * self.a
 
 
-STAR_MASS = 1 * solar_mass  # TODO(woursler): Use the actual star mass
+# Taken as the star of a planetoid that is not tied to one.
+STAR_MASS = 1 * solar_mass
 
 
-@attrs
+# Assigning any of these clears Planetoid's cached quantities.
+PLANETOID_INPUTS = frozenset(['orbit', 'dust_mass', 'gas_mass'])
+
+
+@attrs(slots=True)
 class Planetoid():
     orbit = attr()
     dust_mass = attr(repr=quantity_formatter(kg))
     gas_mass = attr(repr=quantity_formatter(kg))
 
+    # Accretion reads these many times between changes to the orbit or mass,
+    # so they are worked out on first use and kept until one of those is set.
+    _mass = attr(default=None, init=False, repr=False, eq=False)
+    _reduced_mass = attr(default=None, init=False, repr=False, eq=False)
+    _inner_effect_limit = attr(default=None, init=False, repr=False, eq=False)
+    _outer_effect_limit = attr(default=None, init=False, repr=False, eq=False)
+
+    def __setattr__(self, name, value):
+        if name in PLANETOID_INPUTS:
+            object.__setattr__(self, '_mass', None)
+            object.__setattr__(self, '_reduced_mass', None)
+            object.__setattr__(self, '_inner_effect_limit', None)
+            object.__setattr__(self, '_outer_effect_limit', None)
+        object.__setattr__(self, name, value)
+
     @property
     def mass(self):
-        return self.dust_mass + self.gas_mass
+        if self._mass is None:
+            self._mass = self.dust_mass + self.gas_mass
+        return self._mass
+
+    @property
+    def star_mass(self):
+        return STAR_MASS
 
     @property
     def reduced_mass(self):
@@ -131,29 +224,41 @@ class Planetoid():
         # http://spiff.rit.edu/classes/phys440/lectures/reduced/reduced.html
         # But some sort of 3 body case, see dole.
         # TODO: Understand better?
-        # TODO(woursler): Actually use the mass of the star?
-        return (self.mass / (STAR_MASS + self.mass))**0.25
+        if self._reduced_mass is None:
+            self._reduced_mass = (
+                self.mass / (self.star_mass + self.mass))**0.25
+        return self._reduced_mass
 
     @property
     def inner_effect_limit(self):
         # TODO(woursler): Should extend further in, include dust destabilized
         # by indirect gravitational effects.
-        return self.orbit.a * (1.0 - self.orbit.e) / (1.0 + DISK_ECCENTRICITY)
+        if self._inner_effect_limit is None:
+            self._inner_effect_limit = self.orbit.a * (1.0 - self.orbit.e) / (
+                1.0 + DISK_ECCENTRICITY)
+        return self._inner_effect_limit
 
     @property
     def outer_effect_limit(self):
         # TODO(woursler): See note on inner_effect_limit
-        return self.orbit.a * (1.0 + self.orbit.e) / (1.0 - DISK_ECCENTRICITY)
+        if self._outer_effect_limit is None:
+            self._outer_effect_limit = self.orbit.a * (1.0 + self.orbit.e) / (
+                1.0 - DISK_ECCENTRICITY)
+        return self._outer_effect_limit
 
 
-@attrs
+@attrs(slots=True)
 class Planetesimal(Planetoid):
     disk = attr()
 
+    @property
+    def star_mass(self):
+        return self.disk.context.mass
+
     @property
     def critical_mass(self):
         perihelion_dist = self.orbit.a * (1 - self.orbit.e)
-        temp = perihelion_dist * sqrt(self.disk.star.luminosity_ratio)
+        temp = perihelion_dist * self.disk.context.sqrt_luminosity
         # TODO(woursler): Understand the basis for this.
         return B * (dimensionless_with_units(temp, au)**-0.75) * solar_mass
 
@@ -173,7 +278,7 @@ def mass_repr(mass) -> str:
     return quantity_repr(mass, solar_mass)
 
 
-@attrs(repr=False)
+@attrs(repr=False, slots=True)
 class Protoplanet(Planetoid):
     star = attr()
     moons = attr(factory=list)
@@ -187,10 +292,14 @@ class Protoplanet(Planetoid):
             return 0 * kg
         return sum([moon.mass for moon in self.moons])
 
+    @property
+    def star_mass(self):
+        return self.star.context.mass
+
     @property
     def critical_mass(self):
         perihelion_dist = self.orbit.a * (1 - self.orbit.e)
-        temp = perihelion_dist * sqrt(self.star.luminosity_ratio)
+        temp = perihelion_dist * self.star.context.sqrt_luminosity
         return B * (dimensionless_with_units(temp, au)**-0.75) * solar_mass
 
     def __repr__(self):
@@ -199,15 +308,29 @@ class Protoplanet(Planetoid):
                 "\n")
 
 
-@attrs
+@attrs(slots=True)
 class Protomoon(Planetoid):
     protoplanet = attr()
 
+    @property
+    def star_mass(self):
+        if self.protoplanet is None:
+            return STAR_MASS
+        return self.protoplanet.star_mass
+
+
+# Shared defaults for the Planet fields below. Quantities are never changed
+# in place (only rebound), so one instance can back every planet rather than
+# each construction allocating its own zeroes.
+ZERO_AU = 0 * au
+ZERO_K = 0 * K
+ZERO_KM = 0 * km
+
 
 # TODO(woursler): Go over these with a fine tooth comb. Many are not relevant, or only relevant during initialization.
 # Many should be properties.
 # Many should be initialized differently.
-@attrs(repr=False)
+@attrs(repr=False, slots=True)
 class Planet():
     # Orbital details.
     orbit = attr()
@@ -222,12 +345,12 @@ class Planet():
     #   ZEROES start here -- TODO(woursler): A bunch of these should be other Zero-like types.
     gas_giant = attr(default=False)  # TRUE if the planet is a gas giant
     # semi-major axis of lunar orbit
-    moon_a = attr(factory=lambda: 0*au, repr=quantity_formatter(au))
+    moon_a = attr(default=ZERO_AU, repr=quantity_formatter(au))
     moon_e = attr(default=0)  # eccentricity of lunar orbit
     # radius of the rocky core
-    core_radius = attr(factory=lambda: 0*km, repr=quantity_formatter(km))
+    core_radius = attr(default=ZERO_KM, repr=quantity_formatter(km))
     # equatorial radius
-    radius = attr(factory=lambda: 0*km, repr=quantity_formatter(km))
+    radius = attr(default=ZERO_KM, repr=quantity_formatter(km))
     orbit_zone = attr(default=0)  # the 'zone' of the planet
     density = attr(default=0)  # density (in g/cc)
     orb_period = attr(default=0)  # length of the local year (days)
@@ -241,32 +364,33 @@ class Planet():
     volatile_gas_inventory = attr(default=0)
     surf_pressure = attr(default=0)  # units of millibars (mb)
     greenhouse_effect = attr(default=0)  # runaway greenhouse effect?
-    # the boiling po of water (Kelvin)
-    boil_po = attr(factory=lambda: 0*K, repr=quantity_formatter(K))
+    # the boiling point of water (Kelvin)
+    boil_point = attr(default=ZERO_K, repr=quantity_formatter(K))
     albedo = attr(default=0)  # albedo of the planet
-    exospheric_temp = attr(factory=lambda: 0*K, repr=quantity_formatter(K))
+    exospheric_temp = attr(default=ZERO_K, repr=quantity_formatter(K))
     # quick non-iterative estimate
-    estimated_temp = attr(factory=lambda: 0*K, repr=quantity_formatter(K))
+    estimated_temp = attr(default=ZERO_K, repr=quantity_formatter(K))
     # for terrestrial moons and the like
-    estimated_terr_temp = attr(factory=lambda: 0*K, repr=quantity_formatter(K))
+    estimated_terr_temp = attr(default=ZERO_K, repr=quantity_formatter(K))
     # surface temperature in Kelvin
-    surf_temp = attr(factory=lambda: 0*K, repr=quantity_formatter(K))
+    surf_temp = attr(default=ZERO_K, repr=quantity_formatter(K))
     # Temperature rise due to greenhouse
-    greenhs_rise = attr(factory=lambda: 0*K, repr=quantity_formatter(K))
+    greenhs_rise = attr(default=ZERO_K, repr=quantity_formatter(K))
     # Day-time temperature
-    high_temp = attr(factory=lambda: 0*K, repr=quantity_formatter(K))
+    high_temp = attr(default=ZERO_K, repr=quantity_formatter(K))
     # Night-time temperature
-    low_temp = attr(factory=lambda: 0*K, repr=quantity_formatter(K))
-    max_temp = attr(factory=lambda: 0*K,
-                    repr=quantity_formatter(K))  # Summer/Day
-    min_temp = attr(factory=lambda: 0*K,
-                    repr=quantity_formatter(K))  # Winter/Night
+    low_temp = attr(default=ZERO_K, repr=quantity_formatter(K))
+    max_temp = attr(default=ZERO_K, repr=quantity_formatter(K))  # Summer/Day
+    min_temp = attr(default=ZERO_K, repr=quantity_formatter(K))  # Winter/Night
     hydrosphere = attr(default=0)  # fraction of surface covered
     cloud_cover = attr(default=0)  # fraction of surface covered
     ice_cover = attr(default=0)  # fraction of surface covered
     sun = attr(default=0)
     atmosphere = attr(default=None)
+    gases = attr(default=0)  # number of gases in the atmosphere
     type = attr(default=PlanetType.UNKNOWN)  # Type code
+    # How the surface temperature solve went (enviroment.SurfaceTempConvergence)
+    surf_temp_convergence = attr(default=None, repr=False)
 
     #   ZEROES end here
 
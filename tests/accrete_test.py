@@ -0,0 +1,157 @@
+"""Tests for the disk lane store, the orbit index and the injection sampler."""
+
+import random
+
+import pytest
+
+from accrete import MAX_SEQUENTIAL_FAILURES
+from accrete import CircumstellarDustLane
+from accrete import DustLanes
+from accrete import InjectionSampler
+from accrete import OrbitIndex
+from fast_accrete import FastPlanetoid
+from fast_accrete import reach
+
+
+def edges(lanes):
+    return [(lane.inner, lane.outer, lane.dust_present, lane.gas_present)
+            for lane in lanes]
+
+
+def test_sweep_splits_lane():
+    """Sweeping the middle of a lane leaves dust on either side."""
+    lanes = DustLanes([CircumstellarDustLane(0.0, 200.0, True, True)])
+    lanes.sweep(10.0, 20.0, gas=True)
+    assert edges(lanes) == [
+        (0.0, 10.0, True, True),
+        (10.0, 20.0, False, True),
+        (20.0, 200.0, True, True),
+    ]
+
+
+def test_sweep_prunes_and_coalesces():
+    """Empty lanes are dropped and equal neighbours are merged."""
+    lanes = DustLanes([CircumstellarDustLane(0.0, 200.0, True, True)])
+    lanes.sweep(10.0, 20.0, gas=True)
+    lanes.sweep(15.0, 30.0, gas=False)
+    lanes.sweep(5.0, 12.0, gas=True)
+    assert edges(lanes) == [
+        (0.0, 5.0, True, True),
+        (5.0, 15.0, False, True),
+        (30.0, 200.0, True, True),
+    ]
+    assert lanes.dust_left
+
+
+def test_overlapping_and_dust_at_either_edge():
+    """Lookups agree with a linear scan over the lanes."""
+    lanes = DustLanes([CircumstellarDustLane(0.0, 200.0, True, True)])
+    lanes.sweep(10.0, 20.0, gas=True)
+    assert edges(lanes.overlapping(12.0, 25.0)) == [
+        (10.0, 20.0, False, True),
+        (20.0, 200.0, True, True),
+    ]
+    assert lanes.overlapping(250.0, 300.0) == []
+    assert not lanes.dust_at_either_edge(12.0, 18.0)
+    assert lanes.dust_at_either_edge(12.0, 25.0)
+    assert lanes.dust_at_either_edge(5.0, 18.0)
+
+
+def test_dust_left():
+    """A fully swept disk has no dust left."""
+    lanes = DustLanes([CircumstellarDustLane(0.0, 200.0, True, True)])
+    lanes.sweep(0.0, 200.0, gas=False)
+    assert not lanes.dust_left
+    assert len(lanes) == 0
+
+
+def overlaps(planet, canidate):
+    """The overlap test coalesce_planetesimals used to make on every pair."""
+    diff = planet.a - canidate.a
+    if diff > 0:
+        dist1 = canidate.apoapsis * (1 + canidate.reduced_mass(1.0)) \
+            - canidate.a
+        dist2 = planet.a - (planet.periapsis * (1 - planet.reduced_mass(1.0)))
+    else:
+        dist1 = canidate.a - (canidate.periapsis *
+                              (1 - canidate.reduced_mass(1.0)))
+        dist2 = (planet.apoapsis * (1 + planet.reduced_mass(1.0))) - planet.a
+    return abs(diff) <= abs(dist1) or abs(diff) <= abs(dist2)
+
+
+def random_planetoid(rng):
+    return FastPlanetoid(a=rng.uniform(0.1, 50.0),
+                         e=rng.uniform(0.0, 0.99) ** 4,
+                         dust_mass=10 ** rng.uniform(-9, -3),
+                         gas_mass=0.0)
+
+
+def test_first_overlap_matches_scan():
+    """The index finds the innermost overlapping body, as a scan would."""
+    rng = random.Random(0)
+    index = OrbitIndex(reach)
+    for _ in range(300):
+        canidate = random_planetoid(rng)
+        by_distance = sorted(index, key=lambda planet: planet.a)
+        expected = next((planet for planet in by_distance
+                         if overlaps(planet, canidate)), None)
+        found = index.first_overlap(*reach(canidate))
+        assert (None if found is None else index[found]) is expected
+        if found is not None and rng.random() < 0.5:
+            # Move it, as a collision would.
+            index[found].a = canidate.a
+            index[found].dust_mass += canidate.dust_mass
+            index.moved(found)
+        else:
+            index.add(canidate)
+    assert [planet.a for planet in index] == \
+        sorted(planet.a for planet in index)
+
+
+def narrow_lanes():
+    return DustLanes([CircumstellarDustLane(0.0, 2.0, False, True),
+                      CircumstellarDustLane(2.0, 2.5, True, True),
+                      CircumstellarDustLane(2.5, 12.0, False, True),
+                      CircumstellarDustLane(12.0, 12.5, True, True)])
+
+
+def draw_orbits(targeted, count):
+    sampler = InjectionSampler(narrow_lanes(), 0.3, 50.0, targeted=targeted)
+    rng = random.Random(1)
+    return sampler.counter, [sampler.draw(rng) for _ in range(count)]
+
+
+def test_targeted_injection_matches_plain_draws():
+    """Targeted draws have the distribution of plain ones, with few misses."""
+    count = 4000
+    plain, plain_orbits = draw_orbits(False, count)
+    targeted, targeted_orbits = draw_orbits(True, count)
+
+    def inner_share(orbits):
+        return sum(1 for a, _ in orbits if a < 7.0) / count
+
+    def mean_e(orbits):
+        return sum(e for _, e in orbits) / count
+
+    assert inner_share(targeted_orbits) == pytest.approx(
+        inner_share(plain_orbits), abs=0.05)
+    assert mean_e(targeted_orbits) == pytest.approx(
+        mean_e(plain_orbits), rel=0.1)
+    # The draws made and skipped stand for as many plain draws.
+    assert targeted.draws + targeted.skipped == pytest.approx(
+        plain.draws, rel=0.1)
+    assert targeted.injections == plain.injections == count
+    assert targeted.misses * 20 < plain.misses
+
+
+@pytest.mark.parametrize("targeted", [False, True])
+def test_injection_gives_up_without_reachable_dust(targeted):
+    """Without dust in reach, injection ends after the same failures."""
+    lanes = DustLanes([CircumstellarDustLane(0.0, 200.0, False, True),
+                       CircumstellarDustLane(200.0, 210.0, True, True)])
+    sampler = InjectionSampler(lanes, 0.3, 50.0, targeted=targeted)
+    assert sampler.draw(random.Random(0)) is None
+    counter = sampler.counter
+    assert counter.draws + counter.skipped == MAX_SEQUENTIAL_FAILURES
+    assert counter.injections == 0
+    assert counter.draws == (0 if targeted else MAX_SEQUENTIAL_FAILURES)
@@ -0,0 +1,42 @@
+"""Tests for the array atmosphere code in atmosphere.py."""
+
+import numpy as np
+import pytest
+
+import garnets
+
+from atmosphere import batch_gas_amounts
+from atmosphere import planet_gas_amounts
+from xatu.units import atm
+
+SEEDS = list(range(4))
+
+
+def planets_with_air(seed):
+    star = garnets.generate_seeded_stellar_system(seed)
+    planets = []
+    for planet in star.planets:
+        planets.append(planet)
+        planets.extend(planet.moons)
+    return star, [p for p in planets if p.surf_pressure > 0 * atm]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_gas_amounts_match_scalar_path(seed):
+    """One array pass gives the same amounts as the per-gas loop."""
+    star, planets = planets_with_air(seed)
+    for planet in planets:
+        expected = [float(amount) for amount in
+                    garnets.scalar_gas_amounts(star, planet)]
+        np.testing.assert_allclose(planet_gas_amounts(star, planet),
+                                   expected, rtol=1e-9, atol=0)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_batch_matches_single_planets(seed):
+    star, planets = planets_with_air(seed)
+    batch = batch_gas_amounts(star, planets)
+    assert batch.shape[0] == len(planets)
+    for row, planet in zip(batch, planets):
+        np.testing.assert_allclose(row, planet_gas_amounts(star, planet),
+                                   rtol=1e-12)
@@ -0,0 +1,95 @@
+"""Tests for the on-disk system cache in cache.py."""
+
+import os
+
+import filters
+import garnets
+
+from accrete import FAST_ACCRETION
+from cache import EVICTION_TARGET
+from cache import SystemCache
+from instrumentation import Instrumentation
+from stellar_system import Star
+from xatu.units import year
+
+SEEDS = list(range(6))
+
+
+def generate(cache, seed=SEEDS[0], **kwargs):
+    return garnets.generate_seeded_stellar_system(
+        seed, accretion=FAST_ACCRETION, cache=cache, **kwargs)
+
+
+def test_hits_return_the_stored_system(tmp_path):
+    cache = SystemCache(tmp_path)
+    instrumentation = Instrumentation()
+    generated = generate(cache, instrumentation=instrumentation)
+    loaded = generate(cache, instrumentation=instrumentation)
+    assert loaded is not generated
+    assert repr(loaded) == repr(generated)
+    assert cache.stats.hits == cache.stats.misses == cache.stats.writes == 1
+    assert instrumentation.counters['cache_hits'] == 1
+    assert instrumentation.counters['cache_misses'] == 1
+
+    # Defaults make the same key as leaving the option out.
+    generate(cache, do_gases=True)
+    assert cache.stats.hits == 2
+
+
+def test_keys_cover_seed_star_options_and_fingerprint(tmp_path):
+    cache = SystemCache(tmp_path)
+    star = Star(mass_ratio=1, age=4 * 10**9 * year)
+    older = Star(mass_ratio=1, age=5 * 10**9 * year)
+    keys = {
+        cache.key(1, None, 1, {}),
+        cache.key('1', None, 1, {}),
+        cache.key(1, None, 1.2, {}),
+        cache.key(1, star, 1, {}),
+        cache.key(1, older, 1, {}),
+        cache.key(1, None, 1, {'do_moons': False}),
+        cache.key(1, None, 1, {'system_filter': filters.HABITABLE}),
+        SystemCache(tmp_path, fingerprint={'code': 'other'}).key(
+            1, None, 1, {}),
+    }
+    assert len(keys) == 8
+    assert cache.key(1, star, 1, {}) == \
+        cache.key(1, Star(mass_ratio=1, age=4 * 10**9 * year), 1, {})
+
+
+def test_rejected_systems_are_cached(tmp_path):
+    cache = SystemCache(tmp_path)
+    rejected = [seed for seed in SEEDS
+                if generate(cache, seed, system_filter=filters.EARTHLIKE)
+                is None]
+    assert rejected
+    assert all(generate(cache, seed, system_filter=filters.EARTHLIKE) is None
+               for seed in rejected)
+    assert cache.stats.hits == len(rejected)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = SystemCache(tmp_path)
+    for seed in SEEDS:
+        generate(cache, seed)
+    entries = sorted(tmp_path.glob('*/*.system'))
+    for age, path in enumerate(entries):
+        os.utime(str(path), (1000 + age, 1000 + age))
+    newest = entries[-1]
+
+    small = SystemCache(tmp_path, max_bytes=int(
+        newest.stat().st_size / EVICTION_TARGET) + 1)
+    small.evict()
+    assert list(tmp_path.glob('*/*.system')) == [newest]
+    assert small.stats.evictions == len(SEEDS) - 1
+
+
+def test_batches_share_the_cache(tmp_path):
+    cache = SystemCache(tmp_path)
+    first = list(garnets.generate_stellar_systems(
+        SEEDS, workers=2, chunksize=2, accretion=FAST_ACCRETION, cache=cache))
+    assert cache.stats.misses == len(SEEDS)
+    second = list(garnets.generate_stellar_systems(
+        SEEDS, workers=0, accretion=FAST_ACCRETION, cache=cache))
+    assert cache.stats.hits == len(SEEDS)
+    assert repr(second) == repr(first)
+    assert not list(tmp_path.glob('*/*.tmp'))
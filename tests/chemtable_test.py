@@ -0,0 +1,61 @@
+"""Tests for the gas table in chemtable.py."""
+
+import pytest
+
+from chemtable import GASES
+from chemtable import GAS_ARRAYS
+from chemtable import GAS_INDEX
+from chemtable import cached_gas_rows
+from chemtable import lookup_gas
+from chemtable import read_gas_rows
+from xatu.core import dimensionless_with_units
+from xatu.units import K
+from xatu.units import kg
+from xatu.units import millibar
+from xatu.units import mol
+
+
+def test_lookup_gas_by_symbol():
+    for i, gas in enumerate(GASES):
+        assert GAS_INDEX[gas.symbol] == i
+        assert lookup_gas(gas.symbol) is gas
+
+    with pytest.raises(NotImplementedError):
+        lookup_gas('Unobtainium')
+
+
+def test_gas_arrays_match_gases():
+    """Row i of every array describes GASES[i]."""
+    assert GAS_ARRAYS.symbols == tuple(gas.symbol for gas in GASES)
+    for i, gas in enumerate(GASES):
+        assert GAS_ARRAYS.weight[i] == pytest.approx(
+            dimensionless_with_units(gas.weight, kg / mol))
+        assert GAS_ARRAYS.boil[i] == pytest.approx(
+            dimensionless_with_units(gas.boil, K))
+        assert GAS_ARRAYS.max_ipp[i] == pytest.approx(
+            dimensionless_with_units(gas.max_ipp, millibar))
+        assert GAS_ARRAYS.abunds[i] == gas.abunds
+        assert GAS_ARRAYS.reactivity[i] == gas.reactivity
+
+
+def test_gas_table_cache_tracks_csv(tmp_path):
+    """The pickled rows are reused until the csv changes."""
+    csv_filename = tmp_path / 'gases.csv'
+    cache_filename = tmp_path / 'gases.pickle'
+    csv_filename.write_text(
+        'num,symbol,name,weight,melt,boil,density,abunde,abunds,'
+        'reactivity,min_ipp,max_ipp\n'
+        '2,He,Helium,4.0026,3.46,4.2,0.0001787,7.94E-09,2722.7,0,0,81326.6\n')
+
+    rows = cached_gas_rows(csv_filename, cache_filename)
+    assert rows == read_gas_rows(csv_filename)
+    assert rows[0]['num'] == 2 and rows[0]['symbol'] == 'He'
+    assert rows[0]['weight'] == 4.0026
+    assert cache_filename.exists()
+    assert cached_gas_rows(csv_filename, cache_filename) == rows
+
+    with open(csv_filename, 'a') as csv_file:
+        csv_file.write('1,H,Atomic Hydrogen,1.0079,14.06,20.4,8.99E-05,'
+                       '0.00125893,27925.4,1,0,0\n')
+    assert [row['symbol'] for row in
+            cached_gas_rows(csv_filename, cache_filename)] == ['He', 'H']
@@ -0,0 +1,53 @@
+"""Tests for the catalog generator in cli.py."""
+
+import json
+
+import pytest
+
+import cli
+
+
+def run(tmp_path, *args):
+    cli.main(['-j', '0', '-o', str(tmp_path)] + list(args))
+    return json.loads((tmp_path / cli.CHECKPOINT_FILENAME).read_text())
+
+
+def test_writes_every_part_and_checkpoints(tmp_path):
+    checkpoint = run(tmp_path, '-s', '3', '-n', '5', '--part-size', '2')
+    assert checkpoint['done'] == [[0, 5]]
+
+    records = []
+    for path in sorted(tmp_path.glob('systems-*.ndjson')):
+        records.extend(json.loads(line) for line in path.open())
+    assert [r['seed'] for r in records if r['record'] == 'star'] == \
+        [3, 4, 5, 6, 7]
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_resumes_missing_parts_only(tmp_path):
+    run(tmp_path, '-s', '3', '-n', '4', '--part-size', '2')
+    first, second = sorted(tmp_path.glob('systems-*.ndjson'))
+
+    # As if the run had been killed while writing the second part.
+    checkpoint_path = tmp_path / cli.CHECKPOINT_FILENAME
+    checkpoint = json.loads(checkpoint_path.read_text())
+    checkpoint['done'] = [[0, 2]]
+    checkpoint_path.write_text(json.dumps(checkpoint))
+    second.unlink()
+    first_written = first.stat().st_mtime_ns
+
+    # The seed comes from the checkpoint.
+    assert run(tmp_path, '-n', '4', '--part-size', '2')['done'] == [[0, 4]]
+    assert second.exists()
+    assert first.stat().st_mtime_ns == first_written
+
+
+def test_refuses_other_settings(tmp_path):
+    run(tmp_path, '-s', '3', '-n', '2')
+    with pytest.raises(SystemExit):
+        run(tmp_path, '-s', '3', '-n', '2', '-M')
+
+
+def test_merge_ranges():
+    assert cli.merge_ranges([[4, 6], [0, 2], [2, 4], [8, 9]]) == \
+        [[0, 6], [8, 9]]
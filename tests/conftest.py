@@ -0,0 +1,10 @@
+"""Shared pytest configuration.
+
+The garnets modules import each other as top level modules (e.g.
+``from constants import B``), so the source directory has to be importable.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'garnets'))
@@ -0,0 +1,107 @@
+"""Tests for the batched environment code in enviroment_arrays.py."""
+
+import random
+
+import numpy as np
+import pytest
+
+import enviroment
+import fast_accrete
+import garnets
+
+from enviroment import PlanetType
+from enviroment_arrays import planet_environments
+from enviroment_arrays import protoplanet_table
+from enviroment_arrays import set_temp_range
+from xatu.core import dimensionless_with_units
+from xatu.units import K
+from xatu.units import atm
+from xatu.units import cm
+from xatu.units import g
+from xatu.units import hour
+from xatu.units import kg
+from xatu.units import km
+from xatu.units import m
+from xatu.units import mol
+from xatu.units import s
+from xatu.units import solar_mass
+
+SEEDS = list(range(4))
+
+GIANTS = (PlanetType.GAS_GIANT, PlanetType.SUB_GAS_GIANT,
+          PlanetType.SUB_SUB_GAS_GIANT)
+
+# Columns generate_planet settles before the surface temperature iteration.
+COLUMN_UNITS = {
+    'mass': solar_mass,
+    'gas_mass': solar_mass,
+    'core_radius': km,
+    'radius': km,
+    'density': g / cm ** 3,
+    'orb_period': 24 * hour,
+    'exospheric_temp': K,
+    'rms_velocity': m / s,
+    'surf_accel': m / s ** 2,
+    'esc_velocity': m / s,
+    'molec_weight': kg / mol,
+    'day': hour,
+    'estimated_terr_temp': K,
+}
+
+
+def protoplanets(seed):
+    rng = random.Random(seed)
+    star = garnets.random_star(rng)
+    return star, [
+        p for p in fast_accrete.generate_planetary_masses(
+            star, 0.0, star.stellar_dust_limit, do_moons=False, rng=rng)
+        if p.mass > 0 * kg
+    ]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_planet_environments_match_generate_planet(seed):
+    star, protos = protoplanets(seed)
+    columns = planet_environments(star, protoplanet_table(protos))
+    for i, proto in enumerate(protos):
+        planet = garnets.generate_planet(proto, star, do_gases=False,
+                                         do_moons=False)
+        assert columns['giant'][i] == (planet.type in GIANTS)
+        assert columns['resonant_period'][i] == planet.resonant_period
+        for name, unit in COLUMN_UNITS.items():
+            assert columns[name][i] == pytest.approx(
+                dimensionless_with_units(getattr(planet, name), unit),
+                rel=1e-9), name
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_initial_surface_temps_match_scalar_path(seed):
+    """The first-pass temperatures are calculate_surface_temp's first step."""
+    star, protos = protoplanets(seed)
+    columns = planet_environments(star, protoplanet_table(protos))
+    for i, proto in enumerate(protos):
+        if columns['giant'][i]:
+            continue
+        planet = garnets.generate_planet(proto, star, do_gases=False,
+                                         do_moons=False)
+        surf_pressure = columns['surf_pressure'][i] * atm
+        effective_temp = enviroment.eff_temp(
+            star.r_ecosphere, planet.orbit.a, enviroment.EARTH_ALBEDO)
+        planet.surf_temp = effective_temp + enviroment.green_rise(
+            enviroment.opacity(columns['molec_weight'][i] * kg / mol,
+                               surf_pressure),
+            effective_temp, surf_pressure)
+        planet.surf_pressure = surf_pressure
+        enviroment.set_temp_range(planet)
+        for name in ('surf_temp', 'high_temp', 'low_temp', 'max_temp',
+                     'min_temp'):
+            assert columns[name][i] == pytest.approx(
+                dimensionless_with_units(getattr(planet, name), K),
+                rel=1e-9), name
+
+
+def test_set_temp_range_broadcasts():
+    high, low, max_, min_ = set_temp_range(
+        np.array([1.0, 0.0]), 288.0, np.array([24.0, 1000.0]), 23.5, 0.02)
+    assert high.shape == low.shape == max_.shape == min_.shape == (2,)
+    assert np.all(min_ <= low) and np.all(low <= high) and np.all(high <= max_)
@@ -0,0 +1,98 @@
+"""Tests for planetary environment calculations in enviroment.py."""
+
+import pytest
+
+import enviroment
+import garnets
+
+from chemtable import lookup_gas
+from enviroment import BreathabilityPhrase
+from enviroment import bisect_min_molec_weight
+from enviroment import breathability
+from enviroment import min_molec_weight
+from stellar_system import Planet
+from xatu.core import dimensionless_with_units
+from xatu.units import atm
+from xatu.units import kg
+from xatu.units import mol
+
+SEEDS = list(range(4))
+
+
+def bodies_of(star):
+    for planet in star.planets:
+        yield planet
+        yield from planet.moons
+
+
+def bodies(seed):
+    return bodies_of(garnets.generate_seeded_stellar_system(seed))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_min_molec_weight_matches_bisection(seed):
+    """The closed form solve lands where the bisection does."""
+    for planet in bodies(seed):
+        assert dimensionless_with_units(
+            min_molec_weight(planet), kg / mol) == pytest.approx(
+                dimensionless_with_units(
+                    bisect_min_molec_weight(planet), kg / mol), rel=1e-6)
+
+
+def test_min_molec_weight_is_memoized():
+    planet = next(p for p in bodies(0) if p.surf_grav)
+    min_molec_weight(planet)
+    before = enviroment.RETENTION_COUNTER.memo_hits
+    saved = enviroment.RETENTION_COUNTER.gas_life_calls_saved
+    min_molec_weight(planet)
+    assert enviroment.RETENTION_COUNTER.memo_hits == before + 1
+    assert enviroment.RETENTION_COUNTER.gas_life_calls_saved > saved
+
+
+def solve_all(seed, solver):
+    star = garnets.generate_seeded_stellar_system(
+        seed, surface_temp_solver=solver)
+    return [
+        (planet.type, planet.surf_temp_convergence)
+        for planet in bodies_of(star)
+        if planet.surf_temp_convergence is not None
+    ]
+
+
+def test_default_surface_temp_solver_is_the_relaxation():
+    """Unless asked for, the adaptive solver leaves catalogs unchanged."""
+    for seed in SEEDS:
+        assert solve_all(seed, None) == \
+            solve_all(seed, enviroment.RELAXATION_SOLVER)
+
+
+def test_adaptive_surface_temp_solver_takes_fewer_iterations():
+    """Same planet types as the fixed relaxation, in fewer iterations."""
+    relaxed = []
+    adaptive = []
+    for seed in SEEDS:
+        relaxed += solve_all(seed, enviroment.RELAXATION_SOLVER)
+        adaptive += solve_all(seed, enviroment.ADAPTIVE_SOLVER)
+
+    assert [kind for kind, _ in adaptive] == [kind for kind, _ in relaxed]
+    assert all(stats.converged for _, stats in adaptive)
+    assert sum(stats.iterations for _, stats in adaptive) < sum(
+        stats.iterations for _, stats in relaxed)
+
+
+def air(**pressures):
+    """An atmosphere of the given partial pressures, in atm."""
+    return [(lookup_gas(symbol), pressure * atm)
+            for symbol, pressure in pressures.items()]
+
+
+@pytest.mark.parametrize("atmosphere, expected", [
+    (None, BreathabilityPhrase.NONE),
+    (air(N2=0.78, O=0.21), BreathabilityPhrase.BREATHABLE),
+    (air(N2=0.98, O=0.02), BreathabilityPhrase.UNBREATHABLE),
+    (air(N2=0.68, O=0.21, CO2=0.1), BreathabilityPhrase.POISONOUS),
+])
+def test_breathability(atmosphere, expected):
+    planet = Planet(orbit=None, axial_tilt=0, mass=0, dust_mass=0, gas_mass=0,
+                    surf_pressure=1 * atm, atmosphere=atmosphere)
+    assert breathability(planet) == expected
@@ -0,0 +1,56 @@
+"""Tests for the streaming writers in export.py."""
+
+import io
+import json
+
+import pytest
+
+import garnets
+
+from export import NdjsonWriter
+from export import PLANET_FIELDS
+from export import STAR_FIELDS
+from export import ParquetWriter
+from export import export_systems
+
+SEEDS = [0, 1, 'WhoPatentsMath']
+
+
+def test_ndjson_has_a_line_per_star_and_body():
+    stream = io.StringIO()
+    count = export_systems(garnets.iter_stellar_systems(SEEDS),
+                           [NdjsonWriter(stream)])
+    assert count == len(SEEDS)
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    stars = [r for r in records if r['record'] == 'star']
+    planets = [r for r in records if r['record'] == 'planet']
+    assert [star['seed'] for star in stars] == SEEDS
+    assert all(set(star) == {'record'} | {f for f, _ in STAR_FIELDS}
+               for star in stars)
+    assert all(set(planet) == {'record'} | {f for f, _ in PLANET_FIELDS}
+               for planet in planets)
+
+    for seed in SEEDS:
+        system = garnets.generate_seeded_stellar_system(seed)
+        bodies = sum(1 + len(planet.moons) for planet in system.planets)
+        assert len([p for p in planets if p['seed'] == seed]) == bodies
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+
+    stars_path = tmp_path / 'stars.parquet'
+    planets_path = tmp_path / 'planets.parquet'
+    stream = io.StringIO()
+    with ParquetWriter(str(stars_path), str(planets_path),
+                       row_group_size=4) as writer:
+        export_systems(garnets.iter_stellar_systems(SEEDS),
+                       [writer, NdjsonWriter(stream)])
+
+    lines = stream.getvalue().splitlines()
+    stars = pyarrow.parquet.read_table(str(stars_path))
+    planets = pyarrow.parquet.read_table(str(planets_path))
+    assert stars.column('seed').to_pylist() == [str(s) for s in SEEDS]
+    assert stars.num_rows + planets.num_rows == len(lines)
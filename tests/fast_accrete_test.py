@@ -0,0 +1,116 @@
+"""Parity tests for the unit-free accretion engine."""
+
+import random
+
+import pytest
+
+import fast_accrete
+import garnets
+
+from accrete import ACCRETION_TOLERANCE
+from stellar_system import Star
+from xatu.core import dimensionless_with_units
+from xatu.units import au
+from xatu.units import solar_mass
+from xatu.units import year
+
+SEEDS = ['WhoPatentsMath', 'garnets', 1985]
+
+
+def accrete_with_seed(generate_planetary_masses, seed, do_moons,
+                      targeted_injection=False, mass_ratio=1):
+    star = Star(mass_ratio=mass_ratio, age=4.6 * 10**9 * year)
+    return generate_planetary_masses(star,
+                                     0.0,
+                                     star.stellar_dust_limit,
+                                     do_moons=do_moons,
+                                     rng=random.Random(seed),
+                                     targeted_injection=targeted_injection)
+
+
+def as_floats(planetoid):
+    return (
+        dimensionless_with_units(planetoid.dust_mass, solar_mass),
+        dimensionless_with_units(planetoid.gas_mass, solar_mass),
+    )
+
+
+def assert_same_protoplanets(reference, fast):
+    assert len(fast) == len(reference)
+    for expected, actual in zip(reference, fast):
+        assert dimensionless_with_units(actual.orbit.a, au) == pytest.approx(
+            dimensionless_with_units(expected.orbit.a, au), rel=1e-9)
+        assert actual.orbit.e == pytest.approx(expected.orbit.e, rel=1e-9)
+        assert as_floats(actual) == pytest.approx(
+            as_floats(expected), rel=1e-9)
+
+        assert len(actual.moons) == len(expected.moons)
+        for expected_moon, actual_moon in zip(expected.moons, actual.moons):
+            assert as_floats(actual_moon) == pytest.approx(
+                as_floats(expected_moon), rel=1e-9)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("do_moons", [True, False])
+@pytest.mark.parametrize("targeted_injection", [False, True])
+def test_fast_accretion_matches_reference(seed, do_moons,
+                                          targeted_injection):
+    """The float engine yields the same protoplanets as the reference."""
+    reference = accrete_with_seed(garnets.generate_planetary_masses, seed,
+                                  do_moons, targeted_injection)
+    fast = accrete_with_seed(fast_accrete.generate_planetary_masses, seed,
+                             do_moons, targeted_injection)
+    assert_same_protoplanets(reference, fast)
+
+
+@pytest.mark.parametrize("mass_ratio", [0.6, 1.6])
+def test_fast_accretion_matches_reference_for_other_stars(mass_ratio):
+    """Both engines work with the star's own mass and luminosity."""
+    reference = accrete_with_seed(garnets.generate_planetary_masses,
+                                  SEEDS[0], True, mass_ratio=mass_ratio)
+    fast = accrete_with_seed(fast_accrete.generate_planetary_masses,
+                             SEEDS[0], True, mass_ratio=mass_ratio)
+    assert_same_protoplanets(reference, fast)
+
+
+@pytest.mark.parametrize("a, e", [(1.0, 0.05), (5.2, 0.2), (30.0, 0.01)])
+def test_accelerated_accretion_converges_to_same_mass(a, e):
+    """Extrapolated sweeps land on the same mass with far fewer sweeps."""
+    star = Star(mass_ratio=1, age=4.6 * 10**9 * year)
+    results = []
+    for accelerate in (False, True):
+        disk = fast_accrete.FastCircumstellarDisk.for_star(
+            star, accelerate=accelerate)
+        planetoid = fast_accrete.FastPlanetoid(
+            a=a,
+            e=e,
+            dust_mass=fast_accrete.PROTOPLANET_MASS_RATIO,
+            gas_mass=0.0,
+        )
+        disk.accrete_dust(planetoid)
+        results.append((planetoid.mass, disk.sweeps))
+
+    (plain_mass, plain_sweeps), (fast_mass, fast_sweeps) = results
+    # Both stop within a few tolerances of the fixed point, plain polling
+    # from below and extrapolation from either side.
+    assert fast_mass == pytest.approx(plain_mass,
+                                      rel=5 * ACCRETION_TOLERANCE)
+    assert fast_sweeps.sweeps * 3 <= plain_sweeps.sweeps
+    assert fast_sweeps.sweeps_saved > 0
+    assert plain_sweeps.sweeps_saved == 0
+
+
+def test_accelerated_accretion_matches_plain_systems():
+    """Extrapolation leaves whole systems within the same tolerance."""
+    for seed in range(10):
+        results = []
+        for accelerate in (False, True):
+            star = Star(mass_ratio=1, age=4.6 * 10**9 * year)
+            protoplanets = fast_accrete.generate_planetary_masses(
+                star, 0.0, star.stellar_dust_limit,
+                accelerate=accelerate, rng=random.Random(seed))
+            results.append([sum(as_floats(planetoid))
+                            for planetoid in protoplanets])
+        plain, accelerated = results
+        assert accelerated == pytest.approx(plain,
+                                            rel=5 * ACCRETION_TOLERANCE), seed
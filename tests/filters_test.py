@@ -0,0 +1,116 @@
+"""Tests for the system filters in filters.py."""
+
+import random
+
+import pytest
+
+import filters
+import garnets
+
+from accrete import FAST_ACCRETION
+from constants import EARTH_AVERAGE_TEMP
+from constants import FREEZING_POINT_OF_WATER
+from filters import FilterStats
+from filters import SystemFilter
+from xatu.units import K
+from xatu.units import year
+
+SEEDS = list(range(8))
+
+
+def systems(**kwargs):
+    return garnets.generate_stellar_systems(SEEDS, accretion=FAST_ACCRETION,
+                                            **kwargs)
+
+
+def has_ten_protoplanets(star, protoplanets):
+    return len(protoplanets) >= 10
+
+
+def has_twelve_planets(star):
+    return len(star.planets) >= 12
+
+
+MANY_PLANETS = SystemFilter('many-planets', has_twelve_planets,
+                            has_ten_protoplanets)
+
+
+@pytest.mark.parametrize("system_filter", [
+    filters.HABITABLE,
+    filters.MULTI_HABITABLE,
+    filters.EARTHLIKE,
+    filters.JOVIAN_HABITABLE,
+    MANY_PLANETS,
+])
+def test_filtering_matches_checking_afterwards(system_filter):
+    expected = [seed for seed, star in systems(workers=0)
+                if system_filter.accept(star)]
+    stats = FilterStats()
+    kept = [seed for seed, _ in systems(workers=0, system_filter=system_filter,
+                                        filter_stats=stats)]
+    assert kept == expected
+    assert stats.systems == len(SEEDS)
+    assert stats.accepted == len(kept)
+    assert stats.rejected == len(SEEDS) - len(kept)
+
+
+def accreted_and_generated(seed):
+    rng = random.Random(seed)
+    star = garnets.random_star(rng)
+    protoplanets = garnets.accrete_protoplanets(
+        star, accretion=FAST_ACCRETION, rng=rng)
+    bounds = [[filters.max_rocky_gravity(star, p.orbit.a, body.mass)
+               for body in [p] + p.moons] for p in protoplanets]
+    garnets.populate_planets(star, protoplanets, rng=rng)
+    return star, protoplanets, bounds
+
+
+def test_prefilters_bound_what_accept_looks_at():
+    """Each prefilter passes every system with a body that could pass."""
+    ecosphere_systems = 0
+    for seed in range(16):
+        star, protoplanets, bounds = accreted_and_generated(seed)
+        ecosphere = [body for planet in star.planets
+                     if filters.in_ecosphere(star, planet.orbit.a)
+                     for body in [planet] + planet.moons]
+        ecosphere_systems += bool(ecosphere)
+        assert filters.may_be_habitable(star, protoplanets) == \
+            bool(ecosphere), seed
+        assert filters.may_be_multi_habitable(star, protoplanets) == \
+            (len(ecosphere) > 1), seed
+
+        for planet, planet_bounds in zip(star.planets, bounds):
+            bodies = [planet] + planet.moons
+            assert len(bodies) == len(planet_bounds)
+            for body, bound in zip(bodies, planet_bounds):
+                if body.type not in filters.GIANT_TYPES:
+                    assert body.surf_grav <= bound * (1 + 1e-9), seed
+
+        temperate = any(
+            FREEZING_POINT_OF_WATER <= planet.estimated_terr_temp
+            <= EARTH_AVERAGE_TEMP + 10 * K for planet in star.planets)
+        assert filters.may_have_habitable_jovian(star, protoplanets) == \
+            (temperate and star.age > 2.0E9 * year), seed
+    assert 0 < ecosphere_systems < 16
+
+
+def test_stats_are_gathered_from_workers():
+    serial = FilterStats()
+    list(systems(workers=0, system_filter=MANY_PLANETS, filter_stats=serial))
+    parallel = FilterStats()
+    list(systems(workers=2, chunksize=3, system_filter=MANY_PLANETS,
+                 filter_stats=parallel))
+    for name in ('systems', 'rejected_early', 'rejected_late', 'accepted'):
+        assert getattr(parallel, name) == getattr(serial, name), name
+    assert serial.rejected_early > 0
+    assert serial.rejected_late > 0
+    assert serial.accepted > 0
+
+
+def test_time_saved():
+    stats = FilterStats(systems=4, rejected_early=2, rejected_late=1,
+                        accepted=1, generation_time=3.0)
+    assert stats.rejection_rate == 0.75
+    assert stats.early_rejection_rate == 0.5
+    assert stats.time_saved == 3.0
+    assert FilterStats().time_saved == 0.0
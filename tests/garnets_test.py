@@ -0,0 +1,73 @@
+"""Tests for system generation in garnets.py."""
+
+import garnets
+
+from accrete import FAST_ACCRETION
+from xatu.units import kg
+from xatu.units import km
+
+SEEDS = list(range(6))
+
+
+def summarize(system):
+    return [
+        (planet.orbit.a, planet.orbit.e, planet.mass, planet.type,
+         len(planet.moons))
+        for planet in system.planets
+    ]
+
+
+def generate(**kwargs):
+    return [
+        (seed, summarize(system))
+        for seed, system in garnets.generate_stellar_systems(SEEDS, **kwargs)
+    ]
+
+
+def test_batch_generation_matches_serial():
+    """Worker processes produce exactly what a serial run does."""
+    serial = generate(workers=0)
+    assert [seed for seed, _ in serial] == SEEDS
+    assert generate(workers=2, chunksize=2) == serial
+    assert sorted(generate(workers=2, ordered=False)) == sorted(serial)
+
+
+def test_seeded_system_is_independent_of_history():
+    """A seed always yields the same system, whatever ran before it."""
+    first = summarize(garnets.generate_seeded_stellar_system(3))
+    garnets.generate_seeded_stellar_system(4)
+    assert summarize(garnets.generate_seeded_stellar_system(3)) == first
+
+
+def details(system):
+    return [
+        (planet.mass, planet.albedo, planet.surf_temp, planet.type,
+         planet.atmosphere,
+         [(moon.orbit.a, moon.mass) for moon in planet.moons])
+        for planet in system.planets
+    ]
+
+
+def test_lazy_planets_match_eager_ones():
+    eager = garnets.generate_seeded_stellar_system(2, accretion=FAST_ACCRETION)
+    lazy = garnets.generate_seeded_stellar_system(
+        2, accretion=FAST_ACCRETION, lazy=True)
+    # Looking at the planets out of order changes nothing.
+    lazy.planets[-1].materialize()
+    assert details(lazy) == details(eager)
+    garnets.materialize_system(lazy)
+    assert all(isinstance(p, garnets.Planet) for p in lazy.planets)
+    assert details(lazy) == details(eager)
+
+
+def test_lazy_planets_only_work_out_what_is_read(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("details were worked out")
+
+    system = garnets.generate_seeded_stellar_system(
+        2, accretion=FAST_ACCRETION, lazy=True)
+    monkeypatch.setattr(garnets, 'generate_planet_details', fail)
+    for planet in system.planets:
+        assert planet.orbit.apoapsis >= planet.orbit.periapsis
+        assert planet.mass > 0 * kg
+        assert planet.radius > 0 * km
@@ -0,0 +1,154 @@
+"""Tests for the stage timing and counters in instrumentation.py."""
+
+import json
+import random
+
+import pytest
+
+import fast_accrete
+import garnets
+
+from accrete import FAST_ACCRETION
+from instrumentation import Instrumentation
+from instrumentation import Tracer
+from stellar_system import Star
+from xatu.units import year
+
+SEEDS = list(range(6))
+
+ACCRETION_COUNTERS = ('injections', 'draws', 'misses', 'skipped',
+                      'accretions', 'sweeps', 'protoplanets', 'coalescences',
+                      'moon_captures')
+
+
+def instrumented_accretion(generate_planetary_masses, seed):
+    instrumentation = Instrumentation()
+    star = Star(mass_ratio=1, age=4.6 * 10**9 * year)
+    generate_planetary_masses(star, 0.0, star.stellar_dust_limit,
+                              rng=random.Random(seed),
+                              instrumentation=instrumentation)
+    return instrumentation
+
+
+def test_instrumentation_does_not_change_systems():
+    for seed in SEEDS[:3]:
+        plain = garnets.generate_seeded_stellar_system(
+            seed, accretion=FAST_ACCRETION)
+        instrumented = garnets.generate_seeded_stellar_system(
+            seed, accretion=FAST_ACCRETION, instrumentation=Instrumentation())
+        assert repr(instrumented.planets) == repr(plain.planets)
+
+
+@pytest.mark.parametrize("seed", ['WhoPatentsMath', 1985])
+def test_both_engines_count_the_same(seed):
+    reference = instrumented_accretion(garnets.generate_planetary_masses,
+                                       seed)
+    fast = instrumented_accretion(fast_accrete.generate_planetary_masses,
+                                  seed)
+    for name in ACCRETION_COUNTERS:
+        assert fast.counters[name] == reference.counters[name], name
+    assert fast.peaks == reference.peaks
+
+    counters = reference.counters
+    # Every accreted candidate is placed one of three ways, and each
+    # collision sweeps the disk again.
+    assert counters['protoplanets'] + counters['coalescences'] + \
+        counters['moon_captures'] <= counters['injections']
+    assert counters['accretions'] == \
+        counters['injections'] + counters['coalescences']
+    assert set(reference.stages) == {'injection', 'accrete_dust',
+                                     'coalescence'}
+    assert reference.stages['injection'].calls == \
+        counters['injections'] + 1
+
+
+def test_stats_are_gathered_from_workers():
+    serial = Instrumentation()
+    list(garnets.generate_stellar_systems(SEEDS, workers=0,
+                                          accretion=FAST_ACCRETION,
+                                          instrumentation=serial))
+    parallel = Instrumentation()
+    list(garnets.generate_stellar_systems(SEEDS, workers=2, chunksize=2,
+                                          accretion=FAST_ACCRETION,
+                                          instrumentation=parallel))
+    assert parallel.counters == serial.counters
+    assert parallel.peaks == serial.peaks
+    assert {name: times.calls for name, times in parallel.stages.items()} \
+        == {name: times.calls for name, times in serial.stages.items()}
+
+    assert serial.counters['systems'] == len(SEEDS)
+    assert serial.stages['accretion'].calls == len(SEEDS)
+    assert serial.stages['planets'].calls == len(SEEDS)
+    assert serial.counters['surface_temp_iterations'] >= \
+        serial.counters['surface_temp_planets'] > 0
+    assert serial.stages['planets'].wall >= \
+        serial.stages['surface_temp'].wall > 0
+
+
+def test_lazy_planets_report_when_worked_out():
+    instrumentation = Instrumentation()
+    system = garnets.generate_seeded_stellar_system(
+        SEEDS[0], accretion=FAST_ACCRETION, lazy=True,
+        instrumentation=instrumentation)
+    assert 'surface_temp' not in instrumentation.stages
+    garnets.materialize_system(system)
+    assert instrumentation.counters['surface_temp_planets'] > 0
+
+
+def test_trace(tmp_path):
+    tracer = Tracer()
+    garnets.generate_seeded_stellar_system(1985, instrumentation=tracer)
+    path = tmp_path / 'trace.json'
+    tracer.write(path)
+    events = json.loads(path.read_text())['traceEvents']
+
+    assert all(event['ph'] == 'X' for event in events)
+    system, = [event for event in events if event['name'] == 'system']
+    assert system['args'] == {'seed': 1985, 'systems': 1}
+    for event in events:
+        assert system['ts'] <= event['ts']
+        assert event['ts'] + event['dur'] <= system['ts'] + system['dur']
+
+    dust = [event for event in events if event['name'] == 'accrete_dust']
+    assert len(dust) == tracer.counters['injections']
+    assert 0 < sum(event['args']['sweeps'] for event in dust) <= \
+        tracer.counters['sweeps']
+    outcomes = [event['args'] for event in events
+                if event['name'] == 'coalescence']
+    assert sum(args.get('coalescences', 0) for args in outcomes) == \
+        tracer.counters['coalescences']
+    planets = [event['args']['planet'] for event in events
+               if event['name'] == 'planet']
+    assert planets == list(range(len(planets)))
+
+
+def test_traces_are_gathered_from_workers():
+    tracer = Tracer()
+    list(garnets.generate_stellar_systems(SEEDS[:4], workers=2, chunksize=2,
+                                          accretion=FAST_ACCRETION,
+                                          instrumentation=tracer))
+    seeds = sorted(event['args']['seed'] for event in tracer.events
+                   if event['name'] == 'system')
+    assert seeds == SEEDS[:4]
+    assert tracer.counters['systems'] == 4
+
+
+def test_update():
+    first = Instrumentation()
+    first.count('draws', 3)
+    first.peak('lanes', 4)
+    with first.stage('accretion'):
+        pass
+    second = Instrumentation()
+    second.count('draws')
+    second.count('misses', 2)
+    second.peak('lanes', 2)
+    with second.stage('accretion'):
+        pass
+
+    first.update(second)
+    assert first.counters == {'draws': 4, 'misses': 2}
+    assert first.peaks == {'lanes': 4}
+    assert first.stages['accretion'].calls == 2
+    assert first.ratio('misses', 'draws') == 0.5
+    assert first.ratio('misses', 'injections') == 0.0
@@ -0,0 +1,87 @@
+"""Tests for the two-stage pipeline in pipeline.py."""
+
+import accrete
+import enviroment
+import fast_accrete
+import garnets
+import pipeline
+
+from accrete import FAST_ACCRETION
+from pipeline import Pipeline
+
+SEEDS = list(range(4))
+
+
+def test_same_systems_as_generating_in_one_go(tmp_path):
+    for run in range(2):
+        stages = Pipeline(tmp_path)
+        for seed in SEEDS:
+            expected = garnets.generate_seeded_stellar_system(
+                seed, accretion=FAST_ACCRETION)
+            actual = stages.generate(seed, accretion=FAST_ACCRETION)
+            assert repr(actual) == repr(expected), (run, seed)
+        assert stages.artifacts.stats.hits == (len(SEEDS) if run else 0)
+
+
+def test_affected_stages():
+    for constant in ('DUST_DENSITY_COEFF', 'ECCENTRICITY_COEFF',
+                     'GAS_DUST_RATIO', 'B'):
+        assert pipeline.affected_stages(constant) == \
+            ['accretion', 'environment'], constant
+    for constant in ('GAS_RETENTION_THRESHOLD', 'ROCKY_ALBEDO',
+                     'CLOUD_ALBEDO'):
+        assert pipeline.affected_stages(constant) == ['environment'], \
+            constant
+    assert pipeline.affected_stages('NOT_A_CONSTANT') == []
+
+
+def test_environment_change_reuses_accretion(tmp_path, monkeypatch):
+    Pipeline(tmp_path).generate(SEEDS[0], accretion=FAST_ACCRETION)
+
+    monkeypatch.setattr(enviroment, 'ROCKY_ALBEDO',
+                        enviroment.ROCKY_ALBEDO * 1.1)
+    stages = Pipeline(tmp_path)
+    assert stages.invalidated == ['environment']
+    stages.generate(SEEDS[0], accretion=FAST_ACCRETION)
+    assert stages.artifacts.stats.hits == 1
+
+    assert Pipeline(tmp_path).invalidated == []
+
+
+def test_accretion_change_invalidates_both(tmp_path, monkeypatch):
+    Pipeline(tmp_path).generate(SEEDS[0], accretion=FAST_ACCRETION)
+
+    for module in (accrete, fast_accrete):
+        monkeypatch.setattr(module, 'DUST_DENSITY_COEFF',
+                            module.DUST_DENSITY_COEFF * 1.1)
+    stages = Pipeline(tmp_path)
+    assert stages.invalidated == ['accretion', 'environment']
+    stages.generate(SEEDS[0], accretion=FAST_ACCRETION)
+    assert stages.artifacts.stats.hits == 0
+    assert stages.artifacts.stats.misses == 1
+
+
+def test_accretion_takes_only_the_accretion_side_of_garnets():
+    functions = pipeline.stage_functions('accretion')
+    for name in ('random_star', 'accrete_protoplanets',
+                 'generate_planetary_masses', 'coalesce_planetesimals'):
+        assert name in functions, name
+    for name in ('populate_planets', 'generate_planet'):
+        assert name not in functions, name
+    assert pipeline.stage_functions('environment') == {}
+
+
+def edited():
+    return None
+
+
+def test_editing_garnets(monkeypatch):
+    before = pipeline.stage_fingerprints()
+    monkeypatch.setattr(garnets.populate_planets, '__code__',
+                        edited.__code__)
+    assert pipeline.stage_fingerprints()['accretion'] == \
+        before['accretion']
+    monkeypatch.setattr(garnets.planetoid_reach, '__code__',
+                        edited.__code__)
+    assert pipeline.stage_fingerprints()['accretion'] != \
+        before['accretion']
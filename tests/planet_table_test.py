@@ -0,0 +1,57 @@
+"""Tests for the columnar planet store in planet_table.py."""
+
+import attr
+import pytest
+
+import garnets
+
+from planet_table import PlanetTable
+from stellar_system import Planet
+from xatu.core import dimensionless_with_units
+from xatu.units import atm
+
+SEEDS = list(range(4))
+
+# Fields the table does not keep, or keeps in another form.
+SKIPPED = {'orbit', 'moons', 'sun', 'atmosphere', 'surf_temp_convergence'}
+
+
+def assert_same_planet(original, rebuilt):
+    for field in attr.fields(Planet):
+        if field.name in SKIPPED:
+            continue
+        assert getattr(rebuilt, field.name) == pytest.approx(
+            getattr(original, field.name), rel=1e-12), field.name
+    assert rebuilt.orbit.e == original.orbit.e
+    if original.atmosphere is None:
+        assert rebuilt.atmosphere is None
+    else:
+        assert [gas for gas, _ in rebuilt.atmosphere] == \
+            [gas for gas, _ in original.atmosphere]
+        assert [dimensionless_with_units(p, atm)
+                for _, p in rebuilt.atmosphere] == pytest.approx(
+                    [dimensionless_with_units(p, atm)
+                     for _, p in original.atmosphere])
+
+
+def test_round_trip():
+    stars = [garnets.generate_seeded_stellar_system(seed) for seed in SEEDS]
+    table = PlanetTable.from_stars(stars)
+
+    originals = [planet for star in stars for planet in star.planets]
+    rebuilt = list(table)
+    assert len(rebuilt) == len(originals)
+    assert len(table) == sum(1 + len(p.moons) for p in originals)
+    for original, planet in zip(originals, rebuilt):
+        assert_same_planet(original, planet)
+        assert len(planet.moons) == len(original.moons)
+        for original_moon, moon in zip(original.moons, planet.moons):
+            assert_same_planet(original_moon, moon)
+
+
+def test_columns():
+    star = garnets.generate_seeded_stellar_system(0)
+    table = PlanetTable.from_stars([star])
+    assert list(table.column('is_moon')).count(0) == len(star.planets)
+    assert table.column('mass').shape == (len(table),)
+    assert table[-1].sun.mass_ratio == star.mass_ratio
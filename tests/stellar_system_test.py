@@ -0,0 +1,60 @@
+"""Tests for the data structures in stellar_system.py."""
+
+import attr
+import pytest
+
+from accrete import CircumstellarDisk
+from stellar_system import Orbit
+from stellar_system import Planet
+from stellar_system import Planetesimal
+from stellar_system import Protomoon
+from stellar_system import Star
+from xatu.units import au
+from xatu.units import earth_mass
+from xatu.units import year
+
+
+def test_planetoid_derived_values_follow_their_inputs():
+    moon = Protomoon(orbit=Orbit(a=1 * au, e=0.1), dust_mass=1 * earth_mass,
+                     gas_mass=0 * earth_mass, protoplanet=None)
+    inner = moon.inner_effect_limit
+    reduced_mass = moon.reduced_mass
+    assert moon.mass == 1 * earth_mass
+
+    moon.gas_mass = 1 * earth_mass
+    assert moon.mass == 2 * earth_mass
+    assert moon.reduced_mass > reduced_mass
+
+    moon.orbit = Orbit(a=2 * au, e=0.1)
+    assert moon.inner_effect_limit == 2 * inner
+
+
+def test_planet_is_slotted():
+    planet = Planet(orbit=None, axial_tilt=0, mass=0, dust_mass=0, gas_mass=0)
+    assert not hasattr(planet, '__dict__')
+
+
+def test_star_context_is_cached_until_the_mass_changes():
+    star = Star(mass_ratio=1.0, age=4.6E9 * year)
+    context = star.context
+    assert star.context is context
+    assert star.r_ecosphere == context.r_ecosphere
+    with pytest.raises(attr.exceptions.FrozenInstanceError):
+        context.mass_ratio = 2.0
+
+    star.mass_ratio = 1.5
+    assert star.context is not context
+    assert star.context.luminosity_ratio == 1.5**4
+    assert star.stellar_dust_limit > context.stellar_dust_limit
+
+
+def test_reduced_mass_uses_the_star_mass():
+    reduced_masses = []
+    for mass_ratio in (0.5, 1.0, 2.0):
+        disk = CircumstellarDisk(Star(mass_ratio=mass_ratio,
+                                      age=1.0E9 * year))
+        planetesimal = Planetesimal(disk=disk, orbit=Orbit(a=1 * au, e=0.1),
+                                    dust_mass=1 * earth_mass,
+                                    gas_mass=0 * earth_mass)
+        reduced_masses.append(planetesimal.reduced_mass)
+    assert reduced_masses == sorted(reduced_masses, reverse=True)